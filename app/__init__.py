@@ -9,4 +9,18 @@ __all__ = [
     "watcher",
     "api",
     "utils",
+    "thumbnails",
+    "cache",
+    "serializers",
+    "records",
+    "metrics",
+    "profiling",
+    "scheduler",
+    "ingest_queue",
+    "blobstore",
+    "retry",
+    "rollups",
+    "calibration",
+    "organizations",
+    "parse_pool",
 ]
@@ -2,26 +2,41 @@
 
 from __future__ import annotations
 
-import csv
+import asyncio
+import hashlib
 import io
+import os
 import re
-import zipfile
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
 
 from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.responses import FileResponse, JSONResponse
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import and_, desc, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import calibration, rollups
+from app.blobstore import BlobStore
+from app.cache import ResponseCache
 from app.config import AppConfig
 from app.database import Database
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.metrics import HTTP_REQUEST_SECONDS, REGISTRY, Gauge
 from app.models import Device, TestRecord
-from app.watcher import CertificateHandler
-from app.utils import classify_organization, normalize_barcode
+from app.organizations import UNKNOWN as UNKNOWN_ORGANIZATION
+from app.records import DeviceRow, DueRow, FailureRow, TestRow, select_record, to_records
+from app.serializers import accepts_gzip, json_response
+from app.thumbnails import discard_thumbnails, ensure_thumbnail, thumbnail_targets
 
 
 def _safe_filename_part(value: str | None, fallback: str) -> str:
@@ -33,10 +48,10 @@ def _safe_filename_part(value: str | None, fallback: str) -> str:
     return cleaned.strip("._") or fallback
 
 
-def latest_test_per_device(rows: list[TestRecord]) -> list[TestRecord]:
+def latest_test_per_device(rows: list[TestRow]) -> list[TestRow]:
     """Keep only the newest test row per serial."""
 
-    latest_rows_by_device: list[TestRecord] = []
+    latest_rows_by_device: list[TestRow] = []
     seen_serials: set[str] = set()
     for row in rows:
         serial_key = row.serial.upper()
@@ -47,7 +62,7 @@ def latest_test_per_device(rows: list[TestRecord]) -> list[TestRecord]:
     return latest_rows_by_device
 
 
-def export_archive_name(row: TestRecord, source_file: Path) -> str:
+def export_archive_name(row: TestRow, source_file: Path) -> str:
     """Build export archive filename from serial, barcode, and result."""
 
     serial_part = _safe_filename_part(row.serial, "UNKNOWN_SERIAL")
@@ -56,6 +71,136 @@ def export_archive_name(row: TestRecord, source_file: Path) -> str:
     return f"{row.result}/{serial_part}_{barcode_part}_{result_part}{source_file.suffix}"
 
 
+EXPORT_CSV_COLUMNS = [
+    "id",
+    "serial",
+    "barcode",
+    "device_type",
+    "tested_at",
+    "result",
+    "fail_reason",
+    "file_path",
+    "imported_at",
+    "parse_status",
+    "parse_error",
+]
+
+
+def build_export_archive(export_rows: list[TestRow], include_csv: bool, include_certificates: bool) -> bytes:
+    """Build the export ZIP (CSV report and certificate files) in memory."""
+
+    import csv
+    import zipfile
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        csv_output = io.StringIO()
+        if include_csv:
+            writer = csv.writer(csv_output)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            for row in export_rows:
+                writer.writerow([getattr(row, column) for column in EXPORT_CSV_COLUMNS])
+            zip_file.writestr("gasdock_report.csv", csv_output.getvalue())
+
+        if include_certificates:
+            for row in export_rows:
+                file_path = Path(row.file_path)
+                if not file_path.exists() or row.result not in {"PASS", "FAIL"}:
+                    continue
+                archive_name = export_archive_name(row, file_path)
+                # PDFs are already compressed; deflating them again only burns CPU.
+                zip_file.write(file_path, archive_name, compress_type=zipfile.ZIP_STORED)
+
+    return zip_buffer.getvalue()
+
+
+def file_validators(stat_result: os.stat_result) -> tuple[str, str]:
+    """Return ETag and Last-Modified header values for a file on disk."""
+
+    etag_base = f"{stat_result.st_mtime_ns}-{stat_result.st_size}"
+    etag = f'"{hashlib.md5(etag_base.encode("utf-8"), usedforsecurity=False).hexdigest()}"'
+    return etag, formatdate(stat_result.st_mtime, usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against current file validators."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= int(since.timestamp())
+    return False
+
+
+def conditional_file_response(
+    request: Request,
+    file_path: Path,
+    media_type: str,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Serve a file with ETag/Last-Modified validators and a 304 short-circuit.
+
+    Byte range requests are answered by ``FileResponse`` itself.
+    """
+
+    stat_result = file_path.stat()
+    etag, last_modified = file_validators(stat_result)
+    validator_headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if is_not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=validator_headers)
+
+    return FileResponse(
+        path=file_path,
+        media_type=media_type,
+        headers={**validator_headers, **(headers or {})},
+        stat_result=stat_result,
+    )
+
+
+def parse_barcode_assignments(body: bytes, content_type: str) -> list[tuple[str, str]]:
+    """Read serial -> barcode pairs from a JSON body or a two-column CSV.
+
+    JSON may be an object ``{"SERIAL": "barcode"}`` or a list of
+    ``{"serial": ..., "barcode": ...}`` objects. CSV may start with a
+    ``serial,barcode`` header and may use ``;`` or tab as the delimiter.
+    """
+
+    if "json" in content_type:
+        import json
+
+        try:
+            payload = json.loads(body)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}") from exc
+        if isinstance(payload, dict):
+            return [(str(serial), str(barcode or "")) for serial, barcode in payload.items()]
+        if isinstance(payload, list) and all(isinstance(item, dict) for item in payload):
+            return [(str(item.get("serial") or ""), str(item.get("barcode") or "")) for item in payload]
+        raise HTTPException(status_code=400, detail="Expected an object or a list of {serial, barcode} objects")
+
+    import csv
+
+    try:
+        text_body = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Excel on Windows saves CSV in the ANSI code page.
+        text_body = body.decode("cp1252", errors="replace")
+    first_line = text_body.split("\n", 1)[0]
+    delimiter = max(",;\t", key=first_line.count)
+    rows = [row for row in csv.reader(io.StringIO(text_body), delimiter=delimiter) if any(cell.strip() for cell in row)]
+    if rows and rows[0][0].strip().lower() == "serial":
+        rows = rows[1:]
+    return [(row[0], row[1] if len(row) > 1 else "") for row in rows]
+
+
 def apply_export_filters(
     query,
     serial: str | None,
@@ -64,7 +209,7 @@ def apply_export_filters(
     date_to: str | None,
     organization: str | None,
 ):
-    """Apply shared export/report filters to a TestRecord query."""
+    """Apply shared export/report filters to a query over the tests table."""
 
     if serial:
         query = query.where(TestRecord.serial.contains(serial.upper()))
@@ -74,85 +219,257 @@ def apply_export_filters(
         query = query.where(TestRecord.tested_at >= datetime.fromisoformat(date_from))
     if date_to:
         query = query.where(TestRecord.tested_at <= datetime.fromisoformat(date_to))
-    if organization in {"AMBIPAR", "MCA", "OTHER", "UNKNOWN"}:
-        if organization == "UNKNOWN":
-            query = query.where(TestRecord.barcode.is_(None))
-        elif organization == "AMBIPAR":
-            query = query.where(TestRecord.barcode.ilike("AR %"))
-        elif organization == "MCA":
-            query = query.where(
-                TestRecord.barcode.ilike("MCA%")
-                | TestRecord.barcode.ilike("011%")
-                | TestRecord.barcode.ilike("012%")
-                | TestRecord.barcode.ilike("013%")
-            )
-        elif organization == "OTHER":
-            query = query.where(
-                TestRecord.barcode.is_not(None)
-                & ~TestRecord.barcode.ilike("AR %")
-                & ~TestRecord.barcode.ilike("MCA%")
-                & ~TestRecord.barcode.ilike("011%")
-                & ~TestRecord.barcode.ilike("012%")
-                & ~TestRecord.barcode.ilike("013%")
-            )
+    if organization:
+        query = query.where(organization_condition(TestRecord.organization, organization))
     return query
 
 
+def organization_condition(column, organization: str):
+    """Equality on a persisted organization column; ``UNKNOWN`` means no barcode."""
+
+    return column.is_(None) if organization == UNKNOWN_ORGANIZATION else column == organization
+
+
+DEVICE_SORT_COLUMNS = {
+    "serial": Device.serial,
+    "barcode": Device.barcode,
+    "organization": Device.organization,
+    "device_type": Device.device_type,
+    "last_tested_at": Device.last_tested_at,
+    "last_result": Device.last_result,
+}
+# Device rows rendered into the dashboard HTML; the script takes over once loaded.
+DASHBOARD_INITIAL_DEVICE_ROWS = 50
+
+
+def device_filter_conditions(
+    serial: str | None,
+    result: str | None,
+    date_from: str | None,
+    date_to: str | None,
+    organization: str | None,
+    search: str | None = None,
+) -> list:
+    """WHERE conditions shared by the dashboard device table and ``/api/devices``."""
+
+    conditions = []
+    if serial:
+        conditions.append(Device.serial.contains(serial.upper()))
+    if result in {"PASS", "FAIL", "UNKNOWN"}:
+        conditions.append(Device.last_result == result)
+    if date_from:
+        conditions.append(Device.last_tested_at >= datetime.fromisoformat(date_from))
+    if date_to:
+        conditions.append(Device.last_tested_at <= datetime.fromisoformat(date_to))
+    if organization:
+        conditions.append(organization_condition(Device.organization, organization))
+    if search:
+        columns = (Device.serial, Device.barcode, Device.organization, Device.device_type)
+        conditions.append(or_(*(column.contains(search, autoescape=True) for column in columns)))
+    return conditions
+
+
+def device_order(sort: str = "last_tested_at", order: str = "desc") -> tuple:
+    """ORDER BY for the device table; serial breaks ties so offset windows are stable."""
+
+    column = DEVICE_SORT_COLUMNS[sort]
+    ordered = column.desc() if order == "desc" else column.asc()
+    return ordered.nulls_last(), Device.serial.asc()
+
+
+def summarize_devices(rows) -> dict:
+    """Turn (organization, last_result, devices) groups into the dashboard's summary cards."""
+
+    results = {"PASS": 0, "FAIL": 0, "UNKNOWN": 0}
+    organizations: dict[str | None, int] = {}
+    for organization, last_result, count in rows:
+        key = last_result if last_result in results else "UNKNOWN"
+        results[key] += count
+        organizations[organization] = organizations.get(organization, 0) + count
+    decided = results["PASS"] + results["FAIL"]
+    return {
+        "devices": sum(results.values()),
+        "pass_rate": round(results["PASS"] / decided * 100, 1) if decided else None,
+        "unknown": results["UNKNOWN"],
+        "organizations": [
+            {"organization": name, "devices": count}
+            for name, count in sorted(organizations.items(), key=lambda item: (-item[1], item[0] or ""))
+        ],
+    }
+
+
 def create_app(config: AppConfig, database: Database) -> FastAPI:
     """Create and configure FastAPI application."""
 
-    app = FastAPI(title="GasDock Certificate Manager", version="1.0.0")
+    # Blocking file work runs on explicitly sized pools so a large export or
+    # folder import cannot starve the async read endpoints.
+    file_executor = ThreadPoolExecutor(max_workers=config.file_workers, thread_name_prefix="gasdock-file")
+    import_executor = ThreadPoolExecutor(max_workers=config.import_workers, thread_name_prefix="gasdock-import")
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        yield
+        file_executor.shutdown(wait=False, cancel_futures=True)
+        import_executor.shutdown(wait=False, cancel_futures=True)
+        web_handler = getattr(app.state, "web_certificate_handler", None)
+        if web_handler is not None:
+            web_handler.close()
+        await database.async_engine.dispose()
+
+    app = FastAPI(title="GasDock Certificate Manager", version="1.0.0", lifespan=lifespan)
 
     templates = Jinja2Templates(directory=str(Path("templates")))
+    templates.env.globals["organization_options"] = [*database.organizations.names, UNKNOWN_ORGANIZATION]
     app.mount("/static", StaticFiles(directory="static"), name="static")
+    response_cache = ResponseCache(config.response_cache_size, config.response_cache_ttl_seconds)
+    blob_store = BlobStore.from_config(config)
+    app.state.response_cache = response_cache
+    cache_gauges = [
+        Gauge("gasdock_response_cache_hits", "Response cache hits since start.", callback=lambda: response_cache.hits),
+        Gauge("gasdock_response_cache_misses", "Response cache misses since start.", callback=lambda: response_cache.misses),
+        Gauge("gasdock_response_cache_entries", "Responses currently cached.", callback=lambda: response_cache.stats()["entries"]),
+    ]
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(response.status_code),
+        )
+        return response
+
+    async def run_blocking(executor: ThreadPoolExecutor, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def cached_response(
+        request: Request,
+        build: Callable[[], Awaitable[Response]],
+        vary_encoding: bool = False,
+    ) -> Response:
+        """Serve a rendered response from cache while tests/devices are unchanged."""
 
-    def get_db() -> Session:
-        with database._session_maker() as session:  # internal helper for FastAPI dependency
+        route = request.url.path
+        if vary_encoding:
+            route = f"{route}|{'gzip' if accepts_gzip(request) else 'identity'}"
+        key = ResponseCache.make_key(
+            route,
+            request.query_params.multi_items(),
+            await database.data_version_async("tests", "devices"),
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            return Response(
+                content=cached.body,
+                media_type=cached.media_type,
+                headers={**cached.headers, "X-Cache": "HIT"},
+            )
+
+        response = await build()
+        stored_headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name in {"content-encoding", "vary"}
+        }
+        response_cache.put(key, bytes(response.body), response.media_type, stored_headers)
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    known_organizations = frozenset([*database.organizations.names, UNKNOWN_ORGANIZATION])
+
+    def organization_filter(organization: str | None = Query(default=None)) -> str | None:
+        """Reject organization filters that no rule can produce, e.g. typos or stale bookmarks."""
+
+        if organization and organization not in known_organizations:
+            expected = ", ".join(sorted(known_organizations))
+            raise HTTPException(status_code=400, detail=f"Unknown organization {organization!r}; expected one of {expected}")
+        return organization
+
+    async def get_db() -> AsyncIterator[AsyncSession]:
+        async for session in database.async_session():
             yield session
 
-    def get_dashboard_data(
-        db: Session,
+    def ingest_profiler():
+        handler = getattr(app.state, "certificate_handler", None)
+        return getattr(handler, "profiler", None)
+
+    handler_lock = threading.Lock()
+
+    def wait_for_ingest() -> None:
+        """With role both, block until run.py has attached the ingest workers (or failed to)."""
+
+        ingest_ready = getattr(app.state, "ingest_ready", None)
+        if ingest_ready is not None:
+            ingest_ready.wait()
+
+    def certificate_handler():
+        """Return the ingest handler, or one built on first use in a web-only process.
+
+        Blocking: call it from a worker thread.
+        """
+
+        wait_for_ingest()
+        handler = getattr(app.state, "certificate_handler", None)
+        if handler is not None:
+            return handler
+        # Kept apart from certificate_handler, which run.py owns and closes;
+        # this one is closed by the lifespan.
+        with handler_lock:
+            handler = getattr(app.state, "web_certificate_handler", None)
+            if handler is None:
+                from app.watcher import CertificateHandler
+
+                handler = app.state.web_certificate_handler = CertificateHandler(config, database)
+        return handler
+
+    async def get_dashboard_data(
+        db: AsyncSession,
         serial: str | None,
         result: str | None,
         date_from: str | None,
         date_to: str | None,
         organization: str | None,
+        device_rows: int | None = DASHBOARD_INITIAL_DEVICE_ROWS,
     ) -> dict:
-        stats = database.stats()
+        """Build cards and tables; ``device_rows`` caps the device rows loaded (None for all)."""
 
-        failures_last_7_days = db.scalar(
-            select(func.count(TestRecord.id)).where(
-                and_(TestRecord.result == "FAIL", TestRecord.tested_at >= datetime.now(timezone.utc) - timedelta(days=7))
+        stats = await database.stats_async(db)
+
+        failures_last_7_days = await db.scalar(rollups.failures_since_query(rollups.window_start(7)))
+        due_counts = (await db.execute(calibration.bucket_counts_query(*database.calibration.bucket_bounds(datetime.now())))).one()
+
+        conditions = device_filter_conditions(serial, result, date_from, date_to, organization)
+        device_summary = summarize_devices(
+            await db.execute(
+                select(Device.organization, Device.last_result, func.count())
+                .where(*conditions)
+                .group_by(Device.organization, Device.last_result)
             )
-        ) or 0
-
-        query = select(Device)
-        if serial:
-            query = query.where(Device.serial.contains(serial.upper()))
-        if result in {"PASS", "FAIL", "UNKNOWN"}:
-            query = query.where(Device.last_result == result)
-        if date_from:
-            query = query.where(Device.last_tested_at >= datetime.fromisoformat(date_from))
-        if date_to:
-            query = query.where(Device.last_tested_at <= datetime.fromisoformat(date_to))
-        if organization in {"AMBIPAR", "MCA", "OTHER", "UNKNOWN"}:
-            if organization == "UNKNOWN":
-                query = query.where(Device.organization.is_(None))
-            else:
-                query = query.where(Device.organization == organization)
-        devices = db.scalars(query.order_by(desc(Device.last_tested_at))).all()
-
-        recent_failures = db.scalars(
-            select(TestRecord)
-            .where(TestRecord.result == "FAIL")
-            .order_by(desc(TestRecord.tested_at))
-            .limit(25)
-        ).all()
+        )
+        devices = []
+        if device_rows:
+            devices = await load_devices(db, conditions, limit=device_rows)
+
+        recent_failures = to_records(
+            FailureRow,
+            await db.execute(
+                select_record(FailureRow)
+                .where(TestRecord.result == "FAIL")
+                .order_by(desc(TestRecord.tested_at))
+                .limit(25)
+            ),
+        )
 
         return {
             "stats": stats,
             "failures_last_7_days": failures_last_7_days,
+            "calibration_due": dict(zip(calibration.BUCKETS, due_counts)),
             "devices": devices,
+            "device_summary": device_summary,
             "recent_failures": recent_failures,
             "filters": {
                 "serial": serial or "",
@@ -163,136 +480,465 @@ def create_app(config: AppConfig, database: Database) -> FastAPI:
             },
         }
 
+    async def load_devices(
+        db: AsyncSession,
+        conditions: list,
+        sort: str = "last_tested_at",
+        order: str = "desc",
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[DeviceRow]:
+        query = select_record(DeviceRow).where(*conditions).order_by(*device_order(sort, order)).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return to_records(DeviceRow, await db.execute(query))
+
+    async def get_export_rows(
+        db: AsyncSession,
+        serial: str | None,
+        result: str | None,
+        date_from: str | None,
+        date_to: str | None,
+        organization: str | None,
+        latest_only: bool,
+    ) -> list[TestRow]:
+        query = apply_export_filters(select_record(TestRow), serial, result, date_from, date_to, organization)
+
+        filtered_rows = to_records(TestRow, await db.execute(query.order_by(desc(TestRecord.tested_at), desc(TestRecord.id))))
+        return latest_test_per_device(filtered_rows) if latest_only else filtered_rows
+
     @app.get("/", response_class=HTMLResponse)
-    def index(
+    async def index(
         request: Request,
         serial: str | None = Query(default=None),
         result: str | None = Query(default=None),
         date_from: str | None = Query(default=None),
         date_to: str | None = Query(default=None),
-        organization: str | None = Query(default=None),
-        db: Session = Depends(get_db),
-    ) -> HTMLResponse:
-        dashboard_data = get_dashboard_data(db, serial, result, date_from, date_to, organization)
+        organization: str | None = Depends(organization_filter),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        async def build() -> Response:
+            dashboard_data = await get_dashboard_data(db, serial, result, date_from, date_to, organization)
+            profiler = ingest_profiler()
+            dashboard_data["slow_files"] = profiler.slowest() if profiler is not None and profiler.enabled else []
+            return templates.TemplateResponse(request, "index.html", dashboard_data)
 
-        return templates.TemplateResponse(
-            request,
-            "index.html",
-            dashboard_data,
-        )
+        return await cached_response(request, build)
 
     @app.get("/api/dashboard", response_class=JSONResponse)
-    def dashboard_api(
+    async def dashboard_api(
+        request: Request,
         serial: str | None = Query(default=None),
         result: str | None = Query(default=None),
         date_from: str | None = Query(default=None),
         date_to: str | None = Query(default=None),
-        organization: str | None = Query(default=None),
-        db: Session = Depends(get_db),
+        organization: str | None = Depends(organization_filter),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        async def build() -> Response:
+            payload = await dashboard_payload(db, serial, result, date_from, date_to, organization)
+            return json_response(request, payload, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
+
+    async def dashboard_payload(
+        db: AsyncSession,
+        serial: str | None,
+        result: str | None,
+        date_from: str | None,
+        date_to: str | None,
+        organization: str | None,
     ) -> dict:
-        dashboard_data = get_dashboard_data(db, serial, result, date_from, date_to, organization)
+        dashboard_data = await get_dashboard_data(db, serial, result, date_from, date_to, organization, device_rows=0)
+        summary = dashboard_data["device_summary"]
+        # Small tables ship whole so the browser sorts and searches in memory;
+        # larger ones are windowed through /api/devices.
+        client_side = summary["devices"] <= config.dashboard_client_rows
+        devices = []
+        if client_side:
+            devices = await load_devices(db, device_filter_conditions(serial, result, date_from, date_to, organization))
 
         return {
             "stats": dashboard_data["stats"],
             "failures_last_7_days": dashboard_data["failures_last_7_days"],
+            "calibration_due": dashboard_data["calibration_due"],
             "filters": dashboard_data["filters"],
-            "devices": [
-                {
-                    "serial": device.serial,
-                    "barcode": device.barcode,
-                    "organization": device.organization,
-                    "device_type": device.device_type,
-                    "last_tested_at": device.last_tested_at.isoformat() if device.last_tested_at else None,
-                    "last_result": device.last_result,
-                }
-                for device in dashboard_data["devices"]
-            ],
-            "recent_failures": [
-                {
-                    "id": failure.id,
-                    "serial": failure.serial,
-                    "barcode": failure.barcode,
-                    "device_type": failure.device_type,
-                    "fail_reason": failure.fail_reason,
-                    "tested_at": failure.tested_at.isoformat() if failure.tested_at else None,
-                    "result": failure.result,
-                }
-                for failure in dashboard_data["recent_failures"]
-            ],
+            "devices": devices,
+            "devices_mode": "client" if client_side else "server",
+            "device_summary": summary,
+            "recent_failures": dashboard_data["recent_failures"],
             "totals": {
-                "devices": len(dashboard_data["devices"]),
+                "devices": summary["devices"],
                 "recent_failures": len(dashboard_data["recent_failures"]),
             },
         }
 
-    @app.get("/device/{serial}", response_class=HTMLResponse)
-    def device_detail(request: Request, serial: str, db: Session = Depends(get_db)) -> HTMLResponse:
-        device = db.get(Device, serial.upper())
-        tests = db.scalars(
-            select(TestRecord).where(TestRecord.serial == serial.upper()).order_by(desc(TestRecord.tested_at))
-        ).all()
-        return templates.TemplateResponse(
-            request,
-            "device.html",
-            {"device": device, "tests": tests, "serial": serial.upper()},
+    @app.get("/api/devices", response_class=JSONResponse)
+    async def devices_api(
+        request: Request,
+        serial: str | None = Query(default=None),
+        result: str | None = Query(default=None),
+        date_from: str | None = Query(default=None),
+        date_to: str | None = Query(default=None),
+        organization: str | None = Depends(organization_filter),
+        q: str | None = Query(default=None),
+        sort: str = Query(default="last_tested_at", pattern=f"^({'|'.join(DEVICE_SORT_COLUMNS)})$"),
+        order: str = Query(default="desc", pattern="^(asc|desc)$"),
+        offset: int = Query(default=0, ge=0),
+        limit: int = Query(default=200, ge=1, le=1000),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        """Return one window of the filtered, searched and sorted device table."""
+
+        async def build() -> Response:
+            conditions = device_filter_conditions(serial, result, date_from, date_to, organization, q)
+            total = await db.scalar(select(func.count()).select_from(Device).where(*conditions))
+            rows = await load_devices(db, conditions, sort, order, offset, limit)
+            payload = {"total": total, "offset": offset, "rows": rows}
+            return json_response(request, payload, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
+
+    @app.get("/api/calibration-due", response_class=JSONResponse)
+    async def calibration_due_api(
+        request: Request,
+        bucket: str | None = Query(default=None, pattern="^(overdue|due_soon|ok)$"),
+        organization: str | None = Depends(organization_filter),
+        device_type: str | None = Query(default=None),
+        limit: int = Query(default=500, ge=1, le=5000),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        """Devices bucketed into overdue, due soon and ok by the indexed ``next_due_at``.
+
+        Lists the overdue and due-soon devices (soonest first), or only ``bucket``.
+        """
+
+        async def build() -> Response:
+            now, horizon = database.calibration.bucket_bounds(datetime.now())
+            filters = []
+            if organization:
+                filters.append(organization_condition(Device.organization, organization))
+            if device_type:
+                filters.append(Device.device_type == device_type)
+
+            counts = (await db.execute(calibration.bucket_counts_query(now, horizon).where(*filters))).one()
+            payload = {
+                "as_of": now,
+                "due_soon_days": database.calibration.due_soon_days,
+                "counts": dict(zip(calibration.BUCKETS, counts)),
+            }
+            for name in (bucket,) if bucket else (calibration.OVERDUE, calibration.DUE_SOON):
+                payload[name] = to_records(
+                    DueRow,
+                    await db.execute(
+                        select_record(DueRow)
+                        .where(calibration.bucket_condition(name, now, horizon), *filters)
+                        .order_by(Device.next_due_at)
+                        .limit(limit)
+                    ),
+                )
+            return json_response(request, payload, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
+
+    @app.get("/api/trends", response_class=JSONResponse)
+    async def trends_api(
+        request: Request,
+        date_from: date | None = Query(default=None),
+        date_to: date | None = Query(default=None),
+        bucket: str = Query(default="day", pattern="^(day|week|month)$"),
+        organization: str | None = Depends(organization_filter),
+        device_type: str | None = Query(default=None),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        """Test volume and failure rate per day/week/month, read from the rollup tables."""
+
+        async def build() -> Response:
+            rows = await db.execute(rollups.trend_query(bucket, date_from, date_to, organization, device_type))
+            series = [
+                {"period": period, "tests": tests, "failures": failures, "failure_rate": rollups.ratio(failures, tests)}
+                for period, tests, failures in rows
+            ]
+            tests = sum(point["tests"] for point in series)
+            failures = sum(point["failures"] for point in series)
+            payload = {
+                "bucket": bucket,
+                "series": series,
+                "totals": {"tests": tests, "failures": failures, "failure_rate": rollups.ratio(failures, tests)},
+            }
+            return json_response(request, payload, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
+
+    @app.get("/api/trends/gases", response_class=JSONResponse)
+    async def gas_trends_api(
+        request: Request,
+        date_from: date | None = Query(default=None),
+        date_to: date | None = Query(default=None),
+        bucket: str = Query(default="day", pattern="^(day|week|month)$"),
+        organization: str | None = Depends(organization_filter),
+        device_type: str | None = Query(default=None),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        """Span calibration readings and failure rate per gas and period."""
+
+        async def build() -> Response:
+            rows = await db.execute(rollups.gas_trend_query(bucket, date_from, date_to, organization, device_type))
+            series = []
+            totals: dict[str, dict] = {}
+            for period, gas, readings, failures in rows:
+                series.append(
+                    {
+                        "period": period,
+                        "gas": gas,
+                        "readings": readings,
+                        "failures": failures,
+                        "failure_rate": rollups.ratio(failures, readings),
+                    }
+                )
+                total = totals.setdefault(gas, {"readings": 0, "failures": 0})
+                total["readings"] += readings
+                total["failures"] += failures
+            for total in totals.values():
+                total["failure_rate"] = rollups.ratio(total["failures"], total["readings"])
+            payload = {"bucket": bucket, "series": series, "totals": totals}
+            return json_response(request, payload, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
+
+    async def device_summary(db: AsyncSession, serial: str) -> dict:
+        """Per-device aggregates from the device rollups; cost does not grow with history."""
+
+        months = (await db.execute(rollups.device_months_query(serial))).all()
+        total = sum(month[1] for month in months)
+        passed = sum(month[2] for month in months)
+        last_fail = None
+        fail_months = [month[0] for month in months if month[3]]
+        if fail_months:
+            start = fail_months[-1]
+            end = (start + timedelta(days=32)).replace(day=1)
+            last_fail_row = (
+                await db.execute(
+                    select(TestRecord.id, TestRecord.tested_at, TestRecord.fail_reason)
+                    .where(
+                        TestRecord.serial == serial,
+                        TestRecord.tested_at >= datetime.combine(start, datetime.min.time()),
+                        TestRecord.tested_at < datetime.combine(end, datetime.min.time()),
+                        TestRecord.result == "FAIL",
+                    )
+                    .order_by(desc(TestRecord.tested_at), desc(TestRecord.id))
+                    .limit(1)
+                )
+            ).first()
+            if last_fail_row is not None:
+                last_fail = {"id": last_fail_row[0], "tested_at": last_fail_row[1], "fail_reason": last_fail_row[2]}
+        top_reason = (await db.execute(rollups.top_fail_reason_query(serial))).first()
+        return {
+            "tests": total,
+            "passed": passed,
+            "failed": sum(month[3] for month in months),
+            "pass_rate": rollups.ratio(passed, total),
+            "last_fail": last_fail,
+            "top_fail_reason": {"fail_reason": top_reason[0], "tests": top_reason[1]} if top_reason else None,
+            "monthly": [
+                {"month": month.strftime("%Y-%m"), "tests": tests, "failures": failed}
+                for month, tests, _, failed in months
+            ],
+        }
+
+    async def device_history(db: AsyncSession, serial: str, page: int, per_page: int) -> dict:
+        serial = serial.upper()
+        device_row = (await db.execute(select_record(DeviceRow).where(Device.serial == serial))).first()
+        summary = await device_summary(db, serial)
+        pages = max(1, -(-summary["tests"] // per_page))
+        page = min(page, pages)
+        tests = to_records(
+            TestRow,
+            await db.execute(
+                select_record(TestRow)
+                .where(TestRecord.serial == serial)
+                .order_by(desc(TestRecord.tested_at), desc(TestRecord.id))
+                .offset((page - 1) * per_page)
+                .limit(per_page)
+            ),
         )
+        return {
+            "serial": serial,
+            "device": DeviceRow(*device_row) if device_row is not None else None,
+            "summary": summary,
+            "tests": tests,
+            "page": page,
+            "per_page": per_page,
+            "pages": pages,
+        }
+
+    @app.get("/device/{serial}", response_class=HTMLResponse)
+    async def device_detail(
+        request: Request,
+        serial: str,
+        page: int = Query(default=1, ge=1),
+        per_page: int = Query(default=50, ge=1, le=500),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        async def build() -> Response:
+            history = await device_history(db, serial, page, per_page)
+            return templates.TemplateResponse(request, "device.html", history)
+
+        return await cached_response(request, build)
+
+    @app.get("/api/devices/{serial}", response_class=JSONResponse)
+    async def device_history_api(
+        request: Request,
+        serial: str,
+        page: int = Query(default=1, ge=1),
+        per_page: int = Query(default=50, ge=1, le=500),
+        db: AsyncSession = Depends(get_db),
+    ) -> Response:
+        """One page of a device's history with its aggregates."""
+
+        async def build() -> Response:
+            history = await device_history(db, serial, page, per_page)
+            if history["device"] is None and not history["tests"]:
+                raise HTTPException(status_code=404, detail="Device not found")
+            return json_response(request, history, config.compression_min_bytes)
+
+        return await cached_response(request, build, vary_encoding=True)
 
     @app.get("/device/{serial}/barcode")
     def update_device_barcode(
         serial: str,
         barcode: str = Query(...),
-        db: Session = Depends(get_db),
     ) -> RedirectResponse:
-        normalized = normalize_barcode(barcode)
-        device = db.get(Device, serial.upper())
-        if device is not None:
-            device.barcode = normalized or None
-            device.organization = classify_organization(normalized) if normalized else None
-
-            if normalized:
-                latest = db.scalars(
-                    select(TestRecord)
-                    .where(TestRecord.serial == serial.upper())
-                    .order_by(desc(TestRecord.tested_at))
-                    .limit(1)
-                ).first()
-                if latest is not None:
-                    latest.barcode = normalized
-            db.commit()
-
+        database.set_device_barcode(serial, barcode)
         return RedirectResponse(url=f"/device/{serial.upper()}", status_code=303)
 
+    @app.get("/api/cache-stats", response_class=JSONResponse)
+    def cache_stats() -> dict:
+        tests_version, devices_version = database.data_version("tests", "devices")
+        return {
+            "response_cache": response_cache.stats(),
+            "data_versions": {"tests": tests_version, "devices": devices_version},
+        }
+
+    @app.get("/api/slow-files", response_class=JSONResponse)
+    def slow_files() -> dict:
+        """Return the rolling slowest-ingestion report when profiling is enabled."""
+
+        profiler = ingest_profiler()
+        if profiler is None or not profiler.enabled:
+            return {"enabled": False, "slow_seconds": config.profiling_slow_seconds, "files": []}
+        return {
+            "enabled": True,
+            "slow_seconds": profiler.slow_seconds,
+            "trace_path": str(profiler.trace_path),
+            "files": [asdict(entry) for entry in profiler.slowest()],
+        }
+
+    @app.get("/api/ingest-sources", response_class=JSONResponse)
+    def ingest_sources() -> dict:
+        """Return throughput and backlog per import source, sorter MB/s and parse worker memory."""
+
+        scheduler = getattr(app.state, "ingest_scheduler", None)
+        handler = getattr(app.state, "certificate_handler", None)
+        placement = handler.placement.stats() if hasattr(handler, "placement") else None
+        parse_pool = getattr(handler, "parse_pool", None)
+        parse_workers = parse_pool.stats() if parse_pool is not None else None
+        if scheduler is None:
+            return {"running": False, "sources": [], "placement": placement, "parse_workers": parse_workers}
+        return {"running": True, "sources": scheduler.stats(), "placement": placement, "parse_workers": parse_workers}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics() -> PlainTextResponse:
+        """Expose ingestion, database and HTTP metrics in Prometheus text format."""
+
+        lines = [REGISTRY.render().rstrip("\n")]
+        for gauge in cache_gauges:
+            lines.extend(gauge.render())
+        return PlainTextResponse("\n".join(lines) + "\n", media_type=METRICS_CONTENT_TYPE)
+
+    def release_files(refs: list[tuple[str, str | None]], thumbnails: dict[str, Path]) -> None:
+        """After rows were deleted, drop the blobs and thumbnails no remaining row references."""
+
+        if blob_store is not None and refs:
+            blob_store.release(database, refs)
+        if thumbnails:
+            referenced = database.referenced_paths(candidates=thumbnails)
+            discard_thumbnails(target for source, target in thumbnails.items() if source not in referenced)
+
     @app.delete("/api/tests/{test_id}", response_class=JSONResponse)
     def delete_test(test_id: int) -> dict:
+        refs = database.file_refs(test_id=test_id)
+        thumbnails = thumbnail_targets([file_path for file_path, _ in refs], config.thumbnails_folder, config.thumbnail_width)
         deleted = database.delete_test_record(test_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Test record not found")
+        release_files(refs, thumbnails)
         return {"ok": True}
 
     @app.delete("/api/devices/{serial}", response_class=JSONResponse)
     def delete_device(serial: str) -> dict:
+        refs = database.file_refs(serial=serial)
+        thumbnails = thumbnail_targets([file_path for file_path, _ in refs], config.thumbnails_folder, config.thumbnail_width)
         deleted = database.delete_device(serial)
         if not deleted:
             raise HTTPException(status_code=404, detail="Device not found")
+        release_files(refs, thumbnails)
         return {"ok": True}
 
+    @app.post("/api/blob-gc", response_class=JSONResponse)
+    async def blob_gc() -> dict:
+        """Remove content-store blobs no test row references, with their browse links."""
+
+        if blob_store is None:
+            raise HTTPException(status_code=400, detail="storage_mode is not 'content'")
+        removed = await run_blocking(file_executor, blob_store.collect_garbage, database, config.sorted_folder)
+        return {"ok": True, **removed}
+
+    @app.post("/api/quarantine/reprocess", response_class=JSONResponse)
+    async def reprocess_quarantine(test_id: list[int] | None = Query(None)) -> dict:
+        """Re-run quarantined certificates in parallel, e.g. after a parser fix."""
+
+        def reprocess() -> dict[str, int]:
+            wait_for_ingest()
+            retrier = getattr(app.state, "quarantine_retrier", None)
+            if retrier is None:
+                from app.retry import QuarantineRetrier
+
+                retrier = QuarantineRetrier(config, database, certificate_handler())
+            return retrier.reprocess_all(test_id)
+
+        counts = await run_blocking(import_executor, reprocess)
+        return {"ok": True, **counts, "total": sum(counts.values())}
+
+    @app.post("/api/devices/barcodes", response_class=JSONResponse)
+    async def bulk_update_device_barcodes(request: Request) -> dict:
+        """Assign barcodes from a CSV or JSON serial -> barcode mapping in one transaction."""
+
+        assignments = parse_barcode_assignments(await request.body(), request.headers.get("content-type", ""))
+        report = await run_blocking(import_executor, database.set_device_barcodes, assignments)
+        counts: dict[str, int] = {}
+        for entry in report:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {"ok": True, "counts": counts, "rows": report}
+
     @app.post("/api/import-folder-once", response_class=JSONResponse)
-    def import_folder_once(folder_path: str = Query(..., min_length=1)) -> dict:
+    async def import_folder_once(folder_path: str = Query(..., min_length=1)) -> dict:
         candidate = Path(folder_path).expanduser()
         if not candidate.exists() or not candidate.is_dir():
             raise HTTPException(status_code=400, detail="Selected folder does not exist")
 
-        handler = getattr(app.state, "certificate_handler", None)
-        if handler is None:
-            handler = CertificateHandler(config, database)
+        def import_all() -> tuple[int, int]:
+            handler = certificate_handler()
+            processed = 0
+            failed = 0
+            for file_path in sorted(candidate.glob("*.pdf")):
+                if handler.process_file(file_path):
+                    processed += 1
+                else:
+                    failed += 1
+            return processed, failed
 
-        processed = 0
-        failed = 0
-        for file_path in sorted(candidate.glob("*.pdf")):
-            if handler.process_file(file_path):
-                processed += 1
-            else:
-                failed += 1
+        processed, failed = await run_blocking(import_executor, import_all)
 
         return {
             "ok": True,
@@ -303,90 +949,40 @@ def create_app(config: AppConfig, database: Database) -> FastAPI:
         }
 
     @app.get("/export.zip")
-    def export_zip(
+    async def export_zip(
         serial: str | None = Query(default=None),
         result: str | None = Query(default=None),
         date_from: str | None = Query(default=None),
         date_to: str | None = Query(default=None),
-        organization: str | None = Query(default=None),
+        organization: str | None = Depends(organization_filter),
         latest_only: bool = Query(default=True),
         include_csv: bool = Query(default=True),
         include_certificates: bool = Query(default=True),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
     ) -> StreamingResponse:
-        query = apply_export_filters(select(TestRecord), serial, result, date_from, date_to, organization)
-
-        filtered_rows = db.scalars(query.order_by(desc(TestRecord.tested_at), desc(TestRecord.id))).all()
-        export_rows = latest_test_per_device(filtered_rows) if latest_only else filtered_rows
-
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
-            csv_output = io.StringIO()
-            if include_csv:
-                writer = csv.writer(csv_output)
-                writer.writerow([
-                    "id",
-                    "serial",
-                    "barcode",
-                    "device_type",
-                    "tested_at",
-                    "result",
-                    "fail_reason",
-                    "file_path",
-                    "imported_at",
-                    "parse_status",
-                    "parse_error",
-                ])
-                for row in export_rows:
-                    writer.writerow(
-                        [
-                            row.id,
-                            row.serial,
-                            row.barcode,
-                            row.device_type,
-                            row.tested_at,
-                            row.result,
-                            row.fail_reason,
-                            row.file_path,
-                            row.imported_at,
-                            row.parse_status,
-                            row.parse_error,
-                        ]
-                    )
-                zip_file.writestr("gasdock_report.csv", csv_output.getvalue())
-
-            if include_certificates:
-                for row in export_rows:
-                    file_path = Path(row.file_path)
-                    if not file_path.exists() or row.result not in {"PASS", "FAIL"}:
-                        continue
-                    archive_name = export_archive_name(row, file_path)
-                    zip_file.write(file_path, archive_name)
+        export_rows = await get_export_rows(db, serial, result, date_from, date_to, organization, latest_only)
+        archive = await run_blocking(file_executor, build_export_archive, export_rows, include_csv, include_certificates)
 
-        zip_buffer.seek(0)
         return StreamingResponse(
-            iter([zip_buffer.getvalue()]),
+            iter([archive]),
             media_type="application/zip",
             headers={"Content-Disposition": "attachment; filename=gasdock_export.zip"},
         )
 
     @app.get("/print-report", response_class=HTMLResponse)
-    def print_report(
+    async def print_report(
         request: Request,
         serial: str | None = Query(default=None),
         result: str | None = Query(default=None),
         date_from: str | None = Query(default=None),
         date_to: str | None = Query(default=None),
-        organization: str | None = Query(default=None),
+        organization: str | None = Depends(organization_filter),
         latest_only: bool = Query(default=True),
         include_csv: bool = Query(default=True),
         include_certificates: bool = Query(default=True),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
     ) -> HTMLResponse:
-        query = apply_export_filters(select(TestRecord), serial, result, date_from, date_to, organization)
-
-        filtered_rows = db.scalars(query.order_by(desc(TestRecord.tested_at), desc(TestRecord.id))).all()
-        export_rows = latest_test_per_device(filtered_rows) if latest_only else filtered_rows
+        export_rows = await get_export_rows(db, serial, result, date_from, date_to, organization, latest_only)
 
         return templates.TemplateResponse(
             request,
@@ -399,11 +995,8 @@ def create_app(config: AppConfig, database: Database) -> FastAPI:
             },
         )
 
-    @app.get("/print-certificate/{test_id}")
-    def print_certificate(test_id: int, db: Session = Depends(get_db)) -> FileResponse:
-        """Return a single certificate PDF so users can print the original file."""
-
-        row = db.get(TestRecord, test_id)
+    async def printable_certificate_path(test_id: int, db: AsyncSession) -> Path:
+        row = await db.get(TestRecord, test_id)
         if row is None:
             raise HTTPException(status_code=404, detail="Certificate not found")
         if row.result not in {"PASS", "FAIL"}:
@@ -412,12 +1005,31 @@ def create_app(config: AppConfig, database: Database) -> FastAPI:
         file_path = Path(row.file_path)
         if not file_path.exists() or not file_path.is_file():
             raise HTTPException(status_code=404, detail="Certificate file is missing")
+        return file_path
 
-        return FileResponse(
-            path=file_path,
+    @app.get("/print-certificate/{test_id}")
+    async def print_certificate(request: Request, test_id: int, db: AsyncSession = Depends(get_db)) -> Response:
+        """Return a single certificate PDF so users can print the original file."""
+
+        file_path = await printable_certificate_path(test_id, db)
+        return conditional_file_response(
+            request,
+            file_path,
             media_type="application/pdf",
-            filename=file_path.name,
             headers={"Content-Disposition": f'inline; filename="{file_path.name}"'},
         )
 
+    @app.get("/certificate-thumbnail/{test_id}")
+    async def certificate_thumbnail(request: Request, test_id: int, db: AsyncSession = Depends(get_db)) -> Response:
+        """Return a cached PNG preview of the certificate's first page."""
+
+        file_path = await printable_certificate_path(test_id, db)
+        try:
+            thumbnail = await run_blocking(
+                file_executor, ensure_thumbnail, file_path, config.thumbnails_folder, config.thumbnail_width
+            )
+        except Exception as exc:  # pdf library level exceptions
+            raise HTTPException(status_code=422, detail=f"Certificate preview failed: {exc}") from exc
+        return conditional_file_response(request, thumbnail, media_type="image/png")
+
     return app
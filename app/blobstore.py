@@ -0,0 +1,193 @@
+"""Content-addressed certificate store with a linked, human-browsable tree."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+from app.config import AppConfig
+from app.database import Database
+from app.sorter import DEFAULT_ENGINE, PlacementEngine
+
+LOGGER = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+# Blobs stored or linked but not yet named by a committed test row, shared by
+# every BlobStore in the process (the watcher's and the web app's).
+_PINS_LOCK = threading.Lock()
+_PINNED: Counter[str] = Counter()
+
+
+class BlobStore:
+    """Stores each certificate once under ``<root>/ab/cd/<sha256>.pdf``.
+
+    The ``Sorted/<RESULT>/YYYY/MM/DD/SERIAL/`` tree is kept as hardlinks (or
+    symlinks where hardlinks are impossible) to the blobs, so duplicates cost
+    no extra space and ``TestRecord.file_path`` always names the blob.
+    """
+
+    def __init__(self, root: Path, link_mode: str = "hardlink", engine: PlacementEngine | None = None):
+        if link_mode not in {"hardlink", "symlink"}:
+            raise ValueError(f"Unsupported link mode: {link_mode}")
+        self.root = root
+        self.link_mode = link_mode
+        self.engine = engine or DEFAULT_ENGINE
+
+    @classmethod
+    def from_config(cls, config: AppConfig, engine: PlacementEngine | None = None) -> "BlobStore | None":
+        """Return a store when ``storage_mode`` is ``content``, else None."""
+
+        if config.storage_mode != "content":
+            return None
+        return cls(config.blob_folder, config.browse_link_mode, engine)
+
+    @staticmethod
+    def digest_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            while chunk := handle.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.pdf"
+
+    def contains(self, path: Path | str) -> bool:
+        return Path(path).is_relative_to(self.root)
+
+    def store(self, source: Path, browse_target: Path, digest: str | None = None) -> Path:
+        """Move source into its blob (or drop it as a duplicate) and link it into the tree.
+
+        The blob stays pinned against :meth:`release` until the caller has
+        committed the test row naming it and calls :meth:`unpin`.
+        """
+
+        blob = self.blob_path(digest or self.digest_file(source))
+        with _PINS_LOCK:
+            _PINNED[str(blob)] += 1
+        try:
+            if blob.exists():
+                source.unlink()
+            else:
+                self.engine.move(source, blob)
+            self.link(blob, browse_target)
+        except BaseException:
+            self.unpin(blob)
+            raise
+        return blob
+
+    def unpin(self, blob: Path) -> None:
+        """Undo one :meth:`store` pin."""
+
+        with _PINS_LOCK:
+            _PINNED[str(blob)] -= 1
+            if _PINNED[str(blob)] <= 0:
+                del _PINNED[str(blob)]
+
+    def link(self, blob: Path, browse_target: Path) -> None:
+        """Point browse_target at blob, replacing a stale entry."""
+
+        browse_target.parent.mkdir(parents=True, exist_ok=True)
+        if browse_target.is_symlink() or browse_target.exists():
+            if browse_target.exists() and os.path.samefile(browse_target, blob):
+                return
+            browse_target.unlink()
+        if self.link_mode == "hardlink":
+            try:
+                os.link(blob, browse_target)
+                return
+            except OSError:
+                LOGGER.debug("Hardlink %s -> %s failed, falling back to symlink", browse_target, blob, exc_info=True)
+        try:
+            os.symlink(blob, browse_target)
+        except OSError:
+            # Windows without the symlink privilege, or a filesystem without links.
+            LOGGER.warning("Could not link %s to %s; storing a copy", browse_target, blob)
+            shutil.copy2(blob, browse_target)
+
+    def release(self, database: Database, refs: Iterable[tuple[str, str | None]]) -> dict[str, int]:
+        """Drop browse links and blobs of deleted rows that nothing references any more."""
+
+        refs = [(file_path, browse_path) for file_path, browse_path in refs if self.contains(file_path)]
+        removed = {"blobs_removed": 0, "links_removed": 0, "bytes_freed": 0}
+        # A store() either pins its blob before this check or runs after the
+        # unlink and finds the blob gone; the database write lock does the
+        # same for an ingest queue item recording the blob in another process.
+        with _PINS_LOCK, database.write_lock():
+            blobs_used = database.referenced_paths(candidates={file_path for file_path, _ in refs})
+            links_used = database.referenced_browse_paths(browse_path for _, browse_path in refs if browse_path)
+            for file_path, browse_path in refs:
+                if file_path in _PINNED:
+                    # Being stored again right now, and maybe linked at the same browse path.
+                    continue
+                if browse_path and browse_path not in links_used and _unlink_link(Path(browse_path), Path(file_path)):
+                    removed["links_removed"] += 1
+                if file_path not in blobs_used:
+                    removed["bytes_freed"] += _unlink_blob(Path(file_path), removed)
+        return removed
+
+    def collect_garbage(self, database: Database, browse_root: Path) -> dict[str, int]:
+        """Remove every unreferenced blob and the browse entries pointing at it."""
+
+        removed = {"blobs_removed": 0, "links_removed": 0, "bytes_freed": 0}
+        if not self.root.exists():
+            return removed
+        referenced = database.referenced_paths(prefix=str(self.root))
+        orphans = {str(blob): blob for blob in self.root.rglob("*.pdf") if str(blob) not in referenced}
+        if not orphans:
+            return removed
+
+        identities = {}
+        for blob in orphans.values():
+            stat_result = blob.stat()
+            identities[(stat_result.st_dev, stat_result.st_ino)] = blob
+        if browse_root.exists():
+            for entry in browse_root.rglob("*"):
+                if entry.is_symlink():
+                    if os.readlink(entry) in orphans:
+                        entry.unlink()
+                        removed["links_removed"] += 1
+                    continue
+                if not entry.is_file():
+                    continue
+                stat_result = entry.stat()
+                if stat_result.st_nlink > 1 and (stat_result.st_dev, stat_result.st_ino) in identities:
+                    entry.unlink()
+                    removed["links_removed"] += 1
+        with _PINS_LOCK, database.write_lock():
+            referenced = database.referenced_paths(candidates=orphans)
+            for path, blob in orphans.items():
+                if path not in referenced and path not in _PINNED:
+                    removed["bytes_freed"] += _unlink_blob(blob, removed)
+        return removed
+
+
+def _unlink_link(browse_path: Path, blob: Path) -> bool:
+    """Remove a browse entry only if it still points at the blob."""
+
+    try:
+        if browse_path.is_symlink():
+            if Path(os.readlink(browse_path)) != blob:
+                return False
+        elif not (browse_path.exists() and blob.exists() and os.path.samefile(browse_path, blob)):
+            return False
+        browse_path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _unlink_blob(blob: Path, removed: dict[str, int]) -> int:
+    try:
+        size = blob.stat().st_size
+        blob.unlink()
+    except FileNotFoundError:
+        return 0
+    removed["blobs_removed"] += 1
+    return size
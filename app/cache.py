@@ -0,0 +1,97 @@
+"""In-process response cache keyed by request and table data versions."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Rendered response body stored in the cache."""
+
+    body: bytes
+    media_type: str
+    stored_at: float
+    headers: dict[str, str]
+
+
+class ResponseCache:
+    """Bounded LRU cache for rendered responses.
+
+    Keys embed the data versions of the tables a response was built from, so a
+    database write makes older entries unreachable; they age out through LRU
+    eviction. ``ttl_seconds`` bounds staleness of time-relative values such as
+    the "failures in the last 7 days" counter.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float | None = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(route: str, params: dict[str, str] | list[tuple[str, str]], versions: tuple[int, ...]) -> Hashable:
+        """Build a cache key from route, query parameters and data versions."""
+
+        items = params.items() if isinstance(params, dict) else params
+        return (route, tuple(sorted((str(name), str(value)) for name, value in items)), versions)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        """Return cached response for key or None, updating hit/miss counters."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry.stored_at > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes, media_type: str, headers: dict[str, str] | None = None) -> None:
+        """Store a rendered body, evicting least recently used entries."""
+
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = CachedResponse(
+                body=body,
+                media_type=media_type,
+                stored_at=time.monotonic(),
+                headers=dict(headers or {}),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, float | int]:
+        """Return hit/miss counters for monitoring."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,75 @@
+"""Calibration intervals and due-date bucketing."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import Select, and_, func, select
+
+from app.config import AppConfig
+from app.models import Device
+
+OVERDUE = "overdue"
+DUE_SOON = "due_soon"
+OK = "ok"
+BUCKETS = (OVERDUE, DUE_SOON, OK)
+
+
+@dataclass(frozen=True)
+class CalibrationSchedule:
+    """Interval per device type, else per organization, else the default."""
+
+    default_days: float = 180.0
+    intervals: dict[str, float] = field(default_factory=dict)
+    due_soon_days: float = 14.0
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "CalibrationSchedule":
+        return cls(
+            default_days=config.calibration_interval_days,
+            intervals=dict(config.calibration_intervals),
+            due_soon_days=config.calibration_due_soon_days,
+        )
+
+    def interval(self, device_type: Optional[str], organization: Optional[str]) -> timedelta:
+        days = self.intervals.get(device_type or "", self.intervals.get(organization or "", self.default_days))
+        return timedelta(days=days)
+
+    def next_due(
+        self, last_tested_at: Optional[datetime], device_type: Optional[str], organization: Optional[str]
+    ) -> Optional[datetime]:
+        if last_tested_at is None:
+            return None
+        return last_tested_at + self.interval(device_type, organization)
+
+    def fingerprint(self) -> str:
+        """Stable text identifying the intervals, stored to detect changes that move due dates."""
+
+        rules = {"default_days": self.default_days, "intervals": self.intervals}
+        return json.dumps(rules, sort_keys=True, separators=(",", ":"))
+
+    def bucket_bounds(self, now: datetime) -> tuple[datetime, datetime]:
+        """Return (now, due-soon horizon); ``next_due_at`` below the first is overdue."""
+
+        return now, now + timedelta(days=self.due_soon_days)
+
+
+def bucket_counts_query(now: datetime, horizon: datetime) -> Select:
+    """Select (overdue, due_soon, ok) device counts."""
+
+    return select(
+        func.count().filter(Device.next_due_at < now),
+        func.count().filter(Device.next_due_at >= now, Device.next_due_at < horizon),
+        func.count().filter(Device.next_due_at >= horizon),
+    ).select_from(Device)
+
+
+def bucket_condition(bucket: str, now: datetime, horizon: datetime) -> Any:
+    if bucket == OVERDUE:
+        return Device.next_due_at < now
+    if bucket == DUE_SOON:
+        return and_(Device.next_due_at >= now, Device.next_due_at < horizon)
+    return Device.next_due_at >= horizon
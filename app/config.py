@@ -3,12 +3,36 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 import yaml
 from pydantic import BaseModel, Field
 
 
+class ImportSource(BaseModel):
+    """One watched import folder, typically fed by a single X-dock station."""
+
+    name: str
+    folder: Path
+    concurrency: int = 1
+    priority: int = 1
+
+
+class OrganizationRule(BaseModel):
+    """Barcodes starting with one of ``prefixes`` belong to organization ``name``."""
+
+    name: str
+    prefixes: list[str]
+    ignore_spaces: bool = False
+
+
+def default_organization_rules() -> list[OrganizationRule]:
+    return [
+        OrganizationRule(name="AMBIPAR", prefixes=["AR "]),
+        OrganizationRule(name="MCA", prefixes=["MCA", "011", "012", "013"], ignore_spaces=True),
+    ]
+
+
 class AppConfig(BaseModel):
     """Runtime configuration for the certificate manager."""
 
@@ -17,10 +41,58 @@ class AppConfig(BaseModel):
     sorted_folder: Path = Field(default=Path(r"C:\GasDock\Sorted"))
     quarantine_folder: Path = Field(default=Path(r"C:\GasDock\Quarantine"))
     logs_folder: Path = Field(default=Path(r"C:\GasDock\logs"))
+    thumbnails_folder: Path = Field(default=Path(r"C:\GasDock\Thumbnails"))
+    thumbnail_width: int = 320
     host: str = "127.0.0.1"
     port: int = 8765
     stable_seconds: float = 2.0
     stable_checks: int = 3
+    response_cache_size: int = 256
+    response_cache_ttl_seconds: float = 300.0
+    file_workers: int = 2
+    compression_min_bytes: int = 4096
+    profiling_enabled: bool = False
+    profiling_slow_seconds: float = 5.0
+    profiling_top_n: int = 20
+    import_workers: int = 1
+    import_sources: list[ImportSource] = Field(default_factory=list)
+    parse_workers: int = 2
+    parse_worker_processes: bool = True
+    parse_worker_max_files: int = 500
+    parse_worker_max_rss_mb: float = 400.0
+    ingest_queue_enabled: bool = True
+    ingest_queue_batch_size: int = 16
+    ingest_queue_lease_seconds: float = 300.0
+    ingest_queue_max_attempts: int = 5
+    ingest_queue_retry_base_seconds: float = 10.0
+    ingest_queue_retention_days: float = 7.0
+    placement_io_workers: int = 2
+    placement_fsync_batch: int = 1
+    placement_fsync_max_delay_seconds: float = 2.0
+    placement_buffer_kb: int = 1024
+    storage_mode: str = "tree"
+    blob_folder: Path = Field(default=Path(r"C:\GasDock\Blobs"))
+    browse_link_mode: str = "hardlink"
+    quarantine_retry_max_attempts: int = 5
+    quarantine_retry_base_seconds: float = 30.0
+    quarantine_retry_max_seconds: float = 3600.0
+    quarantine_retry_poll_seconds: float = 15.0
+    quarantine_retry_batch_size: int = 32
+    quarantine_retry_workers: int = 2
+    calibration_interval_days: float = 180.0
+    calibration_intervals: dict[str, float] = Field(default_factory=dict)
+    calibration_due_soon_days: float = 14.0
+    organization_rules: list[OrganizationRule] = Field(default_factory=default_organization_rules)
+    organization_fallback: str = "OTHER"
+    organization_reclassify_batch_size: int = 500
+    role: Literal["both", "ingest", "web"] = "both"
+    web_workers: int = 1
+    dashboard_client_rows: int = 2000
+
+    def resolved_import_sources(self) -> list[ImportSource]:
+        """Return configured import sources, or the single ``import_folder``."""
+
+        return self.import_sources or [ImportSource(name="default", folder=self.import_folder)]
 
 
 DEFAULT_CONFIG_PATH = Path("config.yaml")
@@ -2,37 +2,163 @@
 
 from __future__ import annotations
 
+import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Iterator, Optional, Sequence
 
-from app.utils import classify_organization, normalize_barcode
+from app.utils import normalize_barcode
 
-from sqlalchemy import create_engine, func, select, text
+from sqlalchemy import Connection, Select, create_engine, delete, event, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.models import Base, Device, TestRecord
+from app import rollups
+from app.calibration import CalibrationSchedule
+from app.metrics import DB_COMMIT_SECONDS
+from app.models import AppSetting, Base, DataVersion, Device, GasReading, IngestQueueItem, TestRecord
+from app.organizations import OrganizationClassifier
+
+if TYPE_CHECKING:
+    from app.parser import SpanReading
+
+# Bump whenever create_tables gains a new table, column or index so existing
+# databases run the migrations once; startup skips them while this matches.
+SCHEMA_VERSION = 12
+ORGANIZATION_RULES_SETTING = "organization_rules"
+CALIBRATION_INTERVALS_SETTING = "calibration_intervals"
+LOGGER = logging.getLogger(__name__)
+# How long a writer waits for another process's write transaction.
+BUSY_TIMEOUT_MS = 30_000
+# Execution option marking write transactions, which start with BEGIN IMMEDIATE.
+WRITE_OPTION = "gasdock_write"
+# Values per IN (...) list in set-based statements, below SQLite's parameter limit.
+_IN_CHUNK = 500
+
+
+def _configure_connection(dbapi_connection, _record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only syncs at checkpoints; a power loss can drop the
+    # last commits but never corrupts the database.
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _configure_sync_connection(dbapi_connection, record) -> None:
+    _configure_connection(dbapi_connection, record)
+    # Take over transaction control from pysqlite so _begin decides how to BEGIN.
+    dbapi_connection.isolation_level = None
+
+
+def _begin(connection: Connection) -> None:
+    options = connection.get_execution_options()
+    if options.get("isolation_level") == "AUTOCOMMIT":
+        return
+    connection.exec_driver_sql("BEGIN IMMEDIATE" if options.get(WRITE_OPTION) else "BEGIN")
+
+
+def _data_versions_query(tables: Sequence[str]) -> Select:
+    return select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(tables))
+
+
+def _bump_data_versions(executor: Session | Connection, tables: Sequence[str]) -> None:
+    """Increment version counters inside the caller's write transaction."""
+
+    statement = sqlite_insert(DataVersion).values([{"table_name": table, "version": 1} for table in tables])
+    executor.execute(
+        statement.on_conflict_do_update(index_elements=[DataVersion.table_name], set_={"version": DataVersion.version + 1})
+    )
 
 
 class Database:
     """Wraps SQLite access and common operations."""
 
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        calibration: Optional[CalibrationSchedule] = None,
+        organizations: Optional[OrganizationClassifier] = None,
+    ):
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self.engine = create_engine(f"sqlite:///{db_path}", future=True)
-        self._session_maker = sessionmaker(bind=self.engine, expire_on_commit=False, class_=Session)
+        # The ingest process and several web workers share the file: WAL lets
+        # readers run beside the writer. Transactions on ``write_engine`` start
+        # with BEGIN IMMEDIATE so they queue on busy_timeout instead of failing
+        # when a read lock cannot be upgraded; reads keep a deferred BEGIN and
+        # never hold up a writer.
+        event.listen(self.engine, "connect", _configure_sync_connection)
+        event.listen(self.engine, "begin", _begin)
+        self.write_engine = self.engine.execution_options(**{WRITE_OPTION: True})
+        self._session_maker = sessionmaker(bind=self.write_engine, expire_on_commit=False, class_=Session)
+        self._read_session_maker = sessionmaker(bind=self.engine, expire_on_commit=False, class_=Session)
+        # Read-only API endpoints use the async engine so they never wait on the threadpool.
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        event.listen(self.async_engine.sync_engine, "connect", _configure_connection)
+        self._async_session_maker = async_sessionmaker(bind=self.async_engine, expire_on_commit=False, class_=AsyncSession)
+        self.calibration = calibration or CalibrationSchedule()
+        self.organizations = organizations or OrganizationClassifier()
+
+    def data_version(self, *tables: str) -> tuple[int, ...]:
+        """Return current write counters for the given tables, as seen by every process."""
+
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            versions = dict(connection.execute(_data_versions_query(tables)).all())
+        return tuple(versions.get(table, 0) for table in tables)
+
+    async def data_version_async(self, *tables: str) -> tuple[int, ...]:
+        """Like :meth:`data_version`, without blocking the event loop."""
+
+        async with self.async_engine.connect() as connection:
+            versions = dict((await connection.execute(_data_versions_query(tables))).all())
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def bump_data_version(self, *tables: str) -> None:
+        """Mark tables as changed so version-keyed caches in all processes stop matching."""
+
+        with self.write_engine.begin() as connection:
+            _bump_data_versions(connection, tables)
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the database write lock for the block, so no process commits meanwhile."""
+
+        with self.write_engine.begin():
+            yield
 
     def create_tables(self) -> None:
-        Base.metadata.create_all(self.engine)
+        with self.engine.connect() as connection:
+            version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= SCHEMA_VERSION:
+            return
+        Base.metadata.create_all(self.write_engine)
         self._ensure_tests_barcode_column()
         self._ensure_tests_fail_reason_column()
         self._ensure_devices_barcode_column()
         self._ensure_devices_organization_column()
+        self._ensure_tests_browse_path_column()
+        self._ensure_tests_retry_columns()
+        self._ensure_devices_next_due_column()
+        self._ensure_tests_history_index()
+        self._ensure_tests_organization_column()
+        self._ensure_ingest_queue_active_index()
+        if version < 9:
+            # Rollups are grouped by tests.organization, so that column must be
+            # backfilled before they are rebuilt or old rows are rolled up unclassified.
+            self._backfill_test_organizations()
+            self.rebuild_rollups()
+        if version < 7:
+            self.refresh_due_dates()
+        with self.write_engine.begin() as connection:
+            connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     def _ensure_tests_barcode_column(self) -> None:
         """Add barcode column for older databases created before this field existed."""
 
-        with self.engine.begin() as connection:
+        with self.write_engine.begin() as connection:
             columns = connection.execute(text("PRAGMA table_info(tests)")).fetchall()
             if any(column[1] == "barcode" for column in columns):
                 return
@@ -42,16 +168,75 @@ class Database:
     def _ensure_tests_fail_reason_column(self) -> None:
         """Add fail_reason column for older databases created before this field existed."""
 
-        with self.engine.begin() as connection:
+        with self.write_engine.begin() as connection:
             columns = connection.execute(text("PRAGMA table_info(tests)")).fetchall()
             if any(column[1] == "fail_reason" for column in columns):
                 return
             connection.execute(text("ALTER TABLE tests ADD COLUMN fail_reason TEXT"))
 
+    def _ensure_tests_browse_path_column(self) -> None:
+        """Add browse_path column used by the content-addressed store."""
+
+        with self.write_engine.begin() as connection:
+            columns = connection.execute(text("PRAGMA table_info(tests)")).fetchall()
+            if any(column[1] == "browse_path" for column in columns):
+                return
+            connection.execute(text("ALTER TABLE tests ADD COLUMN browse_path TEXT"))
+
+    def _ensure_tests_retry_columns(self) -> None:
+        """Add quarantine retry bookkeeping columns and their index."""
+
+        with self.write_engine.begin() as connection:
+            columns = {column[1] for column in connection.execute(text("PRAGMA table_info(tests)")).fetchall()}
+            if "retry_attempts" not in columns:
+                connection.execute(text("ALTER TABLE tests ADD COLUMN retry_attempts INTEGER NOT NULL DEFAULT 0"))
+            if "next_retry_at" not in columns:
+                connection.execute(text("ALTER TABLE tests ADD COLUMN next_retry_at DATETIME"))
+            if "retry_lease_until" not in columns:
+                connection.execute(text("ALTER TABLE tests ADD COLUMN retry_lease_until DATETIME"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_tests_next_retry_at ON tests (next_retry_at)"))
+
+    def _ensure_tests_organization_column(self) -> None:
+        """Add the persisted, indexed organization to tests for older databases."""
+
+        with self.write_engine.begin() as connection:
+            columns = connection.execute(text("PRAGMA table_info(tests)")).fetchall()
+            if not any(column[1] == "organization" for column in columns):
+                connection.execute(text("ALTER TABLE tests ADD COLUMN organization VARCHAR(32)"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_tests_organization ON tests (organization)"))
+
+    def _backfill_test_organizations(self) -> None:
+        """Classify all existing tests in one set-based update during migration."""
+
+        with self._session_maker() as session:
+            session.execute(update(TestRecord).values(organization=self.organizations.sql(TestRecord.barcode)))
+            self._store_setting(session, ORGANIZATION_RULES_SETTING, self.organizations.fingerprint())
+            session.commit()
+
+    def _ensure_tests_history_index(self) -> None:
+        """Index tests by serial and date for paginated device history."""
+
+        with self.write_engine.begin() as connection:
+            connection.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_tests_serial_tested_at ON tests (serial, tested_at)")
+            )
+
+    def _ensure_ingest_queue_active_index(self) -> None:
+        """Replace the full claim index with one over active queue items only."""
+
+        with self.write_engine.begin() as connection:
+            connection.execute(text("DROP INDEX IF EXISTS ix_ingest_queue_claim"))
+            connection.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_ingest_queue_active ON ingest_queue (source, id, lease_expires_at) "
+                    "WHERE state IN ('pending', 'parsing', 'moved')"
+                )
+            )
+
     def _ensure_devices_barcode_column(self) -> None:
         """Add barcode column to devices table for older databases."""
 
-        with self.engine.begin() as connection:
+        with self.write_engine.begin() as connection:
             columns = connection.execute(text("PRAGMA table_info(devices)")).fetchall()
             if any(column[1] == "barcode" for column in columns):
                 return
@@ -60,18 +245,33 @@ class Database:
     def _ensure_devices_organization_column(self) -> None:
         """Add organization column to devices table for older databases."""
 
-        with self.engine.begin() as connection:
+        with self.write_engine.begin() as connection:
             columns = connection.execute(text("PRAGMA table_info(devices)")).fetchall()
             if any(column[1] == "organization" for column in columns):
                 return
             connection.execute(text("ALTER TABLE devices ADD COLUMN organization VARCHAR(32)"))
 
+    def _ensure_devices_next_due_column(self) -> None:
+        """Add the indexed calibration due date to devices for older databases."""
+
+        with self.write_engine.begin() as connection:
+            columns = connection.execute(text("PRAGMA table_info(devices)")).fetchall()
+            if not any(column[1] == "next_due_at" for column in columns):
+                connection.execute(text("ALTER TABLE devices ADD COLUMN next_due_at DATETIME"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_devices_next_due_at ON devices (next_due_at)"))
+
     def session(self) -> Iterator[Session]:
         """Yield DB session for dependency usage."""
 
         with self._session_maker() as session:
             yield session
 
+    async def async_session(self) -> AsyncIterator[AsyncSession]:
+        """Yield async DB session for read-only dependency usage."""
+
+        async with self._async_session_maker() as session:
+            yield session
+
     def add_test_record(
         self,
         serial: str,
@@ -83,25 +283,75 @@ class Database:
         parse_status: str = "ok",
         parse_error: Optional[str] = None,
         fail_reason: Optional[str] = None,
+        queue_item_id: Optional[int] = None,
+        browse_path: Optional[str] = None,
+        next_retry_at: Optional[datetime] = None,
+        replaces_test_id: Optional[int] = None,
+        gas_readings: Sequence["SpanReading"] = (),
     ) -> TestRecord:
-        """Insert test and update device latest snapshot."""
+        """Insert test with its per-gas readings and update device latest snapshot.
+
+        With ``queue_item_id`` the ingest queue item is settled in the same
+        transaction, so a record is never committed twice after a restart.
+        ``replaces_test_id`` deletes that (quarantine error) row in the same
+        transaction, so a successful retry leaves no stale ``UNKNOWN`` record.
+        """
 
         serial = serial.strip().upper()
         barcode = normalize_barcode(barcode) if barcode else None
 
         with self._session_maker() as session:
+            if replaces_test_id is not None:
+                replaced = session.get(TestRecord, replaces_test_id)
+                if replaced is not None:
+                    rollups.remove_tests(session, TestRecord.id == replaces_test_id)
+                    session.execute(delete(GasReading).where(GasReading.test_id == replaces_test_id))
+                    session.delete(replaced)
+                    session.flush()
+                    self._refresh_device_snapshot(session, replaced.serial)
+
+            organization = self.organizations.classify(barcode)
             test = TestRecord(
                 serial=serial,
                 device_type=device_type,
                 barcode=barcode,
+                organization=organization,
                 tested_at=tested_at,
                 result=result,
                 file_path=file_path,
                 parse_status=parse_status,
                 parse_error=parse_error,
                 fail_reason=fail_reason,
+                browse_path=browse_path,
+                next_retry_at=next_retry_at,
             )
             session.add(test)
+            if gas_readings:
+                session.flush()
+                session.execute(
+                    insert(GasReading),
+                    [
+                        {
+                            "test_id": test.id,
+                            "gas": reading.gas,
+                            "passed": reading.passed,
+                            "nominal": reading.nominal,
+                            "measured": reading.measured,
+                            "unit": reading.unit,
+                        }
+                        for reading in gas_readings
+                    ],
+                )
+            rollups.add_test(
+                session,
+                serial,
+                tested_at,
+                organization,
+                device_type,
+                result,
+                fail_reason,
+                [(reading.gas, reading.passed) for reading in gas_readings],
+            )
 
             device = session.get(Device, serial)
             if device is None:
@@ -110,17 +360,165 @@ class Database:
 
             if barcode:
                 device.barcode = barcode
-                device.organization = classify_organization(barcode)
+                device.organization = organization
 
             if device.last_tested_at is None or tested_at >= device.last_tested_at:
                 device.last_tested_at = tested_at
                 device.last_result = result
                 device.device_type = device_type or device.device_type
                 device.last_updated = datetime.now(timezone.utc)
-
-            session.commit()
+            device.next_due_at = self.calibration.next_due(device.last_tested_at, device.device_type, device.organization)
+
+            if queue_item_id is not None:
+                session.execute(
+                    update(IngestQueueItem)
+                    .where(IngestQueueItem.id == queue_item_id)
+                    .values(
+                        state="committed" if parse_status == "ok" else "quarantined",
+                        lease_owner=None,
+                        lease_expires_at=None,
+                        updated_at=datetime.now(timezone.utc),
+                    )
+                )
+
+            _bump_data_versions(session, ("tests", "devices"))
+            with DB_COMMIT_SECONDS.time(operation="add_test_record"):
+                session.commit()
             session.refresh(test)
-            return test
+        return test
+
+    def set_device_barcode(self, serial: str, barcode: str) -> bool:
+        """Assign barcode to a device, reclassify it and tag its latest test."""
+
+        serial_upper = serial.strip().upper()
+        normalized = normalize_barcode(barcode)
+        with self._session_maker() as session:
+            device = session.get(Device, serial_upper)
+            if device is None:
+                return False
+
+            device.barcode = normalized or None
+            device.organization = self.organizations.classify(normalized)
+            device.next_due_at = self.calibration.next_due(device.last_tested_at, device.device_type, device.organization)
+
+            if normalized:
+                latest = session.scalars(
+                    select(TestRecord)
+                    .where(TestRecord.serial == serial_upper)
+                    .order_by(TestRecord.tested_at.desc())
+                    .limit(1)
+                ).first()
+                if latest is not None and latest.barcode != normalized:
+                    readings = session.execute(
+                        select(GasReading.gas, GasReading.passed).where(GasReading.test_id == latest.id)
+                    ).all()
+                    fields = (latest.device_type, latest.result, latest.fail_reason, readings)
+                    rollups.add_test(session, serial_upper, latest.tested_at, latest.organization, *fields, delta=-1)
+                    rollups.add_test(session, serial_upper, latest.tested_at, device.organization, *fields)
+                    latest.barcode = normalized
+                    latest.organization = device.organization
+            _bump_data_versions(session, ("tests", "devices"))
+            with DB_COMMIT_SECONDS.time(operation="set_device_barcode"):
+                session.commit()
+        return True
+
+    def set_device_barcodes(self, assignments: Sequence[tuple[str, str]]) -> list[dict]:
+        """Assign many serial -> barcode pairs in one transaction.
+
+        Devices and their latest tests are updated with set-based statements
+        rather than one ORM round trip per device. Returns one report entry per
+        input row with status ``updated``, ``unchanged``, ``not_found``,
+        ``invalid`` or ``duplicate`` (an earlier row for a serial that appears
+        again; the last row wins).
+        """
+
+        report: list[dict] = []
+        wanted: dict[str, dict] = {}
+        for index, (serial, barcode) in enumerate(assignments, start=1):
+            serial_upper = (serial or "").strip().upper()
+            normalized = normalize_barcode(barcode or "")
+            entry = {"row": index, "serial": serial_upper, "barcode": normalized or None, "organization": None}
+            report.append(entry)
+            if not serial_upper or not normalized:
+                entry["status"] = "invalid"
+                continue
+            if serial_upper in wanted:
+                wanted[serial_upper]["status"] = "duplicate"
+            entry["organization"] = self.organizations.classify(normalized)
+            wanted[serial_upper] = entry
+        if not wanted:
+            return report
+
+        serials = list(wanted)
+        with self._session_maker() as session:
+            devices = {}
+            latest_tests = {}
+            for start in range(0, len(serials), _IN_CHUNK):
+                chunk = serials[start : start + _IN_CHUNK]
+                for row in session.execute(
+                    select(Device.serial, Device.barcode, Device.last_tested_at, Device.device_type).where(
+                        Device.serial.in_(chunk)
+                    )
+                ):
+                    devices[row.serial] = row
+                ranked = (
+                    select(
+                        TestRecord.id,
+                        TestRecord.serial,
+                        TestRecord.barcode,
+                        func.row_number()
+                        .over(partition_by=TestRecord.serial, order_by=(TestRecord.tested_at.desc(), TestRecord.id.desc()))
+                        .label("rank"),
+                    )
+                    .where(TestRecord.serial.in_(chunk))
+                    .subquery()
+                )
+                for test_id, serial, barcode in session.execute(
+                    select(ranked.c.id, ranked.c.serial, ranked.c.barcode).where(ranked.c.rank == 1)
+                ):
+                    latest_tests[serial] = (test_id, barcode)
+
+            device_updates = []
+            test_updates = []
+            now = datetime.now(timezone.utc)
+            for serial, entry in wanted.items():
+                device = devices.get(serial)
+                if device is None:
+                    entry["status"] = "not_found"
+                    continue
+                latest = latest_tests.get(serial)
+                if device.barcode == entry["barcode"] and (latest is None or latest[1] == entry["barcode"]):
+                    entry["status"] = "unchanged"
+                    continue
+                entry["status"] = "updated"
+                device_updates.append(
+                    {
+                        "serial": serial,
+                        "barcode": entry["barcode"],
+                        "organization": entry["organization"],
+                        "last_updated": now,
+                        "next_due_at": self.calibration.next_due(
+                            device.last_tested_at, device.device_type, entry["organization"]
+                        ),
+                    }
+                )
+                if latest is not None and latest[1] != entry["barcode"]:
+                    test_updates.append({"id": latest[0], "barcode": entry["barcode"], "organization": entry["organization"]})
+
+            if device_updates:
+                session.execute(update(Device), device_updates)
+            test_ids = [row["id"] for row in test_updates]
+            for start in range(0, len(test_ids), _IN_CHUNK):
+                rollups.remove_tests(session, TestRecord.id.in_(test_ids[start : start + _IN_CHUNK]))
+            if test_updates:
+                session.execute(update(TestRecord), test_updates)
+            for start in range(0, len(test_ids), _IN_CHUNK):
+                rollups.add_tests(session, TestRecord.id.in_(test_ids[start : start + _IN_CHUNK]))
+            if device_updates:
+                _bump_data_versions(session, ("tests", "devices"))
+            with DB_COMMIT_SECONDS.time(operation="set_device_barcodes"):
+                session.commit()
+        return report
 
     def delete_test_record(self, test_id: int) -> bool:
         """Delete a single test record by id and refresh device snapshot."""
@@ -131,10 +529,14 @@ class Database:
                 return False
 
             serial = test.serial
+            rollups.remove_tests(session, TestRecord.id == test_id)
+            session.execute(delete(GasReading).where(GasReading.test_id == test_id))
             session.delete(test)
             self._refresh_device_snapshot(session, serial)
-            session.commit()
-            return True
+            _bump_data_versions(session, ("tests", "devices"))
+            with DB_COMMIT_SECONDS.time(operation="delete_test_record"):
+                session.commit()
+        return True
 
     def delete_device(self, serial: str) -> bool:
         """Delete a device and all related test records."""
@@ -146,12 +548,229 @@ class Database:
             if device is None and not tests:
                 return False
 
+            rollups.remove_tests(session, TestRecord.serial == serial_upper)
+            session.execute(
+                delete(GasReading).where(
+                    GasReading.test_id.in_(select(TestRecord.id).where(TestRecord.serial == serial_upper))
+                )
+            )
             for test in tests:
                 session.delete(test)
             if device is not None:
                 session.delete(device)
+            _bump_data_versions(session, ("tests", "devices"))
+            with DB_COMMIT_SECONDS.time(operation="delete_device"):
+                session.commit()
+        return True
+
+    def rebuild_rollups(self) -> None:
+        """Recompute the daily rollup tables from all tests."""
+
+        with self._session_maker() as session:
+            rollups.rebuild(session)
+            _bump_data_versions(session, ("tests",))
+            with DB_COMMIT_SECONDS.time(operation="rebuild_rollups"):
+                session.commit()
+
+    def refresh_due_dates(self) -> int:
+        """Recompute ``next_due_at`` for all devices, e.g. after the intervals changed.
+
+        Returns the number of devices whose due date moved.
+        """
+
+        with self._session_maker() as session:
+            rows = session.execute(
+                select(Device.serial, Device.last_tested_at, Device.device_type, Device.organization, Device.next_due_at)
+            ).all()
+            changes = [
+                {"serial": serial, "next_due_at": due}
+                for serial, last_tested_at, device_type, organization, current in rows
+                if (due := self.calibration.next_due(last_tested_at, device_type, organization)) != current
+            ]
+            if changes:
+                session.execute(update(Device), changes)
+                _bump_data_versions(session, ("devices",))
+            self._store_setting(session, CALIBRATION_INTERVALS_SETTING, self.calibration.fingerprint())
+            with DB_COMMIT_SECONDS.time(operation="refresh_due_dates"):
+                session.commit()
+        return len(changes)
+
+    def calibration_intervals_changed(self) -> bool:
+        """Return True when stored due dates were computed with other intervals."""
+
+        with self._read_session_maker() as session:
+            stored = session.get(AppSetting, CALIBRATION_INTERVALS_SETTING)
+        return stored is None or stored.value != self.calibration.fingerprint()
+
+    def organization_rules_changed(self) -> bool:
+        """Return True when stored organizations were classified with other rules."""
+
+        with self._read_session_maker() as session:
+            stored = session.get(AppSetting, ORGANIZATION_RULES_SETTING)
+        return stored is None or stored.value != self.organizations.fingerprint()
+
+    def reclassify_organizations(self, batch_size: int = _IN_CHUNK) -> int:
+        """Re-apply the organization rules to all tests and devices in batches.
+
+        Tests are walked in id order; each batch updates only rows whose
+        organization changes and moves their rollup counts in the same
+        transaction, so ingestion and the dashboard keep running meanwhile.
+        The rules fingerprint is stored last, so an interrupted run resumes
+        on the next start. Returns the number of reclassified tests.
+        """
+
+        classified = self.organizations.sql(TestRecord.barcode)
+        changed = 0
+        last_id = 0
+        while True:
+            # Scan outside the write lock; most windows need no change.
+            with self._read_session_maker() as session:
+                window = session.scalars(
+                    select(TestRecord.id).where(TestRecord.id > last_id).order_by(TestRecord.id).limit(batch_size)
+                ).all()
+                if not window:
+                    break
+                stale = session.scalars(
+                    select(TestRecord.id).where(
+                        TestRecord.id.between(window[0], window[-1]), TestRecord.organization.is_not(classified)
+                    )
+                ).all()
+            last_id = window[-1]
+            if not stale:
+                continue
+            with self._session_maker() as session:
+                # Re-check under the write lock in case a row changed since the scan.
+                stale = session.scalars(
+                    select(TestRecord.id).where(TestRecord.id.in_(stale), TestRecord.organization.is_not(classified))
+                ).all()
+                condition = TestRecord.id.in_(stale)
+                rollups.remove_tests(session, condition)
+                session.execute(update(TestRecord).where(condition).values(organization=classified))
+                rollups.add_tests(session, condition)
+                _bump_data_versions(session, ("tests",))
+                with DB_COMMIT_SECONDS.time(operation="reclassify_organizations"):
+                    session.commit()
+            changed += len(stale)
+
+        with self._session_maker() as session:
+            device_organization = self.organizations.sql(Device.barcode)
+            session.execute(
+                update(Device)
+                .where(Device.organization.is_not(device_organization))
+                .values(organization=device_organization)
+            )
+            self._store_setting(session, ORGANIZATION_RULES_SETTING, self.organizations.fingerprint())
+            _bump_data_versions(session, ("devices",))
+            session.commit()
+        self.refresh_due_dates()
+        LOGGER.info("Reclassified organizations of %s tests", changed)
+        return changed
+
+    def _store_setting(self, session: Session, key: str, value: str) -> None:
+        setting = session.get(AppSetting, key)
+        if setting is None:
+            session.add(AppSetting(key=key, value=value))
+        else:
+            setting.value = value
+
+    def due_retries(self, now: datetime, limit: int) -> list[tuple[int, str, int]]:
+        """Return (id, file_path, retry_attempts) of quarantine rows whose retry is due."""
+
+        query = (
+            select(TestRecord.id, TestRecord.file_path, TestRecord.retry_attempts)
+            .where(TestRecord.next_retry_at <= now, TestRecord.parse_status == "parse_error")
+            .order_by(TestRecord.next_retry_at)
+            .limit(limit)
+        )
+        with self._read_session_maker() as session:
+            return [tuple(row) for row in session.execute(query)]
+
+    def quarantined_records(self, test_ids: Optional[Iterable[int]] = None) -> list[tuple[int, str, int]]:
+        """Return (id, file_path, retry_attempts) of all (or the given) quarantine rows."""
+
+        query = select(TestRecord.id, TestRecord.file_path, TestRecord.retry_attempts).where(
+            TestRecord.parse_status == "parse_error"
+        )
+        if test_ids is not None:
+            query = query.where(TestRecord.id.in_(list(test_ids)))
+        with self._read_session_maker() as session:
+            return [tuple(row) for row in session.execute(query.order_by(TestRecord.id))]
+
+    def claim_retry(self, test_id: int, attempts: int, lease_until: datetime, now: datetime) -> bool:
+        """Lease a quarantine row for one retry if it is unleased and still has ``attempts``.
+
+        The attempt is counted and the retry time moves to the lease end, so
+        a crashed retry is picked up again then. False means another worker
+        or process got the row first.
+        """
+
+        with self._session_maker() as session:
+            claimed = session.scalar(
+                update(TestRecord)
+                .where(
+                    TestRecord.id == test_id,
+                    TestRecord.parse_status == "parse_error",
+                    TestRecord.retry_attempts == attempts,
+                    TestRecord.retry_lease_until.is_(None) | (TestRecord.retry_lease_until < now),
+                )
+                .values(retry_attempts=attempts + 1, next_retry_at=lease_until, retry_lease_until=lease_until)
+                .returning(TestRecord.id)
+            )
             session.commit()
-            return True
+        return claimed is not None
+
+    def schedule_retry(self, test_id: int, attempts: int, next_retry_at: Optional[datetime], error: str) -> None:
+        """Record a failed retry and when (if ever) to try again."""
+
+        with self._session_maker() as session:
+            session.execute(
+                update(TestRecord)
+                .where(TestRecord.id == test_id)
+                .values(retry_attempts=attempts, next_retry_at=next_retry_at, retry_lease_until=None, parse_error=error)
+            )
+            _bump_data_versions(session, ("tests",))
+            with DB_COMMIT_SECONDS.time(operation="schedule_retry"):
+                session.commit()
+
+    def file_refs(self, test_id: Optional[int] = None, serial: Optional[str] = None) -> list[tuple[str, Optional[str]]]:
+        """Return (file_path, browse_path) of one test or of all tests of a device."""
+
+        query = select(TestRecord.file_path, TestRecord.browse_path)
+        if test_id is not None:
+            query = query.where(TestRecord.id == test_id)
+        if serial is not None:
+            query = query.where(TestRecord.serial == serial.upper())
+        with self._read_session_maker() as session:
+            return [(file_path, browse_path) for file_path, browse_path in session.execute(query)]
+
+    def referenced_paths(self, candidates: Optional[Iterable[str]] = None, prefix: Optional[str] = None) -> set[str]:
+        """Return paths still used by a test row or an in-flight ingest queue item.
+
+        Either check specific ``candidates`` or everything under ``prefix``.
+        """
+
+        tests = select(TestRecord.file_path)
+        queued = select(IngestQueueItem.destination).where(IngestQueueItem.state.in_(("pending", "parsing", "moved")))
+        if candidates is not None:
+            wanted = list(candidates)
+            if not wanted:
+                return set()
+            tests = tests.where(TestRecord.file_path.in_(wanted))
+            queued = queued.where(IngestQueueItem.destination.in_(wanted))
+        if prefix is not None:
+            tests = tests.where(TestRecord.file_path.startswith(prefix, autoescape=True))
+            queued = queued.where(IngestQueueItem.destination.startswith(prefix, autoescape=True))
+        with self._read_session_maker() as session:
+            return set(session.scalars(tests)) | {path for path in session.scalars(queued) if path}
+
+    def referenced_browse_paths(self, candidates: Iterable[str]) -> set[str]:
+        """Return browse links that some remaining test row still lists."""
+
+        wanted = list(candidates)
+        if not wanted:
+            return set()
+        with self._read_session_maker() as session:
+            return set(session.scalars(select(TestRecord.browse_path).where(TestRecord.browse_path.in_(wanted))))
 
     def _refresh_device_snapshot(self, session: Session, serial: str) -> None:
         """Update device summary fields based on latest remaining test row."""
@@ -178,13 +797,21 @@ class Database:
         device.last_result = latest.result
         device.device_type = latest.device_type
         device.barcode = latest.barcode
-        device.organization = classify_organization(latest.barcode) if latest.barcode else None
+        device.organization = latest.organization
+        device.next_due_at = self.calibration.next_due(device.last_tested_at, device.device_type, device.organization)
         device.last_updated = datetime.now(timezone.utc)
 
     def stats(self) -> dict[str, int]:
         """Return dashboard counters."""
 
-        with self._session_maker() as session:
+        with self._read_session_maker() as session:
             total_devices = session.scalar(select(func.count(Device.serial))) or 0
             total_tests = session.scalar(select(func.count(TestRecord.id))) or 0
             return {"total_devices": total_devices, "total_tests": total_tests}
+
+    async def stats_async(self, session: AsyncSession) -> dict[str, int]:
+        """Return dashboard counters using an async session."""
+
+        total_devices = await session.scalar(select(func.count(Device.serial))) or 0
+        total_tests = await session.scalar(select(func.count(TestRecord.id))) or 0
+        return {"total_devices": total_devices, "total_tests": total_tests}
@@ -0,0 +1,219 @@
+"""Durable SQLite work queue for certificate ingestion.
+
+Every discovered file becomes a row that moves through
+``pending -> parsing -> moved -> committed`` (or ``quarantined``). The move
+target is recorded before the file is moved and the final state is written in
+the same transaction as the test record, so after a crash each item can be
+resumed from exactly the step it reached.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import DateTime, bindparam, delete, func, select, text, update
+
+from app.database import Database
+from app.metrics import DB_COMMIT_SECONDS
+from app.models import IngestQueueItem
+
+PENDING = "pending"
+PARSING = "parsing"
+MOVED = "moved"
+COMMITTED = "committed"
+QUARANTINED = "quarantined"
+FAILED = "failed"
+ACTIVE_STATES = (PENDING, PARSING, MOVED)
+
+
+@dataclass(slots=True)
+class QueueItem:
+    """Claimed work item handed to an ingestion worker."""
+
+    id: int
+    source: str
+    path: str
+    state: str
+    destination: str | None
+    last_error: str | None
+    attempts: int
+    # Seconds until a released item may be claimed again; set by retry_later.
+    retry_after: float | None = None
+
+
+class IngestQueue:
+    """Enqueue, lease, advance and recover ingestion work items."""
+
+    def __init__(
+        self,
+        database: Database,
+        lease_seconds: float = 300.0,
+        owner: str | None = None,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 10.0,
+        retention_days: float = 7.0,
+    ):
+        self.database = database
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retention_days = retention_days
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def enqueue(self, source: str, path: Path) -> int:
+        """Add a file unless it is already waiting or in flight; return the item id."""
+
+        with self.database.write_engine.begin() as connection:
+            existing = connection.scalar(
+                select(IngestQueueItem.id)
+                .where(IngestQueueItem.path == str(path), IngestQueueItem.state.in_(ACTIVE_STATES))
+                .limit(1)
+            )
+            if existing is not None:
+                return existing
+            now = datetime.now(timezone.utc)
+            result = connection.execute(
+                IngestQueueItem.__table__.insert().values(
+                    source=source, path=str(path), state=PENDING, attempts=0, enqueued_at=now, updated_at=now
+                )
+            )
+            return result.inserted_primary_key[0]
+
+    def claim(self, source: str, limit: int) -> list[QueueItem]:
+        """Lease up to ``limit`` unleased (or lease-expired) active items of a source."""
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        # A single UPDATE ... RETURNING is atomic, so concurrent claimers
+        # (threads or processes) never lease the same row twice.
+        statement = text(
+            """
+            UPDATE ingest_queue
+            SET lease_owner = :owner, lease_expires_at = :expires, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM ingest_queue
+                WHERE source = :source AND state IN ('pending', 'parsing', 'moved')
+                  AND (lease_expires_at IS NULL OR lease_expires_at < :now)
+                ORDER BY id
+                LIMIT :limit
+            )
+            RETURNING id, source, path, state, destination, last_error, attempts
+            """
+        ).bindparams(bindparam("expires", type_=DateTime), bindparam("now", type_=DateTime))
+        with self.database.write_engine.begin() as connection:
+            rows = connection.execute(
+                statement,
+                {
+                    "owner": self.owner,
+                    "expires": now + timedelta(seconds=self.lease_seconds),
+                    "source": source,
+                    "now": now,
+                    "limit": limit,
+                },
+            ).all()
+        return sorted((QueueItem(*row) for row in rows), key=lambda item: item.id)
+
+    def advance(self, item: QueueItem, state: str, destination: Path | None = None, error: str | None = None) -> None:
+        """Persist an intermediate state, the planned move target and any error."""
+
+        values: dict[str, object] = {"state": state, "updated_at": datetime.now(timezone.utc)}
+        if destination is not None:
+            values["destination"] = str(destination)
+        if error is not None:
+            values["last_error"] = error
+        if state not in ACTIVE_STATES:
+            values.update(lease_owner=None, lease_expires_at=None)
+        with self.database.write_engine.begin() as connection:
+            with DB_COMMIT_SECONDS.time(operation="ingest_queue_advance"):
+                connection.execute(update(IngestQueueItem).where(IngestQueueItem.id == item.id).values(**values))
+        item.state = state
+        item.destination = values.get("destination", item.destination)  # type: ignore[assignment]
+        item.last_error = values.get("last_error", item.last_error)  # type: ignore[assignment]
+
+    def retry_later(self, item: QueueItem) -> float | None:
+        """Release an item to be claimed again after a backoff; return the delay.
+
+        Returns None, leaving the item untouched, once it has been claimed
+        ``max_attempts`` times.
+        """
+
+        if item.attempts >= self.max_attempts:
+            return None
+        delay = min(self.lease_seconds, self.retry_base_seconds * 2 ** max(0, item.attempts - 1))
+        now = datetime.now(timezone.utc)
+        # A released row with a future expiry is skipped by claim() until then;
+        # naive UTC like the leases claim() writes.
+        not_before = now.replace(tzinfo=None) + timedelta(seconds=delay)
+        with self.database.write_engine.begin() as connection:
+            with DB_COMMIT_SECONDS.time(operation="ingest_queue_advance"):
+                connection.execute(
+                    update(IngestQueueItem)
+                    .where(IngestQueueItem.id == item.id)
+                    .values(lease_owner=None, lease_expires_at=not_before, updated_at=now)
+                )
+        item.retry_after = delay
+        return delay
+
+    def purge(self) -> int:
+        """Delete committed and quarantined items settled more than ``retention_days`` ago."""
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        with self.database.write_engine.begin() as connection:
+            result = connection.execute(
+                delete(IngestQueueItem).where(
+                    IngestQueueItem.state.in_((COMMITTED, QUARANTINED)), IngestQueueItem.updated_at < cutoff
+                )
+            )
+        return result.rowcount
+
+    def recover(self) -> dict[str, int]:
+        """Release leases left by a previous run, settle half-finished moves and purge old rows.
+
+        An item left in ``parsing`` whose source is gone but whose recorded
+        destination exists was moved before the crash; it resumes as ``moved``.
+        If the source is still there the move never happened and it restarts.
+        """
+
+        recovered = {"released": 0, "resumed_moved": 0, "restarted": 0, "purged": self.purge()}
+        with self.database.write_engine.begin() as connection:
+            rows = connection.execute(
+                select(IngestQueueItem.id, IngestQueueItem.path, IngestQueueItem.destination).where(
+                    IngestQueueItem.state == PARSING
+                )
+            ).all()
+            for item_id, path, destination in rows:
+                if not Path(path).exists() and destination and Path(destination).exists():
+                    values = {"state": MOVED}
+                    recovered["resumed_moved"] += 1
+                else:
+                    values = {"state": PENDING, "destination": None, "last_error": None}
+                    recovered["restarted"] += 1
+                connection.execute(update(IngestQueueItem).where(IngestQueueItem.id == item_id).values(**values))
+            # Also clears retry_later backoffs: after a restart they are due now.
+            released = connection.execute(
+                update(IngestQueueItem)
+                .where(
+                    IngestQueueItem.state.in_(ACTIVE_STATES),
+                    IngestQueueItem.lease_owner.is_not(None) | IngestQueueItem.lease_expires_at.is_not(None),
+                )
+                .values(lease_owner=None, lease_expires_at=None)
+            )
+            recovered["released"] = released.rowcount
+        return recovered
+
+    def counts(self, source: str | None = None) -> dict[str, int]:
+        """Return item counts per state, optionally for one source."""
+
+        query = select(IngestQueueItem.state, func.count()).group_by(IngestQueueItem.state)
+        if source is not None:
+            query = query.where(IngestQueueItem.source == source)
+        with self.database.engine.connect() as connection:
+            return {state: count for state, count in connection.execute(query)}
+
+    def active_count(self, source: str) -> int:
+        counts = self.counts(source)
+        return sum(counts.get(state, 0) for state in ACTIVE_STATES)
@@ -0,0 +1,334 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self.callback is not None:
+            return self.callback()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        if self.callback is not None:
+            return [f"{self.name} {_format_value(self.callback())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            totals[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the wrapped block, including on error."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), totals[0])) for key, (counts, totals) in self._series.items())
+        lines: list[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class RateWindow:
+    """Sliding window of ingestion outcomes for files/sec and quarantine ratio."""
+
+    def __init__(self, window_seconds: float = 60.0):
+        self.window_seconds = window_seconds
+        self._events: deque[tuple[float, bool]] = deque()
+        self._lock = threading.Lock()
+
+    def record(self, quarantined: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, quarantined))
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._events and now - self._events[0][0] > self.window_seconds:
+            self._events.popleft()
+
+    def files_per_second(self) -> float:
+        with self._lock:
+            self._trim(time.monotonic())
+            return len(self._events) / self.window_seconds
+
+    def quarantine_ratio(self) -> float:
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._events:
+                return 0.0
+            return sum(1 for _, quarantined in self._events if quarantined) / len(self._events)
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together on ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+INGEST_WINDOW = RateWindow()
+
+INGEST_STAGE_SECONDS = REGISTRY.histogram(
+    "gasdock_ingest_stage_seconds",
+    "Time spent per certificate ingestion stage.",
+    ("stage",),
+)
+INGEST_FILES = REGISTRY.counter(
+    "gasdock_ingest_files_total",
+    "Certificates handled by the ingestion pipeline by outcome.",
+    ("outcome",),
+)
+INGEST_IN_PROGRESS = REGISTRY.gauge(
+    "gasdock_ingest_in_progress",
+    "Certificates currently inside process_file.",
+)
+INGEST_QUEUE_DEPTH = REGISTRY.gauge(
+    "gasdock_ingest_queue_depth",
+    "Filesystem events waiting in the watcher queue.",
+    callback=lambda: 0.0,
+)
+INGEST_SOURCE_BACKLOG = REGISTRY.gauge(
+    "gasdock_ingest_source_backlog",
+    "Certificates waiting for a worker per import source.",
+    ("source",),
+)
+INGEST_SOURCE_FILES = REGISTRY.counter(
+    "gasdock_ingest_source_files_total",
+    "Certificates finished per import source by outcome.",
+    ("source", "outcome"),
+)
+REGISTRY.gauge(
+    "gasdock_ingest_files_per_second",
+    "Certificates finished per second over the last minute.",
+    callback=INGEST_WINDOW.files_per_second,
+)
+REGISTRY.gauge(
+    "gasdock_ingest_quarantine_ratio",
+    "Share of certificates quarantined over the last minute.",
+    callback=INGEST_WINDOW.quarantine_ratio,
+)
+QUARANTINE_RETRIES = REGISTRY.counter(
+    "gasdock_quarantine_retries_total",
+    "Quarantined certificates retried by outcome.",
+    ("outcome",),
+)
+DB_COMMIT_SECONDS = REGISTRY.histogram(
+    "gasdock_db_commit_seconds",
+    "SQLite commit latency by database operation.",
+    ("operation",),
+)
+SORTER_BYTES = REGISTRY.counter(
+    "gasdock_sorter_bytes_total",
+    "Certificate bytes placed by the sorter by mode (same_volume rename or cross_volume copy).",
+    ("mode",),
+)
+SORTER_MOVE_SECONDS = REGISTRY.histogram(
+    "gasdock_sorter_move_seconds",
+    "Time to place one certificate by mode.",
+    ("mode",),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "gasdock_http_request_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+PARSE_WORKER_RSS_BYTES = REGISTRY.gauge(
+    "gasdock_parse_worker_rss_bytes",
+    "Resident memory of each parse worker process after its last file (0 while not running).",
+    ("worker",),
+)
+PARSE_WORKER_RECYCLES = REGISTRY.counter(
+    "gasdock_parse_worker_recycles_total",
+    "Parse worker processes replaced by reason (files, rss or crashed).",
+    ("reason",),
+)
@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
-from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -20,6 +20,7 @@ class TestRecord(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     serial: Mapped[str] = mapped_column(String(64), index=True)
     barcode: Mapped[str | None] = mapped_column(String(128), index=True, nullable=True)
+    organization: Mapped[str | None] = mapped_column(String(32), index=True, nullable=True)
     device_type: Mapped[str | None] = mapped_column(String(128), nullable=True)
     tested_at: Mapped[datetime] = mapped_column(DateTime, index=True)
     result: Mapped[str] = mapped_column(String(16), index=True)
@@ -28,6 +29,89 @@ class TestRecord(Base):
     parse_status: Mapped[str] = mapped_column(String(16), default="ok")
     parse_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     fail_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    browse_path: Mapped[str | None] = mapped_column(Text, nullable=True)
+    retry_attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_retry_at: Mapped[datetime | None] = mapped_column(DateTime, index=True, nullable=True)
+    # Set while a retrier (in any process) works on this quarantine row.
+    retry_lease_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class GasReading(Base):
+    """Span calibration result of one gas channel of a test."""
+
+    __tablename__ = "gas_readings"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    test_id: Mapped[int] = mapped_column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), index=True)
+    gas: Mapped[str] = mapped_column(String(16))
+    passed: Mapped[bool] = mapped_column(Boolean)
+    nominal: Mapped[float | None] = mapped_column(Float, nullable=True)
+    measured: Mapped[float | None] = mapped_column(Float, nullable=True)
+    unit: Mapped[str | None] = mapped_column(String(16), nullable=True)
+
+
+class AppSetting(Base):
+    """Small key/value store for persisted application state."""
+
+    __tablename__ = "app_settings"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(Text)
+
+
+class DataVersion(Base):
+    """Write counter per table, shared by all processes for cache invalidation."""
+
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailyRollup(Base):
+    """Tests per day, organization, device type and result; kept current by ``app.rollups``."""
+
+    __tablename__ = "daily_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    organization: Mapped[str] = mapped_column(String(32), primary_key=True)
+    device_type: Mapped[str] = mapped_column(String(128), primary_key=True)
+    result: Mapped[str] = mapped_column(String(16), primary_key=True)
+    tests: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailyGasRollup(Base):
+    """Span calibration outcomes per day, organization, device type and gas."""
+
+    __tablename__ = "daily_gas_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    organization: Mapped[str] = mapped_column(String(32), primary_key=True)
+    device_type: Mapped[str] = mapped_column(String(128), primary_key=True)
+    gas: Mapped[str] = mapped_column(String(16), primary_key=True)
+    passed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DeviceMonthlyRollup(Base):
+    """Tests per device, month and result for device page aggregates."""
+
+    __tablename__ = "device_monthly_rollups"
+
+    serial: Mapped[str] = mapped_column(String(64), primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    result: Mapped[str] = mapped_column(String(16), primary_key=True)
+    tests: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DeviceFailReasonRollup(Base):
+    """Failed tests per device and fail reason."""
+
+    __tablename__ = "device_fail_reasons"
+
+    serial: Mapped[str] = mapped_column(String(64), primary_key=True)
+    fail_reason: Mapped[str] = mapped_column(Text, primary_key=True)
+    tests: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class Device(Base):
@@ -41,8 +125,39 @@ class Device(Base):
     device_type: Mapped[str | None] = mapped_column(String(128), nullable=True)
     last_tested_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     last_result: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    next_due_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     last_updated: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 
+class IngestQueueItem(Base):
+    """Durable ingestion work item; see ``app.ingest_queue`` for the state machine."""
+
+    __tablename__ = "ingest_queue"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source: Mapped[str] = mapped_column(String(64))
+    path: Mapped[str] = mapped_column(Text)
+    state: Mapped[str] = mapped_column(String(16), default="pending")
+    destination: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    lease_owner: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+
 Index("ix_devices_last_result", Device.last_result)
 Index("ix_devices_last_tested_at", Device.last_tested_at)
+Index("ix_devices_next_due_at", Device.next_due_at)
+Index("ix_gas_readings_gas_passed", GasReading.gas, GasReading.passed)
+# Partial: settled rows, kept until the retention purge, stay out of claim() and recover().
+Index(
+    "ix_ingest_queue_active",
+    IngestQueueItem.source,
+    IngestQueueItem.id,
+    IngestQueueItem.lease_expires_at,
+    sqlite_where=IngestQueueItem.state.in_(("pending", "parsing", "moved")),
+)
+Index("ix_ingest_queue_path", IngestQueueItem.path)
+Index("ix_tests_serial_tested_at", TestRecord.serial, TestRecord.tested_at)
@@ -0,0 +1,59 @@
+"""Organization rules compiled once into a Python matcher and a SQL expression."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import ColumnElement, case, func, or_
+
+from app.config import AppConfig, OrganizationRule, default_organization_rules
+from app.utils import normalize_barcode
+
+UNKNOWN = "UNKNOWN"
+
+
+class OrganizationClassifier:
+    """Maps barcodes to organizations; ``classify`` and ``sql`` agree on normalized barcodes."""
+
+    def __init__(self, rules: Optional[Iterable[OrganizationRule]] = None, fallback: str = "OTHER"):
+        rules = list(default_organization_rules() if rules is None else rules)
+        self._rules = tuple(
+            (rule.name, tuple(prefix.upper() for prefix in rule.prefixes), rule.ignore_spaces) for rule in rules
+        )
+        self.fallback = fallback
+        self.names = tuple(dict.fromkeys([*(rule.name for rule in rules), fallback]))
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "OrganizationClassifier":
+        return cls(config.organization_rules, config.organization_fallback)
+
+    def classify(self, barcode: str | None) -> str | None:
+        """Return the organization of a barcode, or None without a barcode."""
+
+        normalized = normalize_barcode(barcode) if barcode else ""
+        if not normalized:
+            return None
+        compact = normalized.replace(" ", "")
+        for name, prefixes, ignore_spaces in self._rules:
+            if (compact if ignore_spaces else normalized).startswith(prefixes):
+                return name
+        return self.fallback
+
+    def sql(self, barcode: Any) -> ColumnElement:
+        """Return a CASE expression classifying a column of normalized barcodes."""
+
+        compact = func.replace(barcode, " ", "")
+        whens = [(or_(barcode.is_(None), barcode == ""), None)]
+        for name, prefixes, ignore_spaces in self._rules:
+            target = compact if ignore_spaces else barcode
+            whens.append((or_(*(func.substr(target, 1, len(prefix)) == prefix for prefix in prefixes)), name))
+        return case(*whens, else_=self.fallback)
+
+    def fingerprint(self) -> str:
+        """Stable text identifying the rules, stored to detect rule changes."""
+
+        return json.dumps({"rules": self._rules, "fallback": self.fallback}, separators=(",", ":"))
+
+
+DEFAULT_CLASSIFIER = OrganizationClassifier()
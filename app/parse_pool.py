@@ -0,0 +1,176 @@
+"""PDF text extraction in worker processes that are recycled before memory creeps."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from app.config import AppConfig
+from app.metrics import PARSE_WORKER_RECYCLES, PARSE_WORKER_RSS_BYTES
+
+LOGGER = logging.getLogger(__name__)
+
+
+def current_rss_bytes() -> int | None:
+    """Return this process's resident memory, or None where it cannot be read."""
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _extract_in_worker(path: str) -> tuple[str, int, int, int | None]:
+    from app.parser import extract_pdf_text
+
+    text, pages = extract_pdf_text(Path(path))
+    return text, pages, os.getpid(), current_rss_bytes()
+
+
+class _ParseWorker:
+    """One worker process, started on first use and replaced when it has done enough."""
+
+    def __init__(self, index: int, max_files: int, max_rss_bytes: int, context: multiprocessing.context.BaseContext):
+        self.index = index
+        self.max_files = max_files
+        self.max_rss_bytes = max_rss_bytes
+        self._context = context
+        self._executor: ProcessPoolExecutor | None = None
+        self.pid: int | None = None
+        self.files = 0
+        self.rss_bytes: int | None = None
+        self.recycled = 0
+
+    def extract(self, path: Path) -> tuple[str, int]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=self._context)
+        try:
+            text, pages, self.pid, self.rss_bytes = self._executor.submit(_extract_in_worker, str(path)).result()
+        except BrokenProcessPool:
+            self._recycle("crashed")
+            raise
+        except Exception:
+            # An unreadable PDF raised inside the worker; it still counts.
+            self._count_file()
+            raise
+        self._count_file()
+        return text, pages
+
+    def _count_file(self) -> None:
+        self.files += 1
+        PARSE_WORKER_RSS_BYTES.set(self.rss_bytes or 0, worker=str(self.index))
+        if self.files >= self.max_files:
+            self._recycle("files")
+        elif self.rss_bytes is not None and self.rss_bytes >= self.max_rss_bytes:
+            self._recycle("rss")
+
+    def _recycle(self, reason: str) -> None:
+        LOGGER.info(
+            "Recycling parse worker %s (pid %s, reason %s) after %s files at %.1f MB",
+            self.index,
+            self.pid,
+            reason,
+            self.files,
+            (self.rss_bytes or 0) / 2**20,
+        )
+        self.close()
+        self.files = 0
+        self.recycled += 1
+        PARSE_WORKER_RECYCLES.inc(reason=reason)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.pid = None
+        self.rss_bytes = None
+        PARSE_WORKER_RSS_BYTES.set(0, worker=str(self.index))
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "worker": self.index,
+            "pid": self.pid,
+            "files": self.files,
+            "rss_mb": round(self.rss_bytes / 2**20, 1) if self.rss_bytes is not None else None,
+            "recycled": self.recycled,
+        }
+
+
+class ParsePool:
+    """Runs pdfplumber in ``workers`` child processes instead of the service process.
+
+    pdfplumber's layout caches and heap fragmentation make a long-lived
+    parser grow; each child is replaced after ``max_files`` files or once its
+    resident memory passes ``max_rss_mb``, so a station can run for months
+    without creeping. Calls block until a worker is free.
+    """
+
+    def __init__(self, workers: int = 2, max_files: int = 500, max_rss_mb: float = 400.0):
+        # Spawn, not fork: the service forks from threads holding SQLite and watchdog state.
+        context = multiprocessing.get_context("spawn")
+        self._workers = [
+            _ParseWorker(index, max(1, max_files), int(max_rss_mb * 2**20), context) for index in range(max(1, workers))
+        ]
+        self._idle: queue.SimpleQueue[_ParseWorker] = queue.SimpleQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "ParsePool | None":
+        """Return a pool when ``parse_worker_processes`` is on, else None to parse in-process."""
+
+        if not config.parse_worker_processes:
+            return None
+        return cls(config.parse_workers, config.parse_worker_max_files, config.parse_worker_max_rss_mb)
+
+    def extract(self, path: Path) -> tuple[str, int]:
+        """Return the PDF's text and page count, read in a worker process."""
+
+        worker = self._idle.get()
+        try:
+            return worker.extract(path)
+        finally:
+            self._idle.put(worker)
+
+    def stats(self) -> list[dict[str, object]]:
+        """Return pid, files since start, last RSS and recycle count per worker."""
+
+        return [worker.stats() for worker in self._workers]
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.close()
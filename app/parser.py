@@ -3,30 +3,68 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
-import pdfplumber
+from app.profiling import annotate, stage_timer
 
 FILENAME_PATTERN = re.compile(
     r"^(?P<date>\d{8})_(?P<hour>\d{2})_(?P<minute>\d{2})_(?P<second>\d{2})_(?P<serial>[A-Za-z0-9]+?)_Calibration",
     re.IGNORECASE,
 )
-DEVICE_TYPE_PATTERN = re.compile(r"^\s*Device\s*type\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
-OVERALL_RESULT_PATTERN = re.compile(
-    r"Overall\s*result\s*[:\-]?\s*(?P<value>Passed|Failed)",
-    re.IGNORECASE,
-)
-BARCODE_PATTERN = re.compile(r"^\s*Barcode\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
-FAIL_REASON_PATTERN = re.compile(r"^\s*Fail\s*reason\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
 SERIAL_FALLBACK_PATTERN = re.compile(r"\b([A-Z0-9]{8})\b")
-SPAN_SECTION_PATTERN = re.compile(
-    r"Results\s+of\s+span\s+calibration(?P<section>.*?)(?:\n\s*Overall\s*result|\Z)",
-    re.IGNORECASE | re.DOTALL,
+# Field keywords, matched against the original text at line offsets found in
+# its case-folded copy (see _fold).
+DEVICE_TYPE_KEYWORD = re.compile(r"Device\s*type", re.IGNORECASE)
+BARCODE_KEYWORD = re.compile(r"Barcode", re.IGNORECASE)
+FAIL_REASON_KEYWORD = re.compile(r"Fail\s*reason", re.IGNORECASE)
+OVERALL_RESULT_KEYWORD = re.compile(r"Overall\s*result", re.IGNORECASE)
+SPAN_SECTION_KEYWORD = re.compile(r"Results\s+of\s+span\s+calibration", re.IGNORECASE)
+_LINE_FIELDS = (
+    ("device_type", "device", DEVICE_TYPE_KEYWORD),
+    ("barcode", "barcode", BARCODE_KEYWORD),
+    ("fail_reason", "fail", FAIL_REASON_KEYWORD),
 )
-SPAN_HEADER_PATTERN = re.compile(r"\b(?:ch4|o2|h2s|co)\b", re.IGNORECASE)
-FAILED_GAS_PATTERN = re.compile(r"\b(ch4|o2|h2s|co)\b[^\n]*?\bfailed\b", re.IGNORECASE)
+LINE_VALUE_PATTERN = re.compile(r"\s*[:\-]?\s*(?P<value>.+?)\s*$", re.MULTILINE)
+OVERALL_VALUE_PATTERN = re.compile(r"\s*[:\-]?\s*(?P<value>Passed|Failed)", re.IGNORECASE)
+# Span table tokens, matched against the case-folded section.
+SPAN_GAS_PATTERN = re.compile(r"\b(ch4|o2|h2s|co)\b")
+SPAN_STATUS_PATTERN = re.compile(r"\b(passed|failed)\b")
+SPAN_FAILED_GAS_PATTERN = re.compile(r"\b(ch4|o2|h2s|co)\b[^\n]*?\bfailed\b")
+# ASCII lowercasing plus the non-ASCII letters IGNORECASE equates with the
+# keyword letters; every mapping is one character, so offsets are kept.
+_FOLD_TABLE = str.maketrans(
+    {**{chr(code): chr(code + 32) for code in range(ord("A"), ord("Z") + 1)}, "\u0130": "i", "\u0131": "i", "\u017f": "s"}
+)
+# A value row's label runs to its first colon, else through "value(s)"; values
+# are read after it and must start a token, so "H2S" or "CO2" never yields one.
+SPAN_VALUE_LABEL_PATTERN = re.compile(r"(?P<label>nominal|measured)(?:[^:\n]*:|\s+values?\b)?")
+SPAN_VALUE_PATTERN = re.compile(r"(?<![^\s:])(-?\d+(?:[.,]\d+)?)\s*([^\d\s]\S*)?")
+
+
+@dataclass(slots=True)
+class SpanReading:
+    """One gas column of the span calibration results table."""
+
+    gas: str
+    passed: bool
+    nominal: float | None = None
+    measured: float | None = None
+    unit: str | None = None
+
+
+@dataclass(slots=True)
+class CertificateText:
+    """Fields found in the extracted certificate text."""
+
+    device_type: str | None = None
+    barcode: str | None = None
+    result: str | None = None
+    fail_reason: str | None = None
+    span_fail_reason: str | None = None
+    span_readings: list[SpanReading] = field(default_factory=list)
 
 
 @dataclass(slots=True)
@@ -39,6 +77,7 @@ class ParsedCertificate:
     barcode: str | None
     result: str
     fail_reason: str | None
+    gas_readings: list[SpanReading] = field(default_factory=list)
 
 
 class ParseError(RuntimeError):
@@ -60,80 +99,217 @@ def parse_filename(file_name: str) -> tuple[datetime, str]:
     return tested_at, serial
 
 
-def parse_pdf_text(file_path: Path) -> tuple[str | None, str | None, str | None, str | None, str]:
-    """Extract device type, barcode, result, fail reason and full text from the PDF."""
+def extract_pdf_text(file_path: Path) -> tuple[str, int]:
+    """Return the text of all pages joined by newlines, and the page count."""
+
+    import pdfplumber  # deferred: pulls in pdfminer and pypdfium2, slow to import at startup
 
     text_parts: list[str] = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text_parts.append(page_text)
-    full_text = "\n".join(text_parts)
-
-    device_match = DEVICE_TYPE_PATTERN.search(full_text)
-    device_type = device_match.group("value").strip() if device_match else None
+            text_parts.append(page.extract_text() or "")
+            # Free the page's layout objects now rather than when the document closes.
+            page.close()
+    return "\n".join(text_parts), len(text_parts)
+
+
+def parse_pdf_text(
+    file_path: Path, extract_text: Callable[[Path], tuple[str, int]] = extract_pdf_text
+) -> tuple[CertificateText, str]:
+    """Return the fields scanned from the PDF's text, and the full text."""
+
+    full_text, pages = extract_text(file_path)
+    annotate(pages=pages, text_chars=len(full_text))
+
+    return scan_certificate_text(full_text), full_text
+
+
+def scan_certificate_text(full_text: str) -> CertificateText:
+    """Extract all certificate fields and the span table in one pass over the lines.
+
+    Device type, barcode and fail reason are the first line starting with
+    their keyword and a value after it. The span section runs from its
+    heading to the next line starting with ``Overall result`` and is read
+    into the span table as its lines go by. The span table's failed gas,
+    when present, replaces the ``Fail reason`` line.
+    """
+
+    folded = _fold(full_text)
+    fields = CertificateText()
+    line_fields = list(_LINE_FIELDS)
+    prefixes = tuple(prefix for _, prefix, _ in line_fields)
+    span: _SpanSection | None = None
+    in_span = tail = False
+    start = 0
+    for line in folded.split("\n"):
+        end = start + len(line)
+        head = line.lstrip()
+        if not head:
+            start = end + 1
+            continue
+
+        if head.startswith(prefixes):
+            for entry in line_fields:
+                name, prefix, keyword = entry
+                if head.startswith(prefix):
+                    hit = keyword.match(full_text, end - len(head))
+                    value_match = hit and LINE_VALUE_PATTERN.match(full_text, hit.end())
+                    if value_match:
+                        setattr(fields, name, value_match.group("value").strip())
+                        line_fields.remove(entry)
+                        prefixes = tuple(prefix for _, prefix, _ in line_fields)
+                    break
+
+        if "overall" in line and (in_span or fields.result is None):
+            position = line.find("overall")
+            while position >= 0:
+                hit = OVERALL_RESULT_KEYWORD.match(full_text, start + position)
+                if hit:
+                    # The section ends at a newline followed only by whitespace and the keyword.
+                    if in_span and position == len(line) - len(head) and start > span.start:
+                        in_span = False
+                    if fields.result is None:
+                        value_match = OVERALL_VALUE_PATTERN.match(full_text, hit.end())
+                        if value_match:
+                            fields.result = "PASS" if value_match.group("value").upper() == "PASSED" else "FAIL"
+                position = line.find("overall", position + 1)
+
+        if span is None and "results" in line:
+            position = line.find("results")
+            while position >= 0:
+                hit = SPAN_SECTION_KEYWORD.match(full_text, start + position)
+                if hit:
+                    span = _SpanSection(hit.end())
+                    in_span = True
+                    break
+                position = line.find("results", position + 1)
+
+        if in_span and end > span.start:
+            section_start = start if start > span.start else span.start
+            span.feed(folded[section_start:end], full_text[section_start:end])
+        elif not tail and not in_span and span is not None and fields.result is not None:
+            # Only line fields are left: stop unless one of their keywords occurs further down.
+            tail = True
+            if not any(prefix in folded[end:] for prefix in prefixes):
+                break
+        start = end + 1
+
+    if span is not None:
+        fields.span_readings = span.readings
+        fields.span_fail_reason = span.fail_reason()
+    if fields.span_fail_reason:
+        fields.fail_reason = fields.span_fail_reason
+    return fields
+
+
+def _fold(text: str) -> str:
+    """Case-fold ``text`` for keyword search without changing character offsets."""
 
-    barcode_match = BARCODE_PATTERN.search(full_text)
-    barcode = barcode_match.group("value").strip() if barcode_match else None
-
-    result_match = OVERALL_RESULT_PATTERN.search(full_text)
-    result = result_match.group("value").upper() if result_match else None
-
-    fail_reason_match = FAIL_REASON_PATTERN.search(full_text)
-    fail_reason = fail_reason_match.group("value").strip() if fail_reason_match else None
-    span_fail_reason = _extract_span_calibration_fail_reason(full_text)
-    if span_fail_reason:
-        fail_reason = span_fail_reason
-    if result == "PASSED":
-        result = "PASS"
-    elif result == "FAILED":
-        result = "FAIL"
-
-    return device_type, barcode, result, fail_reason, full_text
-
-
-def _extract_span_calibration_fail_reason(full_text: str) -> str | None:
-    """Extract normalized fail reason from the span calibration results table."""
-
-    section_match = SPAN_SECTION_PATTERN.search(full_text)
-    if not section_match:
+    try:
+        # bytes.lower() only folds ASCII, and no other Latin-1 letter matches a keyword letter.
+        return text.encode("latin-1").lower().decode("latin-1")
+    except UnicodeEncodeError:
+        return text.translate(_FOLD_TABLE)
+
+
+class _SpanSection:
+    """Span calibration section, read line by line: gas header, ``Test result`` row, value rows."""
+
+    __slots__ = ("start", "readings", "header", "table_read", "has_gas", "has_test_result", "failed_gas")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.readings: list[SpanReading] = []
+        self.header: str | None = None
+        self.table_read = False
+        self.has_gas = False
+        self.has_test_result = False
+        self.failed_gas: str | None = None
+
+    def feed(self, folded: str, original: str) -> None:
+        """Read one newline-delimited line of the section, case-folded and original."""
+
+        if not self.has_gas and SPAN_GAS_PATTERN.search(folded):
+            self.has_gas = True
+        if self.failed_gas is None and "failed" in folded:
+            failed_gas_match = SPAN_FAILED_GAS_PATTERN.search(folded)
+            if failed_gas_match:
+                self.failed_gas = failed_gas_match.group(1).upper()
+
+        if self.table_read and not self.readings:
+            return
+        # PDF text may hold other line breaks (\r, \x0b, ...) inside a newline-delimited line.
+        for folded_row, row in zip(folded.splitlines(), original.splitlines()):
+            folded_row = folded_row.strip()
+            if not folded_row:
+                continue
+            if self.table_read:
+                _read_span_values(self.readings, folded_row, row.strip())
+                continue
+            if "test result" in folded_row:
+                # Matched in the original case, where e.g. "teſt" is no "test".
+                lowered = row.strip().lower()
+                self.has_test_result = self.has_test_result or "test result" in lowered
+                if lowered.startswith("test result"):
+                    self.table_read = True
+                    if self.header is not None:
+                        self.readings = _read_span_table(self.header, folded_row)
+                    continue
+            self.header = folded_row
+
+    def fail_reason(self) -> str | None:
+        """First failed gas of the table, else of a gas line mentioning ``failed``."""
+
+        for reading in self.readings:
+            if not reading.passed:
+                return f"Span calibration failed for {reading.gas}"
+        if self.has_gas and self.has_test_result and self.failed_gas:
+            return f"Span calibration failed for {self.failed_gas}"
         return None
 
-    section = section_match.group("section")
-    if not SPAN_HEADER_PATTERN.search(section) or "test result" not in section.lower():
-        return None
 
-    lines = [line.strip() for line in section.splitlines() if line.strip()]
-    lowered_lines = [line.lower() for line in lines]
+def _read_span_table(header: str, folded_row: str) -> list[SpanReading]:
+    """Pair the gases of the header line with the statuses of the ``Test result`` row."""
 
-    try:
-        test_result_index = next(i for i, line in enumerate(lowered_lines) if line.startswith("test result"))
-    except StopIteration:
-        test_result_index = -1
+    gases = SPAN_GAS_PATTERN.findall(header)
+    statuses = SPAN_STATUS_PATTERN.findall(folded_row)
+    if not gases or len(gases) != len(statuses):
+        return []
+    return [SpanReading(gas.upper(), status == "passed") for gas, status in zip(gases, statuses)]
 
-    if test_result_index > 0:
-        gas_tokens = re.findall(r"\b(ch4|o2|h2s|co)\b", lines[test_result_index - 1], re.IGNORECASE)
-        status_tokens = re.findall(r"\b(passed|failed)\b", lines[test_result_index], re.IGNORECASE)
-        if gas_tokens and len(gas_tokens) == len(status_tokens):
-            for gas, status in zip(gas_tokens, status_tokens):
-                if status.lower() == "failed":
-                    return f"Span calibration failed for {gas.upper()}"
 
-    failed_gas_match = FAILED_GAS_PATTERN.search(section)
-    if failed_gas_match:
-        gas = failed_gas_match.group(1).upper()
-        return f"Span calibration failed for {gas}"
+def _read_span_values(readings: list[SpanReading], folded_row: str, row: str) -> None:
+    """Fill nominal or measured values from the first such row under the ``Test result`` line."""
 
-    return None
+    label_match = SPAN_VALUE_LABEL_PATTERN.match(folded_row)
+    if not label_match:
+        return
+    attribute = label_match.group("label")
+    if getattr(readings[0], attribute) is not None:
+        return
+    values = SPAN_VALUE_PATTERN.findall(row, label_match.end())
+    if len(values) != len(readings):
+        return
+    for reading, (number, unit) in zip(readings, values):
+        setattr(reading, attribute, float(number.replace(",", ".")))
+        if unit and not reading.unit:
+            reading.unit = unit
 
 
-def parse_certificate(file_path: Path) -> ParsedCertificate:
-    """Parse certificate fields from filename and PDF content."""
+def parse_certificate(
+    file_path: Path, extract_text: Callable[[Path], tuple[str, int]] = extract_pdf_text
+) -> ParsedCertificate:
+    """Parse certificate fields from filename and PDF content.
+
+    ``extract_text`` reads the PDF; the watcher passes a :class:`~app.parse_pool.ParsePool`
+    so pdfplumber runs in recycled worker processes.
+    """
 
     tested_at, serial = parse_filename(file_path.name)
 
     try:
-        device_type, barcode, result, fail_reason, full_text = parse_pdf_text(file_path)
+        with stage_timer("pdf_text"):
+            fields, full_text = parse_pdf_text(file_path, extract_text)
     except Exception as exc:  # pdf library level exceptions
         raise ParseError(f"PDF parsing failed: {exc}") from exc
 
@@ -143,10 +319,29 @@ def parse_certificate(file_path: Path) -> ParsedCertificate:
             raise ParseError("Serial not found in filename or PDF")
         serial = serial_match.group(1)
 
+    device_type, barcode, result, fail_reason = fields.device_type, fields.barcode, fields.result, fields.fail_reason
     if result not in {"PASS", "FAIL"}:
         result = "UNKNOWN"
 
     if result != "FAIL":
         fail_reason = None
 
-    return ParsedCertificate(serial=serial, tested_at=tested_at, device_type=device_type, barcode=barcode, result=result, fail_reason=fail_reason)
+    annotate(
+        fields={
+            "serial": serial,
+            "tested_at": tested_at.isoformat(),
+            "device_type": device_type,
+            "barcode": barcode,
+            "result": result,
+            "fail_reason": fail_reason,
+        }
+    )
+    return ParsedCertificate(
+        serial=serial,
+        tested_at=tested_at,
+        device_type=device_type,
+        barcode=barcode,
+        result=result,
+        fail_reason=fail_reason,
+        gas_readings=fields.span_readings,
+    )
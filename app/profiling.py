@@ -0,0 +1,163 @@
+"""Opt-in ingestion tracing, slow-file profiling and slowest-file report."""
+
+from __future__ import annotations
+
+import cProfile
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.config import AppConfig
+
+LOGGER = logging.getLogger(__name__)
+
+_CURRENT_TRACE: ContextVar[dict[str, Any] | None] = ContextVar("gasdock_ingest_trace", default=None)
+
+
+def annotate(**fields: Any) -> None:
+    """Attach fields to the active ingestion trace; no-op when tracing is off."""
+
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+@contextmanager
+def stage_timer(name: str) -> Iterator[None]:
+    """Record a stage duration on the active trace, if any."""
+
+    trace = _CURRENT_TRACE.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.setdefault("stages", {})[name] = round(time.perf_counter() - started, 6)
+
+
+@dataclass(order=True, slots=True)
+class SlowFile:
+    """Entry in the rolling slowest-files report."""
+
+    seconds: float
+    file: str = field(compare=False)
+    finished_at: str = field(compare=False)
+    outcome: str = field(compare=False)
+    pages: int | None = field(compare=False, default=None)
+    size_bytes: int | None = field(compare=False, default=None)
+    profile_path: str | None = field(compare=False, default=None)
+
+
+class IngestProfiler:
+    """Writes JSON trace events per file and keeps cProfile dumps of slow files."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        trace_path: Path,
+        profiles_folder: Path,
+        slow_seconds: float = 5.0,
+        top_n: int = 20,
+    ):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.profiles_folder = profiles_folder
+        self.slow_seconds = slow_seconds
+        self.top_n = top_n
+        self._slowest: list[SlowFile] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "IngestProfiler":
+        return cls(
+            enabled=config.profiling_enabled,
+            trace_path=config.logs_folder / "ingest_trace.jsonl",
+            profiles_folder=config.logs_folder / "profiles",
+            slow_seconds=config.profiling_slow_seconds,
+            top_n=config.profiling_top_n,
+        )
+
+    @contextmanager
+    def trace_file(self, path: Path) -> Iterator[dict[str, Any] | None]:
+        """Trace and profile one ingestion; yields the mutable trace event."""
+
+        if not self.enabled:
+            yield None
+            return
+
+        trace: dict[str, Any] = {"event": "ingest", "file": str(path), "outcome": "unknown"}
+        try:
+            trace["size_bytes"] = path.stat().st_size
+        except OSError:
+            trace["size_bytes"] = None
+        token = _CURRENT_TRACE.set(trace)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is active on this interpreter
+            profiler = None
+        started = time.perf_counter()
+        try:
+            yield trace
+        except BaseException as exc:
+            trace["outcome"] = "error"
+            trace["error"] = repr(exc)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            _CURRENT_TRACE.reset(token)
+            trace["total_seconds"] = round(elapsed, 6)
+            trace["finished_at"] = datetime.now(timezone.utc).isoformat()
+            if profiler is not None and elapsed >= self.slow_seconds:
+                trace["profile_path"] = str(self._dump_profile(profiler, path))
+            self._record(trace)
+
+    def _dump_profile(self, profiler: cProfile.Profile, path: Path) -> Path:
+        self.profiles_folder.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        safe_stem = re.sub(r"[^A-Za-z0-9._-]+", "_", path.stem)
+        target = self.profiles_folder / f"{stamp}_{safe_stem}.prof"
+        profiler.dump_stats(str(target))
+        return target
+
+    def _record(self, trace: dict[str, Any]) -> None:
+        entry = SlowFile(
+            seconds=trace["total_seconds"],
+            file=trace["file"],
+            finished_at=trace["finished_at"],
+            outcome=trace["outcome"],
+            pages=trace.get("pages"),
+            size_bytes=trace.get("size_bytes"),
+            profile_path=trace.get("profile_path"),
+        )
+        line = json.dumps(trace, default=str, ensure_ascii=False)
+        with self._lock:
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and entry.seconds > self._slowest[0].seconds:
+                heapq.heapreplace(self._slowest, entry)
+            try:
+                self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.trace_path.open("a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+            except OSError:
+                LOGGER.exception("Could not write ingest trace event to %s", self.trace_path)
+
+    def slowest(self) -> list[SlowFile]:
+        """Return the slowest traced files, slowest first."""
+
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
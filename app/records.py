@@ -0,0 +1,92 @@
+"""Lightweight read-side records loaded from column selects instead of ORM entities."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Iterable, Sequence, TypeVar
+
+from sqlalchemy import Select, select
+
+from app.models import Device, TestRecord
+
+RecordT = TypeVar("RecordT")
+
+
+@dataclass(slots=True)
+class DeviceRow:
+    """Latest device snapshot as shown on the dashboard and device page."""
+
+    serial: str
+    barcode: str | None
+    organization: str | None
+    device_type: str | None
+    last_tested_at: datetime | None
+    last_result: str | None
+
+
+@dataclass(slots=True)
+class FailureRow:
+    """Recent failure summary for the dashboard."""
+
+    id: int
+    serial: str
+    barcode: str | None
+    device_type: str | None
+    fail_reason: str | None
+    tested_at: datetime
+    result: str
+
+
+@dataclass(slots=True)
+class TestRow:
+    """Full test row for device history, exports and print reports."""
+
+    __test__ = False  # keep pytest from collecting this as a test class
+
+    id: int
+    serial: str
+    barcode: str | None
+    device_type: str | None
+    tested_at: datetime
+    result: str
+    fail_reason: str | None
+    file_path: str
+    imported_at: datetime | None
+    parse_status: str | None
+    parse_error: str | None
+
+
+@dataclass(slots=True)
+class DueRow:
+    """Device with its calibration due date for the due list."""
+
+    serial: str
+    barcode: str | None
+    organization: str | None
+    device_type: str | None
+    last_tested_at: datetime | None
+    last_result: str | None
+    next_due_at: datetime | None
+
+
+RECORD_SOURCES: dict[type, Any] = {DeviceRow: Device, DueRow: Device, FailureRow: TestRecord, TestRow: TestRecord}
+
+
+def field_names(record_type: type) -> tuple[str, ...]:
+    """Return record field names in declaration order."""
+
+    return tuple(field.name for field in fields(record_type))
+
+
+def select_record(record_type: type) -> Select:
+    """Build a column select matching the record's fields."""
+
+    model = RECORD_SOURCES[record_type]
+    return select(*(getattr(model, name) for name in field_names(record_type)))
+
+
+def to_records(record_type: type[RecordT], rows: Iterable[Sequence[Any]]) -> list[RecordT]:
+    """Map result tuples positionally onto records."""
+
+    return [record_type(*row) for row in rows]
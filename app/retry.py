@@ -0,0 +1,165 @@
+"""Quarantine retries: exponential backoff for transient failures and bulk reprocessing."""
+
+from __future__ import annotations
+
+import errno
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from app.config import AppConfig
+from app.database import Database
+from app.metrics import QUARANTINE_RETRIES
+
+if TYPE_CHECKING:
+    from app.watcher import CertificateHandler
+
+LOGGER = logging.getLogger(__name__)
+
+# ERROR_SHARING_VIOLATION / ERROR_LOCK_VIOLATION: another process (the X-dock
+# export, a virus scanner, Explorer preview) still holds the file.
+_TRANSIENT_WINERRORS = {32, 33}
+_TRANSIENT_ERRNOS = {errno.EACCES, errno.EAGAIN, errno.EBUSY}
+# What pdfminer and pdfium report for a PDF whose copy has not finished.
+_TRUNCATED_PDF = re.compile(r"\beof\b|startxref|no /root object|data format error|truncated", re.IGNORECASE)
+
+RECOVERED = "recovered"
+RESCHEDULED = "rescheduled"
+FAILED = "failed"
+MISSING = "missing"
+OUTCOMES = (RECOVERED, RESCHEDULED, FAILED, MISSING)
+# How long a claimed retry may run before another worker may take the row over.
+RETRY_LEASE_SECONDS = 600
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Return True for failures a later attempt can get past: locks and half-copied PDFs."""
+
+    seen: set[int] = set()
+    current: BaseException | None = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, FileNotFoundError):
+            return False
+        if isinstance(current, PermissionError):
+            return True
+        if isinstance(current, OSError) and (
+            getattr(current, "winerror", None) in _TRANSIENT_WINERRORS or current.errno in _TRANSIENT_ERRNOS
+        ):
+            return True
+        if _TRUNCATED_PDF.search(str(current)):
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Backoff ``base_seconds * 2**attempt`` capped at ``max_seconds``, for transient errors only."""
+
+    max_attempts: int = 5
+    base_seconds: float = 30.0
+    max_seconds: float = 3600.0
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "RetryPolicy":
+        return cls(
+            max_attempts=config.quarantine_retry_max_attempts,
+            base_seconds=config.quarantine_retry_base_seconds,
+            max_seconds=config.quarantine_retry_max_seconds,
+        )
+
+    def delay(self, attempt: int) -> float:
+        return min(self.max_seconds, self.base_seconds * 2**attempt)
+
+    def next_attempt_at(self, exc: BaseException, attempt: int, now: datetime | None = None) -> datetime | None:
+        """Return when to retry after ``attempt`` failed retries, or None to give up."""
+
+        if attempt >= self.max_attempts or not is_transient(exc):
+            return None
+        return (now or datetime.now(timezone.utc)) + timedelta(seconds=self.delay(attempt))
+
+
+class QuarantineRetrier:
+    """Re-runs quarantined certificates, either when their backoff is due or in bulk.
+
+    A successful retry replaces the ``UNKNOWN`` error row with the parsed
+    record in one transaction. Each row is claimed in the database first, so
+    the background loop and a bulk reprocess, in this process or another,
+    never work on the same file.
+    """
+
+    def __init__(self, config: AppConfig, database: Database, handler: "CertificateHandler"):
+        self.database = database
+        self.handler = handler
+        self.policy = handler.retry_policy
+        self.workers = max(1, config.quarantine_retry_workers)
+        self.poll_seconds = config.quarantine_retry_poll_seconds
+        self.batch_size = max(1, config.quarantine_retry_batch_size)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="gasdock-quarantine-retry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_due(self, now: datetime | None = None) -> dict[str, int]:
+        """Retry quarantined files whose backoff has elapsed."""
+
+        now = now or datetime.now(timezone.utc)
+        return self._run(self.database.due_retries(now, limit=self.batch_size), now)
+
+    def reprocess_all(self, test_ids: Optional[Iterable[int]] = None) -> dict[str, int]:
+        """Reprocess every quarantined file (or the given error rows) in parallel."""
+
+        return self._run(self.database.quarantined_records(test_ids))
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.run_due()
+            except Exception:
+                LOGGER.exception("Quarantine retry pass failed")
+
+    def _run(self, rows: list[tuple[int, str, int]], now: datetime | None = None) -> dict[str, int]:
+        counts = dict.fromkeys(OUTCOMES, 0)
+        if not rows:
+            return counts
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(rows)), thread_name_prefix="gasdock-retry") as pool:
+            for outcome in pool.map(lambda row: self._retry(row, now), rows):
+                if outcome is not None:
+                    counts[outcome] += 1
+        return counts
+
+    def _retry(self, row: tuple[int, str, int], now: datetime | None) -> str | None:
+        test_id, file_path, attempts = row
+        claimed_at = datetime.now(timezone.utc)
+        lease_until = claimed_at + timedelta(seconds=RETRY_LEASE_SECONDS)
+        if not self.database.claim_retry(test_id, attempts, lease_until, claimed_at):
+            return None
+        path = Path(file_path)
+        if not path.exists():
+            self.database.schedule_retry(test_id, attempts + 1, None, f"Quarantined file missing: {path}")
+            outcome = MISSING
+        else:
+            try:
+                self.handler.reprocess_quarantined(test_id, path)
+                outcome = RECOVERED
+            except Exception as exc:
+                next_at = self.policy.next_attempt_at(exc, attempts + 1, now)
+                self.database.schedule_retry(test_id, attempts + 1, next_at, str(exc))
+                outcome = RESCHEDULED if next_at is not None else FAILED
+                LOGGER.warning("Retry %s of %s failed (%s): %s", attempts + 1, path, outcome, exc)
+        QUARANTINE_RETRIES.inc(outcome=outcome)
+        return outcome
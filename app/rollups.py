@@ -0,0 +1,283 @@
+"""Incrementally maintained rollups of tests and gas readings.
+
+Every write to ``tests`` adjusts ``daily_rollups`` (and ``daily_gas_rollups``
+for its span readings) and the per-device ``device_monthly_rollups`` and
+``device_fail_reasons`` in the same transaction, so trend queries and device
+pages read a few rows instead of scanning years of tests.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import ColumnElement, Select, case, delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import (
+    DailyGasRollup,
+    DailyRollup,
+    DeviceFailReasonRollup,
+    DeviceMonthlyRollup,
+    GasReading,
+    TestRecord,
+)
+
+UNKNOWN_ORGANIZATION = "UNKNOWN"
+BUCKETS = ("day", "week", "month")
+# Rows per multi-row upsert; keeps rebuilds under SQLite's bound-parameter limit.
+_UPSERT_CHUNK = 500
+
+RollupKey = tuple[date, str, str]
+
+
+def rollup_key(tested_at: datetime | date | str, organization: str | None, device_type: str | None) -> RollupKey:
+    """Return (day, organization, device_type) with NULLs mapped to primary-key safe values."""
+
+    if isinstance(tested_at, str):
+        day = date.fromisoformat(tested_at[:10])
+    elif isinstance(tested_at, datetime):
+        day = tested_at.date()
+    else:
+        day = tested_at
+    return day, organization or UNKNOWN_ORGANIZATION, device_type or ""
+
+
+def add_test(
+    session: Session,
+    serial: str,
+    tested_at: datetime,
+    organization: str | None,
+    device_type: str | None,
+    result: str,
+    fail_reason: str | None = None,
+    readings: Iterable[tuple[str, bool]] = (),
+    delta: int = 1,
+) -> None:
+    """Count one test (``delta=-1`` to uncount it) and its (gas, passed) readings."""
+
+    key = rollup_key(tested_at, organization, device_type)
+    _upsert_tests(session, Counter({(*key, result): delta}))
+    gases: Counter = Counter()
+    for gas, passed in readings:
+        gases[(*key, gas, passed)] += delta
+    _upsert_gases(session, gases)
+    _upsert_device(
+        session,
+        Counter({(serial, key[0].replace(day=1), result): delta}),
+        Counter({(serial, fail_reason): delta}) if result == "FAIL" and fail_reason else Counter(),
+    )
+
+
+def remove_tests(session: Session, condition: ColumnElement[bool]) -> None:
+    """Uncount the tests matching ``condition``; call before deleting them."""
+
+    _apply(session, condition, -1)
+
+
+def add_tests(session: Session, condition: ColumnElement[bool]) -> None:
+    """Count the stored tests matching ``condition``, e.g. after ``remove_tests`` and an update."""
+
+    _apply(session, condition, 1)
+
+
+def rebuild(session: Session) -> None:
+    """Recompute all rollups from ``tests`` and ``gas_readings``."""
+
+    for model in (DailyRollup, DailyGasRollup, DeviceMonthlyRollup, DeviceFailReasonRollup):
+        session.execute(delete(model))
+    _apply(session, None, 1)
+
+
+def _apply(session: Session, condition: ColumnElement[bool] | None, sign: int) -> None:
+    day = func.date(TestRecord.tested_at)
+    fail_reason = case((TestRecord.result == "FAIL", TestRecord.fail_reason))
+    tests_query = select(
+        day, TestRecord.serial, TestRecord.organization, TestRecord.device_type, TestRecord.result, fail_reason, func.count()
+    ).group_by(day, TestRecord.serial, TestRecord.organization, TestRecord.device_type, TestRecord.result, fail_reason)
+    gases_query = (
+        select(day, TestRecord.organization, TestRecord.device_type, GasReading.gas, GasReading.passed, func.count())
+        .join(GasReading, GasReading.test_id == TestRecord.id)
+        .group_by(day, TestRecord.organization, TestRecord.device_type, GasReading.gas, GasReading.passed)
+    )
+    if condition is not None:
+        tests_query = tests_query.where(condition)
+        gases_query = gases_query.where(condition)
+
+    tests: Counter = Counter()
+    months: Counter = Counter()
+    reasons: Counter = Counter()
+    for tested_day, serial, organization, device_type, result, reason, count in session.execute(tests_query):
+        key = rollup_key(tested_day, organization, device_type)
+        tests[(*key, result)] += sign * count
+        months[(serial, key[0].replace(day=1), result)] += sign * count
+        if reason:
+            reasons[(serial, reason)] += sign * count
+    gases: Counter = Counter()
+    for tested_day, organization, device_type, gas, passed, count in session.execute(gases_query):
+        gases[(*rollup_key(tested_day, organization, device_type), gas, bool(passed))] += sign * count
+    _upsert_tests(session, tests)
+    _upsert_gases(session, gases)
+    _upsert_device(session, months, reasons)
+    if sign < 0:
+        # Per-device rows are read directly by the device page; drop emptied ones.
+        serials = {serial for serial, _, _ in months}
+        for model in (DeviceMonthlyRollup, DeviceFailReasonRollup):
+            session.execute(delete(model).where(model.serial.in_(serials), model.tests <= 0))
+
+
+def _upsert_device(session: Session, months: Counter, reasons: Counter) -> None:
+    _upsert(
+        session,
+        DeviceMonthlyRollup,
+        [{"serial": serial, "month": month, "result": result, "tests": count} for (serial, month, result), count in months.items() if count],
+        [DeviceMonthlyRollup.serial, DeviceMonthlyRollup.month, DeviceMonthlyRollup.result],
+    )
+    _upsert(
+        session,
+        DeviceFailReasonRollup,
+        [{"serial": serial, "fail_reason": reason, "tests": count} for (serial, reason), count in reasons.items() if count],
+        [DeviceFailReasonRollup.serial, DeviceFailReasonRollup.fail_reason],
+    )
+
+
+def _upsert(session: Session, model: Any, rows: list[dict], keys: list[Any]) -> None:
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        statement = insert(model).values(rows[start : start + _UPSERT_CHUNK])
+        session.execute(statement.on_conflict_do_update(index_elements=keys, set_={"tests": model.tests + statement.excluded.tests}))
+
+
+def _upsert_tests(session: Session, counts: Counter) -> None:
+    rows = [
+        {"day": day, "organization": organization, "device_type": device_type, "result": result, "tests": count}
+        for (day, organization, device_type, result), count in counts.items()
+        if count
+    ]
+    _upsert(session, DailyRollup, rows, [DailyRollup.day, DailyRollup.organization, DailyRollup.device_type, DailyRollup.result])
+
+
+def _upsert_gases(session: Session, counts: Counter) -> None:
+    merged: dict[tuple, list[int]] = {}
+    for (day, organization, device_type, gas, passed), count in counts.items():
+        totals = merged.setdefault((day, organization, device_type, gas), [0, 0])
+        totals[0 if passed else 1] += count
+    rows = [
+        {"day": day, "organization": organization, "device_type": device_type, "gas": gas, "passed": passed, "failed": failed}
+        for (day, organization, device_type, gas), (passed, failed) in merged.items()
+        if passed or failed
+    ]
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        statement = insert(DailyGasRollup).values(rows[start : start + _UPSERT_CHUNK])
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[DailyGasRollup.day, DailyGasRollup.organization, DailyGasRollup.device_type, DailyGasRollup.gas],
+                set_={
+                    "passed": DailyGasRollup.passed + statement.excluded.passed,
+                    "failed": DailyGasRollup.failed + statement.excluded.failed,
+                },
+            )
+        )
+
+
+def _period(column: Any, bucket: str) -> Any:
+    if bucket == "week":
+        # Monday of the ISO week.
+        return func.date(column, "weekday 0", "-6 days")
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", column)
+    return func.date(column)
+
+
+def _filtered(query: Select, model: Any, date_from: date | None, date_to: date | None, organization: str | None, device_type: str | None) -> Select:
+    if date_from is not None:
+        query = query.where(model.day >= date_from)
+    if date_to is not None:
+        query = query.where(model.day <= date_to)
+    if organization:
+        query = query.where(model.organization == organization)
+    if device_type is not None:
+        query = query.where(model.device_type == device_type)
+    return query
+
+
+def trend_query(
+    bucket: str = "day",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    organization: str | None = None,
+    device_type: str | None = None,
+) -> Select:
+    """Select (period, tests, failures) per bucket."""
+
+    period = _period(DailyRollup.day, bucket).label("period")
+    failures = func.sum(DailyRollup.tests).filter(DailyRollup.result == "FAIL")
+    query = select(period, func.sum(DailyRollup.tests), func.coalesce(failures, 0)).group_by(period).order_by(period)
+    return _filtered(query, DailyRollup, date_from, date_to, organization, device_type)
+
+
+def gas_trend_query(
+    bucket: str = "day",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    organization: str | None = None,
+    device_type: str | None = None,
+) -> Select:
+    """Select (period, gas, readings, failures) per bucket and gas."""
+
+    period = _period(DailyGasRollup.day, bucket).label("period")
+    query = (
+        select(
+            period,
+            DailyGasRollup.gas,
+            func.sum(DailyGasRollup.passed + DailyGasRollup.failed),
+            func.sum(DailyGasRollup.failed),
+        )
+        .group_by(period, DailyGasRollup.gas)
+        .order_by(period, DailyGasRollup.gas)
+    )
+    return _filtered(query, DailyGasRollup, date_from, date_to, organization, device_type)
+
+
+def device_months_query(serial: str) -> Select:
+    """Select (month, tests, passed, failed) for one device, oldest first."""
+
+    return (
+        select(
+            DeviceMonthlyRollup.month,
+            func.sum(DeviceMonthlyRollup.tests),
+            func.coalesce(func.sum(DeviceMonthlyRollup.tests).filter(DeviceMonthlyRollup.result == "PASS"), 0),
+            func.coalesce(func.sum(DeviceMonthlyRollup.tests).filter(DeviceMonthlyRollup.result == "FAIL"), 0),
+        )
+        .where(DeviceMonthlyRollup.serial == serial)
+        .group_by(DeviceMonthlyRollup.month)
+        .order_by(DeviceMonthlyRollup.month)
+    )
+
+
+def top_fail_reason_query(serial: str) -> Select:
+    """Select the device's most frequent (fail_reason, tests)."""
+
+    return (
+        select(DeviceFailReasonRollup.fail_reason, DeviceFailReasonRollup.tests)
+        .where(DeviceFailReasonRollup.serial == serial, DeviceFailReasonRollup.tests > 0)
+        .order_by(DeviceFailReasonRollup.tests.desc(), DeviceFailReasonRollup.fail_reason)
+        .limit(1)
+    )
+
+
+def window_start(days: int, today: date | None = None) -> date:
+    """Return the first day of the ``days`` calendar days ending today, inclusive."""
+
+    return (today or date.today()) - timedelta(days=days - 1)
+
+
+def failures_since_query(since: date) -> Select:
+    return select(func.coalesce(func.sum(DailyRollup.tests), 0)).where(
+        DailyRollup.result == "FAIL", DailyRollup.day >= since
+    )
+
+
+def ratio(part: int, total: int) -> float:
+    return round(part / total, 4) if total else 0.0
@@ -0,0 +1,245 @@
+"""Fair scheduling of certificates from several import sources onto one worker pool."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from app.config import ImportSource
+from app.ingest_queue import IngestQueue
+from app.metrics import INGEST_SOURCE_BACKLOG, INGEST_SOURCE_FILES, RateWindow
+
+LOGGER = logging.getLogger(__name__)
+
+# Backoff after a failed queue claim (e.g. SQLite busy past its timeout).
+CLAIM_RETRY_SECONDS = 1.0
+CLAIM_RETRY_MAX_SECONDS = 30.0
+
+
+@dataclass(slots=True)
+class SourceLane:
+    """Pending files and counters for one import source."""
+
+    source: ImportSource
+    pending: deque[Any] = field(default_factory=deque)
+    # Items waiting in the durable queue that this lane has not claimed yet.
+    queued: int = 0
+    in_flight: int = 0
+    # A worker is leasing a batch for this lane outside the scheduler lock.
+    claiming: bool = False
+    processed: int = 0
+    failed: int = 0
+    # Stride scheduling: each dispatch advances the pass by 1 / priority, and
+    # the runnable lane with the lowest pass goes next.
+    pass_value: float = 0.0
+    window: RateWindow = field(default_factory=RateWindow)
+
+    @property
+    def backlog(self) -> int:
+        return len(self.pending) + self.queued
+
+    @property
+    def runnable(self) -> bool:
+        if self.claiming and not self.pending:
+            return False
+        return self.backlog > 0 and self.in_flight < max(1, self.source.concurrency)
+
+
+class IngestScheduler:
+    """Weighted fair queue feeding a shared pool of ingestion workers.
+
+    Each source gets at most ``concurrency`` files in flight; among sources
+    with spare capacity, dispatch share is proportional to ``priority``, so a
+    chatty station cannot starve the others.
+
+    With an :class:`IngestQueue` submitted files are persisted first and
+    lanes lease them back in batches of ``batch_size``; ``process`` then
+    receives :class:`~app.ingest_queue.QueueItem` objects instead of paths.
+    """
+
+    def __init__(
+        self,
+        sources: list[ImportSource],
+        process: Callable[[Any], bool],
+        workers: int = 2,
+        queue: IngestQueue | None = None,
+        batch_size: int = 16,
+    ):
+        self._lanes = {source.name: SourceLane(source) for source in sources}
+        self._process = process
+        self._queue = queue
+        self._batch_size = max(1, batch_size)
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._retry_timers: set[threading.Timer] = set()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"gasdock-ingest-{index}", daemon=True)
+            for index in range(max(1, workers))
+        ]
+        for name in self._lanes:
+            INGEST_SOURCE_BACKLOG.set(0, source=name)
+
+    def start(self) -> None:
+        if self._queue is not None:
+            recovered = self._queue.recover()
+            LOGGER.info("Ingest queue recovered: %s", recovered)
+            with self._condition:
+                for name, lane in self._lanes.items():
+                    lane.queued = self._queue.active_count(name)
+                    INGEST_SOURCE_BACKLOG.set(lane.backlog, source=name)
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            for timer in self._retry_timers:
+                timer.cancel()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout=timeout)
+
+    def submit(self, source_name: str, path: Path) -> None:
+        """Queue a file discovered in the named source."""
+
+        if self._queue is not None:
+            self._queue.enqueue(source_name, path)
+        with self._condition:
+            lane = self._lanes[source_name]
+            if lane.backlog == 0 and lane.in_flight == 0:
+                # An idle lane rejoins at the current minimum so it neither
+                # jumps ahead with stale credit nor waits behind busy lanes.
+                lane.pass_value = max(lane.pass_value, self._min_pass(exclude=lane))
+            if self._queue is not None:
+                lane.queued += 1
+            else:
+                lane.pending.append(path)
+            INGEST_SOURCE_BACKLOG.set(lane.backlog, source=source_name)
+            self._condition.notify()
+
+    def backlog(self) -> int:
+        with self._condition:
+            return sum(lane.backlog for lane in self._lanes.values())
+
+    def stats(self) -> list[dict[str, object]]:
+        """Return per-source throughput and backlog."""
+
+        with self._condition:
+            return [
+                {
+                    "source": name,
+                    "folder": str(lane.source.folder),
+                    "priority": lane.source.priority,
+                    "concurrency": lane.source.concurrency,
+                    "pending": lane.backlog,
+                    "in_flight": lane.in_flight,
+                    "processed": lane.processed,
+                    "failed": lane.failed,
+                    "files_per_second": round(lane.window.files_per_second(), 3),
+                }
+                for name, lane in self._lanes.items()
+            ]
+
+    def _min_pass(self, exclude: SourceLane | None = None) -> float:
+        active = [lane.pass_value for lane in self._lanes.values() if lane is not exclude and (lane.backlog or lane.in_flight)]
+        return min(active, default=0.0)
+
+    def _next_lane(self) -> SourceLane | None:
+        runnable = [lane for lane in self._lanes.values() if lane.runnable]
+        if not runnable:
+            return None
+        return min(runnable, key=lambda lane: (lane.pass_value, -lane.source.priority))
+
+    def _claim(self, lane: SourceLane, retry_seconds: float) -> float:
+        """Lease a batch for ``lane`` without holding the lock; return the next retry delay."""
+
+        try:
+            batch = self._queue.claim(lane.source.name, self._batch_size)
+        except Exception:
+            LOGGER.exception("Claiming ingest queue items for %s failed; retrying in %.0fs", lane.source.name, retry_seconds)
+            # The lane stays marked as claiming during the backoff so other
+            # workers serve other lanes instead of hammering the same lock.
+            deadline = time.monotonic() + retry_seconds
+            with self._condition:
+                while not self._stopping and (remaining := deadline - time.monotonic()) > 0:
+                    self._condition.wait(remaining)
+                lane.claiming = False
+                self._condition.notify_all()
+            return min(retry_seconds * 2, CLAIM_RETRY_MAX_SECONDS)
+        with self._condition:
+            lane.claiming = False
+            # An empty claim means the estimate was stale (duplicates or items
+            # leased elsewhere); resync instead of spinning.
+            lane.queued = max(0, lane.queued - len(batch)) if batch else 0
+            lane.pending.extend(batch)
+            INGEST_SOURCE_BACKLOG.set(lane.backlog, source=lane.source.name)
+            self._condition.notify_all()
+        return CLAIM_RETRY_SECONDS
+
+    def _retry_later(self, lane: SourceLane, delay: float) -> None:
+        """Count a released queue item back into its lane once its backoff ends."""
+
+        def requeue() -> None:
+            with self._condition:
+                self._retry_timers.discard(timer)
+                lane.queued += 1
+                INGEST_SOURCE_BACKLOG.set(lane.backlog, source=lane.source.name)
+                self._condition.notify()
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        with self._condition:
+            if self._stopping:
+                return
+            self._retry_timers.add(timer)
+        timer.start()
+
+    def _work(self) -> None:
+        retry_seconds = CLAIM_RETRY_SECONDS
+        while True:
+            with self._condition:
+                lane = self._next_lane()
+                while lane is None and not self._stopping:
+                    self._condition.wait()
+                    lane = self._next_lane()
+                if self._stopping:
+                    return
+                claim = not lane.pending
+                if claim:
+                    lane.claiming = True
+                else:
+                    work = lane.pending.popleft()
+                    lane.in_flight += 1
+                    lane.pass_value += 1.0 / max(1, lane.source.priority)
+                    INGEST_SOURCE_BACKLOG.set(lane.backlog, source=lane.source.name)
+            if claim:
+                # claim() is a SQLite write that may wait on busy_timeout, so it
+                # runs unlocked: submit() and the other workers keep going.
+                retry_seconds = self._claim(lane, retry_seconds)
+                continue
+
+            ok = False
+            try:
+                ok = self._process(work)
+            except Exception:
+                LOGGER.exception("Unhandled error processing %s from %s", work, lane.source.name)
+            finally:
+                with self._condition:
+                    lane.in_flight -= 1
+                    if ok:
+                        lane.processed += 1
+                    else:
+                        lane.failed += 1
+                    lane.window.record(quarantined=not ok)
+                    # A slot on this lane freed up; wake a worker that may be waiting on it.
+                    self._condition.notify()
+                INGEST_SOURCE_FILES.inc(source=lane.source.name, outcome="processed" if ok else "failed")
+                retry_after = getattr(work, "retry_after", None)
+                if retry_after is not None:
+                    self._retry_later(lane, retry_after)
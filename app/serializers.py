@@ -0,0 +1,46 @@
+"""Fast JSON encoding and negotiated compression for API payloads."""
+
+from __future__ import annotations
+
+import gzip
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode payload with orjson.
+
+    Slotted record dataclasses are encoded natively and datetimes become
+    ISO 8601 strings identical to ``isoformat``.
+    """
+
+    return orjson.dumps(payload)
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Return True when the client accepts gzip with a non-zero quality."""
+
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in {"gzip", "*"}:
+            continue
+        quality = params.strip().removeprefix("q=")
+        try:
+            return not params or float(quality) > 0
+        except ValueError:
+            return True
+    return False
+
+
+def json_response(request: Request, payload: Any, min_compress_bytes: int, compress_level: int = 5) -> Response:
+    """Encode payload and gzip it when the client allows and it is large enough."""
+
+    body = encode_json(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if min_compress_bytes >= 0 and len(body) >= min_compress_bytes and accepts_gzip(request):
+        body = gzip.compress(body, compresslevel=compress_level)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -2,25 +2,258 @@
 
 from __future__ import annotations
 
+import errno
+import logging
+import os
 import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+from app.config import AppConfig
+from app.metrics import SORTER_BYTES, SORTER_MOVE_SECONDS
 
-def move_sorted(source: Path, sorted_root: Path, result: str, tested_path_parts: tuple[str, str, str], serial: str) -> Path:
-    """Move file to structured sorted destination."""
+LOGGER = logging.getLogger(__name__)
+
+# errno.EXDEV on POSIX; ERROR_NOT_SAME_DEVICE (17) on Windows.
+_CROSS_DEVICE_ERRORS = {errno.EXDEV}
+_WINDOWS_NOT_SAME_DEVICE = 17
+
+
+class PlacementEngine:
+    """Moves certificates into place with cached directories and volume-aware I/O.
+
+    Same-volume moves are a single atomic ``os.replace``. Cross-volume moves
+    copy through a buffer into a temporary file that is renamed into place;
+    the copy is fsynced before the source is deleted. With ``fsync_batch`` > 1
+    fsyncs (and the matching source deletions) are grouped, trading a few
+    seconds of duplicate files after a crash for far fewer disk flushes; a
+    timer flushes a partial batch once its oldest copy is
+    ``fsync_max_delay_seconds`` old.
+    All moves run on a small I/O pool so parse workers cannot oversubscribe
+    the disks.
+    """
+
+    def __init__(
+        self,
+        io_workers: int = 2,
+        fsync_batch: int = 1,
+        fsync_max_delay_seconds: float = 2.0,
+        buffer_bytes: int = 1024 * 1024,
+    ):
+        self.fsync_batch = max(1, fsync_batch)
+        self.fsync_max_delay_seconds = fsync_max_delay_seconds
+        self.buffer_bytes = buffer_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max(1, io_workers), thread_name_prefix="gasdock-io")
+        self._lock = threading.Lock()
+        self._directories: dict[Path, int] = {}
+        self._pending: list[tuple[Path, Path]] = []
+        self._flush_timer: threading.Timer | None = None
+        self._stats = {"same_volume": [0, 0, 0.0], "cross_volume": [0, 0, 0.0]}
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "PlacementEngine":
+        return cls(
+            io_workers=config.placement_io_workers,
+            fsync_batch=config.placement_fsync_batch,
+            fsync_max_delay_seconds=config.placement_fsync_max_delay_seconds,
+            buffer_bytes=config.placement_buffer_kb * 1024,
+        )
+
+    def submit(self, source: Path, target: Path) -> Future[Path]:
+        """Schedule a move on the I/O pool."""
+
+        return self._executor.submit(self._move, source, target)
+
+    def move(self, source: Path, target: Path) -> Path:
+        """Move source to target and return target once it is in place."""
+
+        return self.submit(source, target).result()
+
+    def flush(self) -> None:
+        """Fsync batched copies, then delete their sources.
+
+        Entries are handled one by one: a copy that cannot be made durable
+        keeps its source, so a failure never costs more than a duplicate.
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        durable: list[tuple[Path, Path]] = []
+        for target, source in pending:
+            try:
+                with target.open("rb+") as handle:
+                    os.fsync(handle.fileno())
+            except OSError:
+                LOGGER.exception("Could not fsync %s; keeping its source %s", target, source)
+            else:
+                durable.append((target, source))
+        synced_directories: set[Path] = set()
+        for directory in {target.parent for target, _ in durable}:
+            try:
+                _fsync_directory(directory)
+            except OSError:
+                LOGGER.exception("Could not fsync directory %s; keeping the sources of its copies", directory)
+            else:
+                synced_directories.add(directory)
+        for target, source in durable:
+            if target.parent not in synced_directories:
+                continue
+            try:
+                source.unlink(missing_ok=True)
+            except OSError:
+                LOGGER.exception("Could not delete %s after copying it to %s", source, target)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.flush()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return files, bytes and MB/s per placement mode."""
+
+        with self._lock:
+            snapshot = {mode: list(values) for mode, values in self._stats.items()}
+            pending = len(self._pending)
+        report: dict[str, dict[str, float]] = {}
+        for mode, (files, size, seconds) in snapshot.items():
+            report[mode] = {
+                "files": files,
+                "bytes": size,
+                "seconds": round(seconds, 3),
+                "mb_per_second": round(size / 2**20 / seconds, 2) if seconds > 0 else 0.0,
+            }
+        report["pending_fsync"] = {"files": pending}
+        return report
+
+    def _ensure_directory(self, directory: Path) -> int:
+        device = self._directories.get(directory)
+        if device is None:
+            directory.mkdir(parents=True, exist_ok=True)
+            device = directory.stat().st_dev
+            with self._lock:
+                self._directories[directory] = device
+        return device
+
+    def _move(self, source: Path, target: Path) -> Path:
+        started = time.perf_counter()
+        source_stat = source.stat()
+        target_device = self._ensure_directory(target.parent)
+        mode = "same_volume"
+        if source_stat.st_dev == target_device:
+            try:
+                self._replace(source, target)
+            except OSError as exc:
+                if not _is_cross_device(exc):
+                    raise
+                mode = "cross_volume"
+        else:
+            mode = "cross_volume"
+        if mode == "cross_volume":
+            self._copy(source, target)
+
+        elapsed = time.perf_counter() - started
+        SORTER_BYTES.inc(source_stat.st_size, mode=mode)
+        SORTER_MOVE_SECONDS.observe(elapsed, mode=mode)
+        with self._lock:
+            values = self._stats[mode]
+            values[0] += 1
+            values[1] += source_stat.st_size
+            values[2] += elapsed
+        return target
+
+    def _replace(self, source: Path, target: Path) -> None:
+        try:
+            os.replace(source, target)
+        except FileNotFoundError:
+            if not source.exists():
+                raise
+            # The cached directory was removed behind our back; recreate it once.
+            with self._lock:
+                self._directories.pop(target.parent, None)
+            self._ensure_directory(target.parent)
+            os.replace(source, target)
+
+    def _copy(self, source: Path, target: Path) -> None:
+        temp_target = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            with source.open("rb") as reader, temp_target.open("wb") as writer:
+                shutil.copyfileobj(reader, writer, self.buffer_bytes)
+                if self.fsync_batch == 1:
+                    writer.flush()
+                    os.fsync(writer.fileno())
+            shutil.copystat(source, temp_target)
+            os.replace(temp_target, target)
+        except BaseException:
+            temp_target.unlink(missing_ok=True)
+            raise
+
+        if self.fsync_batch == 1:
+            _fsync_directory(target.parent)
+            source.unlink()
+            return
+        with self._lock:
+            self._pending.append((target, source))
+            due = len(self._pending) >= self.fsync_batch
+            if not due and self._flush_timer is None:
+                # Bound how long a partial batch waits when no more copies arrive.
+                self._flush_timer = threading.Timer(self.fsync_max_delay_seconds, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if due:
+            self.flush()
+
+
+def _is_cross_device(exc: OSError) -> bool:
+    return exc.errno in _CROSS_DEVICE_ERRORS or getattr(exc, "winerror", None) == _WINDOWS_NOT_SAME_DEVICE
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist directory entries; not supported (or needed) on Windows."""
+
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+DEFAULT_ENGINE = PlacementEngine()
+
+
+def sorted_target(source: Path, sorted_root: Path, result: str, tested_path_parts: tuple[str, str, str], serial: str) -> Path:
+    """Return where move_sorted will place the file."""
 
     yyyy, mm, dd = tested_path_parts
-    destination = sorted_root / result / yyyy / mm / dd / serial
-    destination.mkdir(parents=True, exist_ok=True)
-    target = destination / source.name
-    shutil.move(str(source), str(target))
-    return target
+    return sorted_root / result / yyyy / mm / dd / serial / source.name
+
+
+def quarantine_target(source: Path, quarantine_root: Path) -> Path:
+    """Return where move_quarantine will place the file."""
+
+    return quarantine_root / source.name
+
+
+def move_sorted(
+    source: Path,
+    sorted_root: Path,
+    result: str,
+    tested_path_parts: tuple[str, str, str],
+    serial: str,
+    engine: PlacementEngine | None = None,
+) -> Path:
+    """Move file to structured sorted destination."""
+
+    target = sorted_target(source, sorted_root, result, tested_path_parts, serial)
+    return (engine or DEFAULT_ENGINE).move(source, target)
 
 
-def move_quarantine(source: Path, quarantine_root: Path) -> Path:
+def move_quarantine(source: Path, quarantine_root: Path, engine: PlacementEngine | None = None) -> Path:
     """Move file to quarantine folder on parsing error."""
 
-    quarantine_root.mkdir(parents=True, exist_ok=True)
-    target = quarantine_root / source.name
-    shutil.move(str(source), str(target))
-    return target
+    return (engine or DEFAULT_ENGINE).move(source, quarantine_target(source, quarantine_root))
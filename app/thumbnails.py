@@ -0,0 +1,67 @@
+"""Certificate preview thumbnails rendered on demand and cached on disk."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+
+def thumbnail_path(source: Path, cache_root: Path, width: int) -> Path:
+    """Return cache location for a certificate thumbnail.
+
+    The key covers the source path, size and mtime so a replaced certificate
+    gets a fresh preview without explicit invalidation.
+    """
+
+    stat_result = source.stat()
+    key = f"{source.resolve()}|{stat_result.st_size}|{stat_result.st_mtime_ns}|{width}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return cache_root / digest[:2] / f"{digest}.png"
+
+
+def ensure_thumbnail(source: Path, cache_root: Path, width: int = 320) -> Path:
+    """Render the first certificate page to PNG once and return the cached file."""
+
+    target = thumbnail_path(source, cache_root, width)
+    if target.exists():
+        return target
+
+    import pdfplumber
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_target = target.with_name(f"{target.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with pdfplumber.open(source) as pdf:
+            if not pdf.pages:
+                raise ValueError(f"Certificate has no pages: {source}")
+            image = pdf.pages[0].to_image(width=width)
+            image.save(temp_target, format="PNG")
+        os.replace(temp_target, target)
+    finally:
+        temp_target.unlink(missing_ok=True)
+    return target
+
+
+def thumbnail_targets(sources: Iterable[str], cache_root: Path, width: int) -> dict[str, Path]:
+    """Map each existing source to its thumbnail location.
+
+    Call before the sources are removed: the location depends on their stat.
+    """
+
+    targets: dict[str, Path] = {}
+    for source in sources:
+        try:
+            targets[source] = thumbnail_path(Path(source), cache_root, width)
+        except OSError:
+            continue
+    return targets
+
+
+def discard_thumbnails(targets: Iterable[Path]) -> None:
+    """Delete cached thumbnails; missing ones are ignored."""
+
+    for target in targets:
+        target.unlink(missing_ok=True)
@@ -43,18 +43,8 @@ def normalize_barcode(value: str) -> str:
 
 
 def classify_organization(barcode: str | None) -> str | None:
-    """Classify barcode by customer organization."""
+    """Classify barcode by customer organization using the default rules."""
 
-    if not barcode:
-        return None
+    from app.organizations import DEFAULT_CLASSIFIER
 
-    normalized = normalize_barcode(barcode)
-    compact = normalized.replace(" ", "")
-
-    if normalized.startswith("AR "):
-        return "AMBIPAR"
-
-    if compact.startswith(("MCA", "011", "012", "013")):
-        return "MCA"
-
-    return "OTHER"
+    return DEFAULT_CLASSIFIER.classify(barcode)
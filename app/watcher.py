@@ -3,27 +3,56 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
 from watchdog.events import FileSystemEvent, FileSystemEventHandler
 from watchdog.observers import Observer
 
+from app.blobstore import BlobStore
 from app.config import AppConfig
 from app.database import Database
-from app.parser import ParseError, parse_certificate
-from app.sorter import move_quarantine, move_sorted
+from app.metrics import INGEST_FILES, INGEST_IN_PROGRESS, INGEST_QUEUE_DEPTH, INGEST_STAGE_SECONDS, INGEST_WINDOW
+from app.ingest_queue import FAILED, MOVED, PARSING, IngestQueue, QueueItem
+from app.parse_pool import ParsePool
+from app.parser import ParseError, ParsedCertificate, extract_pdf_text, parse_certificate
+from app.profiling import IngestProfiler, annotate, stage_timer
+from app.retry import QuarantineRetrier, RetryPolicy
+from app.scheduler import IngestScheduler
+from app.sorter import PlacementEngine, move_quarantine, move_sorted, quarantine_target, sorted_target
 from app.utils import wait_for_stable_file
 
 LOGGER = logging.getLogger(__name__)
 
 
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+    """Time an ingestion stage into the metrics histogram and the active trace."""
+
+    with INGEST_STAGE_SECONDS.time(stage=name), stage_timer(name):
+        yield
+
+
+def _date_parts(parsed: ParsedCertificate) -> tuple[str, str, str]:
+    tested = parsed.tested_at
+    return tested.strftime("%Y"), tested.strftime("%m"), tested.strftime("%d")
+
+
 class CertificateHandler(FileSystemEventHandler):
     """Watchdog handler for new certificate files."""
 
-    def __init__(self, config: AppConfig, database: Database):
+    def __init__(self, config: AppConfig, database: Database, queue: IngestQueue | None = None):
         self.config = config
         self.database = database
+        self.queue = queue
+        self.profiler = IngestProfiler.from_config(config)
+        self.placement = PlacementEngine.from_config(config)
+        self.blobs = BlobStore.from_config(config, self.placement)
+        self.retry_policy = RetryPolicy.from_config(config)
+        self.parse_pool = ParsePool.from_config(config)
+        self._extract_text = self.parse_pool.extract if self.parse_pool is not None else extract_pdf_text
 
     def on_created(self, event: FileSystemEvent) -> None:
         if event.is_directory:
@@ -36,53 +65,259 @@ class CertificateHandler(FileSystemEventHandler):
     def process_file(self, path: Path) -> bool:
         """Parse, persist, and sort a single PDF file."""
 
+        INGEST_IN_PROGRESS.inc()
+        try:
+            with self.profiler.trace_file(path), INGEST_STAGE_SECONDS.time(stage="total"):
+                return self._process_file(path)
+        finally:
+            INGEST_IN_PROGRESS.dec()
+
+    def process_item(self, item: QueueItem) -> bool:
+        """Process a durable queue item, resuming from the state it reached."""
+
+        if self.queue is None:
+            raise RuntimeError("process_item needs an ingest queue")
+        path = Path(item.destination if item.state == MOVED and item.destination else item.path)
+        INGEST_IN_PROGRESS.inc()
+        try:
+            with self.profiler.trace_file(path), INGEST_STAGE_SECONDS.time(stage="total"):
+                if item.state == MOVED:
+                    return self._finish_moved(item)
+                return self._process_file(path, item)
+        except Exception as exc:
+            if item.state == MOVED:
+                # The file is in the sorted tree or quarantine but not recorded;
+                # _finish_moved commits it (or its error row) on a later claim.
+                delay = self.queue.retry_later(item)
+                if delay is not None:
+                    LOGGER.exception("Ingest queue item %s (%s) failed; retrying in %.0fs", item.id, item.path, delay)
+                    return False
+            # Nothing was committed and the file may be gone; park the item
+            # instead of retrying it forever after every restart.
+            self.queue.advance(item, FAILED, error=repr(exc))
+            LOGGER.exception("Ingest queue item %s (%s) failed", item.id, item.path)
+            return False
+        finally:
+            INGEST_IN_PROGRESS.dec()
+
+    def _process_file(self, path: Path, item: QueueItem | None = None) -> bool:
+        try:
+            with _stage("stability_wait"):
+                wait_for_stable_file(path, checks=self.config.stable_checks, interval=self.config.stable_seconds)
+            with _stage("parse"):
+                parsed = parse_certificate(path, self._extract_text)
+            with _stage("move"):
+                destination, browse_path = self._place(path, parsed, item)
+            try:
+                with _stage("db"):
+                    self._commit_parsed(parsed, destination, item, browse_path)
+            finally:
+                self._unpin(destination)
+            LOGGER.info("Processed certificate: %s -> %s", path, destination)
+            return True
+        except (ParseError, Exception) as exc:
+            if not path.exists():
+                # The file already left the import folder, so there is nothing to
+                # quarantine. process_item retries a placed (``moved``) item and
+                # parks any other with its destination kept.
+                if item is not None:
+                    raise
+                LOGGER.exception("Failed to record %s after it left the import folder", path)
+                return False
+            with _stage("quarantine"):
+                if item is not None:
+                    self.queue.advance(
+                        item, PARSING, destination=quarantine_target(path, self.config.quarantine_folder), error=str(exc)
+                    )
+                quarantined = move_quarantine(path, self.config.quarantine_folder, engine=self.placement)
+                if item is not None:
+                    self.queue.advance(item, MOVED)
+                self._commit_quarantine(quarantined, str(exc), item, self.retry_policy.next_attempt_at(exc, 0))
+            LOGGER.exception("Failed to process %s. Moved to quarantine: %s", path, quarantined)
+            return False
+
+    def reprocess_quarantined(self, error_id: int, path: Path) -> Path:
+        """Parse a quarantined file again and replace its error row with the record."""
+
+        INGEST_IN_PROGRESS.inc()
         try:
-            wait_for_stable_file(path, checks=self.config.stable_checks, interval=self.config.stable_seconds)
-            parsed = parse_certificate(path)
-            tested = parsed.tested_at
+            with self.profiler.trace_file(path), INGEST_STAGE_SECONDS.time(stage="total"):
+                with _stage("parse"):
+                    parsed = parse_certificate(path, self._extract_text)
+                with _stage("move"):
+                    destination, browse_path = self._place(path, parsed)
+                try:
+                    with _stage("db"):
+                        self._commit_parsed(parsed, destination, None, browse_path, replaces_test_id=error_id)
+                finally:
+                    self._unpin(destination)
+        finally:
+            INGEST_IN_PROGRESS.dec()
+        LOGGER.info("Recovered quarantined certificate: %s -> %s", path, destination)
+        return destination
+
+    def close(self) -> None:
+        """Finish pending placements and stop the parse worker processes."""
+
+        self.placement.close()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+
+    def _place(self, path: Path, parsed: ParsedCertificate, item: QueueItem | None = None) -> tuple[Path, Path | None]:
+        """Move a parsed file into the sorted tree or blob store; return (destination, browse link)."""
+
+        browse_path = self._browse_target(path, parsed)
+        if self.blobs is None:
+            if item is not None:
+                self.queue.advance(item, PARSING, destination=browse_path)
             destination = move_sorted(
                 source=path,
                 sorted_root=self.config.sorted_folder,
                 result=parsed.result,
-                tested_path_parts=(tested.strftime("%Y"), tested.strftime("%m"), tested.strftime("%d")),
-                serial=parsed.serial,
-            )
-            self.database.add_test_record(
+                tested_path_parts=_date_parts(parsed),
                 serial=parsed.serial,
-                device_type=parsed.device_type,
-                barcode=parsed.barcode,
-                tested_at=parsed.tested_at,
-                result=parsed.result,
-                file_path=str(destination),
-                parse_status="ok",
-                fail_reason=parsed.fail_reason,
-            )
-            LOGGER.info("Processed certificate: %s -> %s", path, destination)
-            return True
-        except (ParseError, Exception) as exc:
-            quarantined = move_quarantine(path, self.config.quarantine_folder)
-            self.database.add_test_record(
-                serial="UNKNOWN",
-                device_type=None,
-                barcode=None,
-                tested_at=datetime.now(timezone.utc),
-                result="UNKNOWN",
-                file_path=str(quarantined),
-                parse_status="parse_error",
-                parse_error=str(exc),
-                fail_reason=None,
+                engine=self.placement,
             )
-            LOGGER.exception("Failed to process %s. Moved to quarantine: %s", path, quarantined)
+            browse_path = None
+        else:
+            digest = self.blobs.digest_file(path)
+            if item is not None:
+                self.queue.advance(item, PARSING, destination=self.blobs.blob_path(digest))
+            destination = self.blobs.store(path, browse_path, digest)
+        if item is not None:
+            self.queue.advance(item, MOVED)
+        return destination, browse_path
+
+    def _unpin(self, destination: Path) -> None:
+        """Release the store pin _place took on a blob once its row is committed (or failed)."""
+
+        if self.blobs is not None:
+            self.blobs.unpin(destination)
+
+    def _finish_moved(self, item: QueueItem) -> bool:
+        """Commit an item whose file was moved before the previous run stopped."""
+
+        destination = Path(item.destination)
+        if item.last_error is not None:
+            with _stage("quarantine"):
+                self._commit_quarantine(destination, item.last_error, item)
             return False
+        with _stage("parse"):
+            parsed = parse_certificate(destination, self._extract_text)
+        browse_path = None
+        if self.blobs is not None and self.blobs.contains(destination):
+            # The blob exists but the browse link may not have been made yet.
+            browse_path = self._browse_target(Path(item.path), parsed)
+            self.blobs.link(destination, browse_path)
+        with _stage("db"):
+            self._commit_parsed(parsed, destination, item, browse_path)
+        LOGGER.info("Resumed certificate after restart: %s -> %s", item.path, destination)
+        return True
+
+    def _browse_target(self, path: Path, parsed: ParsedCertificate) -> Path:
+        return sorted_target(path, self.config.sorted_folder, parsed.result, _date_parts(parsed), parsed.serial)
+
+    def _commit_parsed(
+        self,
+        parsed: ParsedCertificate,
+        destination: Path,
+        item: QueueItem | None,
+        browse_path: Path | None = None,
+        replaces_test_id: int | None = None,
+    ) -> None:
+        self.database.add_test_record(
+            serial=parsed.serial,
+            device_type=parsed.device_type,
+            barcode=parsed.barcode,
+            tested_at=parsed.tested_at,
+            result=parsed.result,
+            file_path=str(destination),
+            parse_status="ok",
+            fail_reason=parsed.fail_reason,
+            queue_item_id=item.id if item is not None else None,
+            browse_path=str(browse_path) if browse_path is not None else None,
+            replaces_test_id=replaces_test_id,
+            gas_readings=parsed.gas_readings,
+        )
+        annotate(outcome="processed", destination=str(destination))
+        INGEST_FILES.inc(outcome="processed")
+        INGEST_WINDOW.record(quarantined=False)
+
+    def _commit_quarantine(
+        self,
+        quarantined: Path,
+        error: str,
+        item: QueueItem | None,
+        next_retry_at: datetime | None = None,
+    ) -> None:
+        self.database.add_test_record(
+            serial="UNKNOWN",
+            device_type=None,
+            barcode=None,
+            # Naive like the filename timestamps, so it compares with stored rows.
+            tested_at=datetime.now(),
+            result="UNKNOWN",
+            file_path=str(quarantined),
+            parse_status="parse_error",
+            parse_error=error,
+            fail_reason=None,
+            queue_item_id=item.id if item is not None else None,
+            next_retry_at=next_retry_at,
+        )
+        annotate(outcome="quarantined", error=error)
+        INGEST_FILES.inc(outcome="quarantined")
+        INGEST_WINDOW.record(quarantined=True)
+
+
+class SourceEventHandler(FileSystemEventHandler):
+    """Queues new PDFs from one import source onto the shared scheduler."""
+
+    def __init__(self, source_name: str, scheduler: IngestScheduler):
+        self.source_name = source_name
+        self.scheduler = scheduler
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        path = Path(str(event.src_path))
+        if path.suffix.lower() != ".pdf":
+            return
+        self.scheduler.submit(self.source_name, path)
 
 
-def start_watcher(config: AppConfig, database: Database) -> tuple[Observer, CertificateHandler]:
-    """Create and start watchdog observer."""
+def start_watcher(
+    config: AppConfig, database: Database
+) -> tuple[Observer, CertificateHandler, IngestScheduler, QuarantineRetrier]:
+    """Watch every import source and start the shared ingestion and quarantine retry workers."""
 
-    config.import_folder.mkdir(parents=True, exist_ok=True)
+    sources = config.resolved_import_sources()
+    queue = (
+        IngestQueue(
+            database,
+            lease_seconds=config.ingest_queue_lease_seconds,
+            max_attempts=config.ingest_queue_max_attempts,
+            retry_base_seconds=config.ingest_queue_retry_base_seconds,
+            retention_days=config.ingest_queue_retention_days,
+        )
+        if config.ingest_queue_enabled
+        else None
+    )
+    handler = CertificateHandler(config, database, queue)
+    scheduler = IngestScheduler(
+        sources,
+        handler.process_item if queue is not None else handler.process_file,
+        workers=config.parse_workers,
+        queue=queue,
+        batch_size=config.ingest_queue_batch_size,
+    )
     observer = Observer()
-    handler = CertificateHandler(config, database)
-    observer.schedule(handler, str(config.import_folder), recursive=False)
+    for source in sources:
+        source.folder.mkdir(parents=True, exist_ok=True)
+        observer.schedule(SourceEventHandler(source.name, scheduler), str(source.folder), recursive=False)
+        LOGGER.info("Watching folder: %s (source %s, priority %s)", source.folder, source.name, source.priority)
+    INGEST_QUEUE_DEPTH.callback = lambda: observer.event_queue.qsize() + scheduler.backlog()
+    retrier = QuarantineRetrier(config, database, handler)
+    scheduler.start()
+    retrier.start()
     observer.start()
-    LOGGER.info("Watching folder: %s", config.import_folder)
-    return observer, handler
+    return observer, handler, scheduler, retrier
@@ -0,0 +1 @@
+"""Performance harnesses for the certificate manager (not part of the test suite)."""
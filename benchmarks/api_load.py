@@ -0,0 +1,257 @@
+"""API load test against a large seeded database.
+
+Usage::
+
+    python -m benchmarks.api_load --devices 50000 --tests-per-device 40 --concurrency 8 --json load.json
+
+Seeds a SQLite database of the requested size (see ``benchmarks.seed``), starts
+the app in a child process and drives ``/``, ``/api/dashboard``,
+``/device/{serial}``, ``/export.zip`` and ``/print-report`` with a realistic
+mix of filters (organization, result, date range, serial fragment,
+latest-only vs full history).
+
+Each endpoint first runs on its own so the server's peak RSS can be attributed
+to it, then all endpoints run together with ``--mix`` weights. For every
+phase the report contains p50/p95/p99 latency, requests per second, error
+count and the server's RSS at the start of the phase and its peak while the
+phase ran (the allocator rarely returns memory, so compare peak to start).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+from app.database import Database
+from benchmarks.http import free_port, rss_bytes, serve, summarize, wait_until_ready
+from benchmarks.seed import seed_database
+
+ENDPOINTS = ("index", "dashboard", "device", "export", "print_report")
+DEFAULT_MIX = {"index": 30, "dashboard": 30, "device": 30, "export": 5, "print_report": 5}
+ORGANIZATIONS = (None, None, "AMBIPAR", "MCA", "OTHER", "UNKNOWN")
+RESULTS = (None, None, "PASS", "FAIL")
+SEED_START = date(2024, 1, 1)
+
+
+class RequestFactory:
+    """Draws request paths and filter mixes for each endpoint."""
+
+    def __init__(self, devices: int, tests_per_device: int, seed: int):
+        self.devices = devices
+        self.history_days = max(1, tests_per_device)
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _filters(self, rng: random.Random) -> dict[str, str]:
+        params: dict[str, str] = {}
+        organization = rng.choice(ORGANIZATIONS)
+        if organization:
+            params["organization"] = organization
+        result = rng.choice(RESULTS)
+        if result:
+            params["result"] = result
+        if rng.random() < 0.3:
+            start = SEED_START + timedelta(days=rng.randrange(self.history_days))
+            params["date_from"] = start.isoformat()
+            params["date_to"] = (start + timedelta(days=rng.choice((1, 7, 30)))).isoformat()
+        if rng.random() < 0.1:
+            params["serial"] = f"BN{rng.randrange(self.devices):06d}"[: rng.choice((5, 6, 8))]
+        return params
+
+    def build(self, endpoint: str) -> tuple[str, dict[str, str]]:
+        with self._lock:
+            rng = random.Random(self.rng.random())
+        if endpoint == "device":
+            return f"/device/BN{rng.randrange(self.devices):06d}", {}
+        params = self._filters(rng)
+        if endpoint == "index":
+            return "/", params
+        if endpoint == "dashboard":
+            return "/api/dashboard", params
+        params["latest_only"] = "true" if rng.random() < 0.8 else "false"
+        if endpoint == "export":
+            # Seeded file paths do not exist; certificates would only add missing-file checks.
+            params["include_certificates"] = "false"
+            return "/export.zip", params
+        return "/print-report", params
+
+
+class RssSampler(threading.Thread):
+    """Polls the server's resident set size and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak: int | None = None
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            current = rss_bytes(self.pid)
+            if current is not None and (self.peak is None or current > self.peak):
+                self.peak = current
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int | None:
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def run_phase(
+    base_url: str,
+    server_pid: int,
+    factory: RequestFactory,
+    mix: dict[str, int],
+    concurrency: int,
+    seconds: float,
+) -> dict[str, object]:
+    """Hammer the server with the weighted endpoint mix for a fixed duration."""
+
+    endpoints = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in endpoints]
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(worker_seed: int) -> None:
+        rng = random.Random(worker_seed)
+        with httpx.Client(base_url=base_url, timeout=300, headers={"Accept-Encoding": "gzip"}) as client:
+            while time.monotonic() < deadline:
+                endpoint = rng.choices(endpoints, weights)[0]
+                path, params = factory.build(endpoint)
+                started = time.perf_counter()
+                try:
+                    response = client.get(path, params=params)
+                    response.read()
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        samples[endpoint].append(elapsed)
+                    else:
+                        errors[endpoint] += 1
+
+    start_rss = rss_bytes(server_pid)
+    sampler = RssSampler(server_pid)
+    sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    peak_rss = sampler.stop()
+
+    endpoints_report = {}
+    for name in endpoints:
+        summary = summarize(samples[name])
+        summary["errors"] = errors[name]
+        summary["throughput_rps"] = round(len(samples[name]) / wall, 2)
+        endpoints_report[name] = summary
+    return {
+        "wall_seconds": round(wall, 2),
+        "start_rss_mb": round(start_rss / 2**20, 1) if start_rss is not None else None,
+        "peak_rss_mb": round(peak_rss / 2**20, 1) if peak_rss is not None else None,
+        "endpoints": endpoints_report,
+    }
+
+
+def parse_mix(values: list[str]) -> dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in ENDPOINTS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid mix entry {value!r}, expected <endpoint>=<weight>")
+        mix[name] = int(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50000)
+    parser.add_argument("--tests-per-device", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duration of each phase")
+    parser.add_argument("--endpoints", choices=ENDPOINTS, nargs="*", default=list(ENDPOINTS))
+    parser.add_argument("--mix", nargs="*", default=[], help="Weights for the mixed phase, e.g. export=10")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--db", type=Path, default=None, help="Reuse (or create) this database file")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+    mix = {name: weight for name, weight in parse_mix(args.mix).items() if name in args.endpoints}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        db_path = args.db or root / "load.db"
+        seeded = 0.0
+        if not db_path.exists():
+            db = Database(db_path)
+            db.create_tables()
+            started = time.perf_counter()
+            seed_database(db, args.devices, args.tests_per_device, seed=args.seed)
+            seeded = time.perf_counter() - started
+            db.engine.dispose()
+            print(f"Seeded {args.devices * args.tests_per_device} tests in {seeded:.1f}s", flush=True)
+
+        overrides = {"thumbnails_folder": root / "thumbs"}
+        if not args.cache:
+            overrides["response_cache_size"] = 0
+        port = free_port()
+        server = multiprocessing.Process(target=serve, args=(db_path, overrides, port), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        factory = RequestFactory(args.devices, args.tests_per_device, args.seed)
+        try:
+            wait_until_ready(base_url)
+            idle_rss = rss_bytes(server.pid)
+            phases = {}
+            for endpoint in args.endpoints:
+                phases[endpoint] = run_phase(base_url, server.pid, factory, {endpoint: 1}, args.concurrency, args.seconds)
+                print(json.dumps({endpoint: phases[endpoint]}), flush=True)
+            phases["mixed"] = run_phase(base_url, server.pid, factory, mix, args.concurrency, args.seconds)
+            print(json.dumps({"mixed": phases["mixed"]}), flush=True)
+        finally:
+            server.terminate()
+            server.join()
+
+    report = {
+        "devices": args.devices,
+        "tests": args.devices * args.tests_per_device,
+        "concurrency": args.concurrency,
+        "cache": args.cache,
+        "seed_seconds": round(seeded, 1),
+        "idle_rss_mb": round(idle_rss / 2**20, 1) if idle_rss is not None else None,
+        "mix": mix,
+        "phases": phases,
+    }
+    print(f"{'phase':<14} {'endpoint':<14} {'req':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5} {'rss MB':>8}")
+    for phase, data in phases.items():
+        for name, summary in data["endpoints"].items():
+            print(
+                f"{phase:<14} {name:<14} {summary['requests']:>6} {summary['throughput_rps']:>8} "
+                f"{summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9} "
+                f"{summary['errors']:>5} {data['peak_rss_mb'] or '-':>8}"
+            )
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Synthetic X-dock calibration certificate generator.
+
+Usage::
+
+    python -m benchmarks.corpus --out /tmp/xdock-corpus --count 1000
+
+Writes text-based PDFs named like real X-dock exports
+(``YYYYMMDD_HH_MM_SS_<station><SERIAL>_Calibration_EN.pdf``) with varied
+serials, barcodes, device types, PASS/FAIL outcomes, span calibration tables
+and page counts. The PDFs are produced by a tiny writer (Helvetica,
+WinAnsiEncoding) so no extra dependency is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DEVICE_GASES = {
+    "Dräger X-am 2500": ("CH4", "O2", "H2S", "CO"),
+    "Dräger X-am 5600": ("CH4", "O2", "H2S", "CO"),
+    "Dräger X-am 8000": ("CH4", "O2", "CO"),
+    "Dräger Pac 6500": ("H2S",),
+    "Dräger Pac 8000": ("CO",),
+}
+SPAN_GAS = {
+    "CH4": (50.0, "%LEL"),
+    "O2": (18.0, "Vol%"),
+    "H2S": (15.0, "ppm"),
+    "CO": (60.0, "ppm"),
+}
+BARCODE_PREFIXES = ("AR ", "MCA", "011", "012", "013", "ZZ-")
+OTHER_FAIL_REASONS = ("Bump test expired", "Pump fault", "Sensor drift", "Alarm test failed")
+
+
+@dataclass(slots=True)
+class GasResult:
+    """Span calibration outcome for one gas channel."""
+
+    gas: str
+    passed: bool
+    nominal: float
+    measured: float
+    unit: str
+
+
+@dataclass(slots=True)
+class CertificateSpec:
+    """Everything needed to render one synthetic certificate."""
+
+    serial: str
+    station_prefix: str
+    tested_at: datetime
+    device_type: str
+    barcode: str | None
+    gases: list[GasResult]
+    fail_reason: str | None
+    extra_pages: int = 0
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.fail_reason is None and all(gas.passed for gas in self.gases)
+
+    @property
+    def result(self) -> str:
+        return "PASS" if self.passed else "FAIL"
+
+    @property
+    def filename(self) -> str:
+        return f"{self.tested_at:%Y%m%d_%H_%M_%S}_{self.station_prefix}{self.serial}_Calibration_EN.pdf"
+
+
+def random_serial(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_uppercase) for _ in range(4)) + f"{rng.randrange(10000):04d}"
+
+
+def random_spec(rng: random.Random, base: datetime, fail_rate: float = 0.12, max_extra_pages: int = 3) -> CertificateSpec:
+    """Draw a random certificate with a realistic mix of outcomes."""
+
+    device_type = rng.choice(list(DEVICE_GASES))
+    prefix = rng.choice((*BARCODE_PREFIXES, None))
+    barcode = f"{prefix}{rng.randrange(10**6):06d}" if prefix else None
+
+    failing = rng.random() < fail_rate
+    failing_gas = rng.choice(DEVICE_GASES[device_type]) if failing and rng.random() < 0.8 else None
+    gases = []
+    for gas in DEVICE_GASES[device_type]:
+        nominal, unit = SPAN_GAS[gas]
+        passed = gas != failing_gas
+        deviation = rng.uniform(-0.03, 0.03) if passed else rng.choice((-1, 1)) * rng.uniform(0.2, 0.5)
+        gases.append(GasResult(gas, passed, nominal, round(nominal * (1 + deviation), 1), unit))
+    fail_reason = rng.choice(OTHER_FAIL_REASONS) if failing and failing_gas is None else None
+
+    return CertificateSpec(
+        serial=random_serial(rng),
+        station_prefix=f"{rng.randrange(10**7):07d}",
+        tested_at=base + timedelta(seconds=rng.randrange(0, 365 * 24 * 3600)),
+        device_type=device_type,
+        barcode=barcode,
+        gases=gases,
+        fail_reason=fail_reason,
+        extra_pages=rng.randrange(0, max_extra_pages + 1),
+        notes=[f"Channel {gas.gas}: sensor {rng.randrange(10**8):08d}" for gas in gases],
+    )
+
+
+def certificate_pages(spec: CertificateSpec) -> list[list[str]]:
+    """Return the text lines of each certificate page."""
+
+    first_page = [
+        "Calibration certificate",
+        "Dräger X-dock 6300",
+        f"Date: {spec.tested_at:%d.%m.%Y %H:%M:%S}",
+        f"Device type: {spec.device_type}",
+        f"Serial number: {spec.serial}",
+    ]
+    if spec.barcode:
+        first_page.append(f"Barcode: {spec.barcode}")
+    first_page += [
+        "",
+        "Results of span calibration",
+        " ".join(gas.gas for gas in spec.gases),
+        "Test result " + " ".join("Passed" if gas.passed else "Failed" for gas in spec.gases),
+        "Nominal value " + " ".join(f"{gas.nominal:g} {gas.unit}" for gas in spec.gases),
+        "Measured value " + " ".join(f"{gas.measured:g} {gas.unit}" for gas in spec.gases),
+        "",
+        f"Overall result: {'Passed' if spec.passed else 'Failed'}",
+    ]
+    if spec.fail_reason:
+        first_page.append(f"Fail reason: {spec.fail_reason}")
+
+    pages = [first_page]
+    for page_number in range(spec.extra_pages):
+        pages.append(
+            [
+                f"Appendix {page_number + 1}",
+                "Sensor information",
+                *spec.notes,
+                "Test gas cylinders were within their expiry date.",
+            ]
+        )
+    return pages
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def render_pdf(pages: list[list[str]]) -> bytes:
+    """Render text lines into a minimal, valid multi-page PDF."""
+
+    page_count = len(pages)
+    font_id = 3
+    first_page_id = 4
+    objects: dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{first_page_id + 2 * index} 0 R".encode() for index in range(page_count))
+        + f"] /Count {page_count} >>".encode(),
+        font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    for index, lines in enumerate(pages):
+        page_id = first_page_id + 2 * index
+        content_id = page_id + 1
+        stream = [b"BT", b"/F1 10 Tf", b"14 TL", b"50 800 Td"]
+        for line in lines:
+            stream.append(_pdf_string(line) + b" Tj T*")
+        stream.append(b"ET")
+        content = b"\n".join(stream)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {content_id} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        ).encode()
+        objects[content_id] = f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream"
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n".encode() + objects[object_id] + b"\nendobj\n"
+    xref_offset = len(output)
+    size = max(objects) + 1
+    output += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for object_id in range(1, size):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def generate_corpus(folder: Path, count: int, seed: int = 2026, fail_rate: float = 0.12) -> list[tuple[Path, CertificateSpec]]:
+    """Write ``count`` certificates into folder and return paths with their specs."""
+
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, 6, 0, 0)
+    generated: list[tuple[Path, CertificateSpec]] = []
+    used_names: set[str] = set()
+    while len(generated) < count:
+        spec = random_spec(rng, base, fail_rate=fail_rate)
+        if spec.filename in used_names:
+            continue
+        used_names.add(spec.filename)
+        path = folder / spec.filename
+        path.write_bytes(render_pdf(certificate_pages(spec)))
+        generated.append((path, spec))
+    return generated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--fail-rate", type=float, default=0.12)
+    args = parser.parse_args()
+
+    generated = generate_corpus(args.out, args.count, seed=args.seed, fail_rate=args.fail_rate)
+    failed = sum(1 for _, spec in generated if not spec.passed)
+    print(f"Wrote {len(generated)} certificates ({failed} FAIL) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
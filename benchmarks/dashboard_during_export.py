@@ -0,0 +1,128 @@
+"""Measure dashboard poll latency while a large ZIP export runs.
+
+Usage::
+
+    python -m benchmarks.dashboard_during_export --devices 2000 --pollers 8
+
+The app is served by uvicorn on a local port. Dashboard pollers run first on an
+idle server (baseline) and then while exporters repeatedly download
+``/export.zip``. With export work on its own executor the p99 of both phases
+should stay close.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from app.database import Database
+from benchmarks.http import free_port, serve, summarize, wait_until_ready
+
+
+def seed(db: Database, root: Path, devices: int, certificate_kb: int) -> None:
+    """Create devices with one certificate file each."""
+
+    certificates = root / "certs"
+    certificates.mkdir()
+    payload = os.urandom(certificate_kb * 1024)
+    base = datetime(2026, 1, 1, 8, 0, 0)
+    for index in range(devices):
+        certificate = certificates / f"cert_{index:06d}.pdf"
+        certificate.write_bytes(payload)
+        db.add_test_record(
+            serial=f"BENCH{index:05d}",
+            device_type="X-am 2500",
+            tested_at=base + timedelta(minutes=index),
+            barcode=f"MCA{index:06d}",
+            result="PASS" if index % 7 else "FAIL",
+            file_path=str(certificate),
+        )
+
+
+def poll_dashboard(base_url: str, stop: threading.Event, samples: list[float]) -> None:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/api/dashboard", params={"result": "FAIL"}).raise_for_status()
+            samples.append(time.perf_counter() - started)
+
+
+def run_exports(base_url: str, stop: threading.Event, durations: list[float]) -> None:
+    with httpx.Client(base_url=base_url, timeout=600) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/export.zip", params={"latest_only": "false"}).raise_for_status()
+            durations.append(time.perf_counter() - started)
+
+
+def run_phase(base_url: str, pollers: int, exporters: int, seconds: float) -> tuple[list[float], list[float]]:
+    stop = threading.Event()
+    samples: list[float] = []
+    export_durations: list[float] = []
+    threads = [threading.Thread(target=poll_dashboard, args=(base_url, stop, samples)) for _ in range(pollers)]
+    threads += [threading.Thread(target=run_exports, args=(base_url, stop, export_durations)) for _ in range(exporters)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return samples, export_durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--certificate-kb", type=int, default=64)
+    parser.add_argument("--pollers", type=int, default=8)
+    parser.add_argument("--exporters", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        db = Database(root / "bench.db")
+        db.create_tables()
+        seed(db, root, args.devices, args.certificate_kb)
+
+        port = free_port()
+        # Disable the response cache so every poll exercises the read path.
+        overrides = {"response_cache_size": 0, "thumbnails_folder": root / "thumbs"}
+        server = multiprocessing.Process(target=serve, args=(root / "bench.db", overrides, port), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(base_url)
+            baseline, _ = run_phase(base_url, args.pollers, 0, args.seconds)
+            loaded, exports = run_phase(base_url, args.pollers, args.exporters, args.seconds)
+        finally:
+            server.terminate()
+            server.join(timeout=10)
+
+    results = {
+        "devices": args.devices,
+        "pollers": args.pollers,
+        "exporters": args.exporters,
+        "baseline": summarize(baseline),
+        "during_export": summarize(loaded),
+        "exports_completed": len(exports),
+        "export_mean_s": round(statistics.fmean(exports), 3) if exports else None,
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
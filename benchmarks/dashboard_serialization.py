@@ -0,0 +1,102 @@
+"""Compare dashboard JSON serialization paths and bytes on the wire.
+
+Usage::
+
+    python -m benchmarks.dashboard_serialization --sizes 1000 10000 50000
+
+``orm+json`` is the previous path (ORM entities, per-row ``isoformat`` and the
+stdlib encoder used by ``JSONResponse``); ``core+orjson`` is the path used by
+``/api/dashboard`` now (column selects mapped to slotted records and encoded
+by orjson).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import desc, select
+
+from app.database import Database
+from app.models import Device
+from app.records import DeviceRow, select_record, to_records
+from app.serializers import encode_json
+from benchmarks.seed import seed_database
+
+
+def legacy_payload(db: Database) -> bytes:
+    with db._session_maker() as session:
+        devices = session.scalars(select(Device).order_by(desc(Device.last_tested_at))).all()
+        payload = {
+            "devices": [
+                {
+                    "serial": device.serial,
+                    "barcode": device.barcode,
+                    "organization": device.organization,
+                    "device_type": device.device_type,
+                    "last_tested_at": device.last_tested_at.isoformat() if device.last_tested_at else None,
+                    "last_result": device.last_result,
+                }
+                for device in devices
+            ]
+        }
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_payload(db: Database) -> bytes:
+    with db.engine.connect() as connection:
+        rows = connection.execute(select_record(DeviceRow).order_by(desc(Device.last_tested_at)))
+        return encode_json({"devices": to_records(DeviceRow, rows)})
+
+
+def best_of(func: Callable[[], bytes], repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = Database(Path(temp_dir) / "bench.db")
+            db.create_tables()
+            seed_database(db, size)
+            for name, func in (("orm+json", lambda: legacy_payload(db)), ("core+orjson", lambda: fast_payload(db))):
+                seconds, body = best_of(func, args.repeat)
+                compressed = gzip.compress(body, compresslevel=5)
+                results.append(
+                    {
+                        "devices": size,
+                        "path": name,
+                        "build_and_encode_ms": round(seconds * 1000, 2),
+                        "bytes": len(body),
+                        "gzip_bytes": len(compressed),
+                    }
+                )
+            db.engine.dispose()
+
+    print(f"{'devices':>8} {'path':<12} {'ms':>10} {'bytes':>12} {'gzip bytes':>12}")
+    for row in results:
+        print(f"{row['devices']:>8} {row['path']:<12} {row['build_and_encode_ms']:>10} {row['bytes']:>12} {row['gzip_bytes']:>12}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
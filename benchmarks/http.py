@@ -0,0 +1,77 @@
+"""Shared helpers for HTTP load benchmarks: server process, latency stats, RSS."""
+
+from __future__ import annotations
+
+import socket
+import statistics
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of latency samples."""
+
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Return latency summary in milliseconds."""
+
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(db_path: Path, config_overrides: dict, port: int) -> None:
+    """Run the app in a child process so client threads do not share its GIL."""
+
+    config = AppConfig(db_path=db_path, **config_overrides)
+    uvicorn.run(create_app(config, Database(db_path)), host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/api/cache-stats", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Server did not start in time")
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Return current resident set size of a process, if the platform exposes it."""
+
+    status = Path(f"/proc/{pid}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    try:
+        import psutil  # optional; used on Windows station PCs when installed
+    except ImportError:
+        return None
+    return psutil.Process(pid).memory_info().rss
+
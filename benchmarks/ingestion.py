@@ -0,0 +1,147 @@
+"""Ingestion benchmark: parser, end-to-end process_file and DB inserts.
+
+Usage::
+
+    python -m benchmarks.ingestion --sizes 1000 10000 100000 --json results.json
+
+For every size a synthetic corpus is generated (see ``benchmarks.corpus``) and
+three stages are measured on a fresh database:
+
+* ``parse_certificate`` documents per second,
+* ``CertificateHandler.process_file`` files per second (stability wait off),
+* ``Database.add_test_record`` inserts per second.
+
+Results are printed as a table and optionally written as JSON together with
+the git commit, so runs can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.config import AppConfig
+from app.database import Database
+from app.parser import parse_certificate
+from app.watcher import CertificateHandler
+from benchmarks.corpus import generate_corpus
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parse(files: list[Path]) -> dict[str, float]:
+    started = time.perf_counter()
+    for path in files:
+        parse_certificate(path)
+    elapsed = time.perf_counter() - started
+    return {"count": len(files), "seconds": round(elapsed, 3), "per_second": round(len(files) / elapsed, 1)}
+
+
+def bench_process_file(files: list[Path], root: Path) -> dict[str, float]:
+    import_folder = root / "imports"
+    import_folder.mkdir()
+    staged = []
+    for path in files:
+        target = import_folder / path.name
+        shutil.copyfile(path, target)
+        staged.append(target)
+
+    config = AppConfig(
+        db_path=root / "process.db",
+        import_folder=import_folder,
+        sorted_folder=root / "sorted",
+        quarantine_folder=root / "quarantine",
+        logs_folder=root / "logs",
+        stable_checks=0,
+    )
+    db = Database(config.db_path)
+    db.create_tables()
+    handler = CertificateHandler(config, db)
+
+    started = time.perf_counter()
+    failed = sum(0 if handler.process_file(path) else 1 for path in staged)
+    elapsed = time.perf_counter() - started
+    db.engine.dispose()
+    return {
+        "count": len(staged),
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(staged) / elapsed, 1),
+    }
+
+
+def bench_inserts(count: int, root: Path) -> dict[str, float]:
+    db = Database(root / "inserts.db")
+    db.create_tables()
+    base = datetime(2026, 1, 1)
+    started = time.perf_counter()
+    for index in range(count):
+        db.add_test_record(
+            serial=f"INS{index % max(1, count // 4):05d}",
+            device_type="Dräger X-am 2500",
+            tested_at=base.replace(minute=index % 60, second=index % 60),
+            barcode=f"MCA{index:06d}",
+            result="PASS" if index % 9 else "FAIL",
+            file_path=f"C:/GasDock/Sorted/PASS/2026/01/01/INS/{index}.pdf",
+        )
+    elapsed = time.perf_counter() - started
+    db.engine.dispose()
+    return {"count": count, "seconds": round(elapsed, 3), "per_second": round(count / elapsed, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--skip", choices=("parse", "process_file", "inserts"), nargs="*", default=[])
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    runs = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            files = [path for path, _ in generate_corpus(root / "corpus", size, seed=args.seed)]
+            run: dict[str, object] = {"size": size}
+            if "parse" not in args.skip:
+                run["parse_certificate"] = bench_parse(files)
+            if "process_file" not in args.skip:
+                run["process_file"] = bench_process_file(files, root)
+            if "inserts" not in args.skip:
+                run["add_test_record"] = bench_inserts(size, root)
+            runs.append(run)
+            print(json.dumps(run), flush=True)
+
+    report = {
+        "benchmark": "ingestion",
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "runs": runs,
+    }
+    print(f"{'size':>8} {'parse/s':>10} {'process/s':>10} {'inserts/s':>10}")
+    for run in runs:
+        cells = [run.get(stage, {}).get("per_second", "-") for stage in ("parse_certificate", "process_file", "add_test_record")]
+        print(f"{run['size']:>8} " + " ".join(f"{cell:>10}" for cell in cells))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare ORM entity loading with column selects mapped to slotted records.
+
+Usage::
+
+    python -m benchmarks.row_records --rows 100000
+
+Loads every ``tests`` row the way export/print report used to (``select(TestRecord)``
+through a session) and the way they do now (``select_record(TestRow)``), reporting
+wall time, rows/sec and tracemalloc peak memory for each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import desc, select
+
+from app.database import Database
+from app.models import TestRecord
+from app.records import TestRow, select_record, to_records
+from benchmarks.seed import seed_database
+
+
+def load_orm(db: Database) -> int:
+    with db._session_maker() as session:
+        rows = session.scalars(select(TestRecord).order_by(desc(TestRecord.tested_at), desc(TestRecord.id))).all()
+        return len(rows)
+
+
+def load_records(db: Database) -> int:
+    with db._session_maker() as session:
+        rows = to_records(
+            TestRow,
+            session.execute(select_record(TestRow).order_by(desc(TestRecord.tested_at), desc(TestRecord.id))),
+        )
+        return len(rows)
+
+
+def measure(func: Callable[[], int]) -> dict[str, float]:
+    gc.collect()
+    started = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(count / elapsed) if elapsed else 0,
+        "peak_mb": round(peak / (1024 * 1024), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = Database(Path(temp_dir) / "bench.db")
+        db.create_tables()
+        seed_database(db, devices=max(1, args.rows // 10), tests_per_device=10)
+        results = {"orm_entities": measure(lambda: load_orm(db)), "slotted_records": measure(lambda: load_records(db))}
+        db.engine.dispose()
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
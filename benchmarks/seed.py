@@ -0,0 +1,86 @@
+"""Bulk seeding helpers for benchmark databases."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.database import Database
+from app.models import Device, TestRecord
+
+DEVICE_TYPES = ("Dräger X-am 2500", "Dräger X-am 5600", "Dräger Pac 6500", "Dräger X-am 8000")
+BARCODE_PREFIXES = ("AR ", "MCA", "011", "012", "ZZ-", None)
+FAIL_REASONS = (
+    "Span calibration failed for CH4",
+    "Span calibration failed for O2",
+    "Span calibration failed for H2S",
+    "Span calibration failed for CO",
+    "Bump test expired",
+)
+
+
+def seed_database(db: Database, devices: int, tests_per_device: int = 1, seed: int = 1234, batch_size: int = 5000) -> None:
+    """Insert synthetic devices and tests with executemany batches.
+
+    Bypasses ``Database.add_test_record`` (one transaction per row) so very
+    large databases can be built in seconds; rollups and due dates are
+    rebuilt once at the end.
+    """
+
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1, 6, 0, 0)
+    device_rows: list[dict] = []
+    test_rows: list[dict] = []
+
+    def flush() -> None:
+        with db.write_engine.begin() as connection:
+            if device_rows:
+                connection.execute(insert(Device), device_rows)
+            if test_rows:
+                connection.execute(insert(TestRecord), test_rows)
+        device_rows.clear()
+        test_rows.clear()
+
+    for index in range(devices):
+        serial = f"BN{index:06d}"
+        device_type = rng.choice(DEVICE_TYPES)
+        prefix = rng.choice(BARCODE_PREFIXES)
+        barcode = f"{prefix}{index:06d}" if prefix else None
+        organization = db.organizations.classify(barcode)
+        tested_at = base
+        result = "PASS"
+        for test_index in range(tests_per_device):
+            tested_at = base + timedelta(days=test_index, minutes=rng.randrange(0, 24 * 60))
+            result = "FAIL" if rng.random() < 0.12 else "PASS"
+            test_rows.append(
+                {
+                    "serial": serial,
+                    "barcode": barcode,
+                    "organization": organization,
+                    "device_type": device_type,
+                    "tested_at": tested_at,
+                    "result": result,
+                    "file_path": f"C:/GasDock/Sorted/{result}/{tested_at:%Y/%m/%d}/{serial}/cert_{test_index}.pdf",
+                    "imported_at": tested_at,
+                    "parse_status": "ok",
+                    "fail_reason": rng.choice(FAIL_REASONS) if result == "FAIL" else None,
+                }
+            )
+        device_rows.append(
+            {
+                "serial": serial,
+                "barcode": barcode,
+                "organization": organization,
+                "device_type": device_type,
+                "last_tested_at": tested_at,
+                "last_result": result,
+                "last_updated": tested_at,
+            }
+        )
+        if len(test_rows) >= batch_size:
+            flush()
+    flush()
+    db.rebuild_rollups()
+    db.refresh_due_dates()
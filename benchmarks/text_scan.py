@@ -0,0 +1,79 @@
+"""Microbenchmark: single-pass certificate text scanner vs the former regex set.
+
+Usage::
+
+    python -m benchmarks.text_scan --count 500 --repeat 20
+
+Renders synthetic certificate texts (see ``benchmarks.corpus``) and times
+field extraction per certificate with ``scan_certificate_text`` and with
+``legacy_fields``, the five-regex implementation it replaced, which
+tests/test_parser.py keeps as the reference for its equivalence test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from app.parser import scan_certificate_text
+from benchmarks.corpus import certificate_pages, random_spec
+from tests.test_parser import legacy_fields
+
+
+def scanner_fields(full_text: str) -> tuple[str | None, str | None, str | None, str | None]:
+    fields = scan_certificate_text(full_text)
+    return fields.device_type, fields.barcode, fields.result, fields.fail_reason
+
+
+def certificate_texts(count: int, seed: int = 2026) -> list[str]:
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    return ["\n".join("\n".join(page) for page in certificate_pages(random_spec(rng, base))) for _ in range(count)]
+
+
+def time_per_certificate(extract, texts: list[str], repeat: int) -> float:
+    """Best-of-``repeat`` microseconds per certificate."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            extract(text)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500, help="certificate texts to scan")
+    parser.add_argument("--repeat", type=int, default=20, help="timing rounds; the best one is reported")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    texts = certificate_texts(args.count, args.seed)
+    mismatches = sum(legacy_fields(text) != scanner_fields(text) for text in texts)
+    legacy_us = time_per_certificate(legacy_fields, texts, args.repeat)
+    scanner_us = time_per_certificate(scanner_fields, texts, args.repeat)
+    results = {
+        "certificates": len(texts),
+        "mean_chars": round(sum(map(len, texts)) / len(texts)),
+        "legacy_us": round(legacy_us, 2),
+        "scanner_us": round(scanner_us, 2),
+        "speedup": round(legacy_us / scanner_us, 2),
+        "mismatches": mismatches,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['certificates']} certificates, {results['mean_chars']} chars on average")
+    print(f"legacy regex set   {results['legacy_us']:>8.2f} us/certificate")
+    print(f"single-pass scan   {results['scanner_us']:>8.2f} us/certificate")
+    print(f"speedup            {results['speedup']:>8.2f}x   (mismatches: {mismatches})")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ a = Analysis(
         'uvicorn.logging',
         'uvicorn.loops',
         'uvicorn.protocols',
+        'aiosqlite',
+        'sqlalchemy.dialects.sqlite.aiosqlite',
     ],
     hookspath=[],
     hooksconfig={},
@@ -2,44 +2,154 @@
 
 from __future__ import annotations
 
+import argparse
+import json
+import multiprocessing
+import os
 import signal
 import threading
+from typing import TYPE_CHECKING, Any, Optional, Sequence
 
-import uvicorn
-
-from app.api import create_app
-from app.config import load_config
+from app.calibration import CalibrationSchedule
+from app.config import AppConfig, load_config
 from app.database import Database
+from app.organizations import OrganizationClassifier
 from app.utils import setup_logging
-from app.watcher import start_watcher
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+# Command-line overrides as JSON, inherited by uvicorn's worker processes.
+OVERRIDES_ENV = "GASDOCK_CONFIG_OVERRIDES"
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command-line overrides for the deployment role."""
+
+    parser = argparse.ArgumentParser(description="GasDock certificate manager")
+    parser.add_argument("--role", choices=["both", "ingest", "web"], help="override the configured role")
+    parser.add_argument("--workers", type=int, help="override the configured number of web workers")
+    return parser.parse_args(argv)
+
+
+def load_app_config(overrides: Optional[dict[str, Any]] = None) -> AppConfig:
+    """Load config.yaml with command-line overrides, by default those passed down in the environment."""
+
+    if overrides is None:
+        overrides = json.loads(os.environ.get(OVERRIDES_ENV) or "{}")
+    return load_config().model_copy(update=overrides)
+
+
+def build_database(config: AppConfig) -> Database:
+    """Return a database wired to the configured calibration and organization rules."""
+
+    return Database(
+        config.db_path,
+        CalibrationSchedule.from_config(config),
+        OrganizationClassifier.from_config(config),
+    )
 
 
-def main() -> None:
+def web_app() -> FastAPI:
+    """Uvicorn factory run in each web worker process; workers share only the database."""
+
+    from app.api import create_app
+
+    config = load_app_config()
+    setup_logging(config.logs_folder / "app.log")
+    return create_app(config, build_database(config))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
     """Application entrypoint."""
 
-    config = load_config()
+    args = parse_args(argv)
+    overrides = {key: value for key, value in (("role", args.role), ("web_workers", args.workers)) if value is not None}
+    config = load_app_config(overrides)
+    if config.role == "both" and config.web_workers > 1:
+        # uvicorn's worker supervisor owns the signals and every worker builds
+        # its own app, so ingest in this process would never be shut down.
+        raise SystemExit(
+            "role 'both' runs ingest in the web process and needs web_workers: 1; "
+            "run 'python run.py --role ingest' beside 'python run.py --role web --workers N' instead"
+        )
+    os.environ[OVERRIDES_ENV] = json.dumps(overrides)
     setup_logging(config.logs_folder / "app.log")
 
-    db = Database(config.db_path)
+    db = build_database(config)
     db.create_tables()
 
-    observer, handler = start_watcher(config, db)
-    app = create_app(config, db)
-    app.state.certificate_handler = handler
+    # The web stack is only loaded where this process serves it: not for
+    # role ingest, and not for web_workers > 1, where each worker builds its own.
+    app: FastAPI | None = None
+    if config.role != "ingest" and config.web_workers == 1:
+        from app.api import create_app
+
+        app = create_app(config, db)
+    watchers: list = []
+
+    def start_ingest() -> None:
+        # Importing the parser stack and scheduling the watch happen off the
+        # main thread so the dashboard starts serving immediately.
+        try:
+            from app.watcher import start_watcher
+
+            if db.calibration_intervals_changed():
+                db.refresh_due_dates()
+            if db.organization_rules_changed():
+                threading.Thread(
+                    target=db.reclassify_organizations,
+                    args=(config.organization_reclassify_batch_size,),
+                    name="gasdock-reclassify",
+                    daemon=True,
+                ).start()
+            observer, handler, scheduler, retrier = start_watcher(config, db)
+            watchers.append((observer, scheduler, handler, retrier))
+            if app is not None:
+                app.state.certificate_handler = handler
+                app.state.ingest_scheduler = scheduler
+                app.state.quarantine_retrier = retrier
+        finally:
+            # Endpoints that need the handler wait for this instead of building their own.
+            if app is not None:
+                app.state.ingest_ready.set()
+
+    if config.role != "web":
+        if app is not None:
+            app.state.ingest_ready = threading.Event()
+        threading.Thread(target=start_ingest, name="gasdock-watcher-start", daemon=True).start()
 
     stop_event = threading.Event()
 
     def shutdown_handler(*_: object) -> None:
-        if observer.is_alive():
-            observer.stop()
-            observer.join(timeout=5)
+        for observer, scheduler, handler, retrier in watchers:
+            if observer.is_alive():
+                observer.stop()
+                observer.join(timeout=5)
+            retrier.stop()
+            scheduler.stop()
+            handler.close()
         stop_event.set()
 
     signal.signal(signal.SIGINT, shutdown_handler)
     signal.signal(signal.SIGTERM, shutdown_handler)
 
-    uvicorn.run(app, host=config.host, port=config.port)
+    if config.role == "ingest":
+        # Poll so Ctrl+C still reaches the handler on Windows.
+        while not stop_event.wait(1.0):
+            pass
+    elif app is None:
+        import uvicorn
+
+        # Each worker builds its own app and engines through web_app(), with the
+        # same overrides; they see ingest writes through the shared data_versions table.
+        uvicorn.run("run:web_app", factory=True, host=config.host, port=config.port, workers=config.web_workers)
+    else:
+        import uvicorn
+
+        uvicorn.run(app, host=config.host, port=config.port)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -6,11 +6,13 @@
   const totalDevicesValue = document.getElementById('total-devices-value');
   const totalTestsValue = document.getElementById('total-tests-value');
   const failuresLast7DaysValue = document.getElementById('failures-last-7-days-value');
+  const calibrationOverdueValue = document.getElementById('calibration-overdue-value');
+  const calibrationDueSoonValue = document.getElementById('calibration-due-soon-value');
   const latestStatusTableBody = document.getElementById('latest-status-table-body');
-  const recentFailuresTableBody = document.getElementById('recent-failures-table-body');
-  const latestStatusPrevButton = document.getElementById('latest-status-prev-page');
-  const latestStatusNextButton = document.getElementById('latest-status-next-page');
+  const latestStatusViewport = document.getElementById('latest-status-viewport');
+  const latestStatusSearch = document.getElementById('latest-status-search');
   const latestStatusPageIndicator = document.getElementById('latest-status-page-indicator');
+  const recentFailuresTableBody = document.getElementById('recent-failures-table-body');
   const recentFailuresPrevButton = document.getElementById('recent-failures-prev-page');
   const recentFailuresNextButton = document.getElementById('recent-failures-next-page');
   const recentFailuresPageIndicator = document.getElementById('recent-failures-page-indicator');
@@ -35,10 +37,16 @@
   const importOnceFeedback = document.getElementById('import-once-feedback');
   const exportNavLink = document.querySelector('.app-nav__item[href="/export.zip"]');
 
-  if (!filtersForm || !latestStatusTableBody || !recentFailuresTableBody) {
+  if (!filtersForm || !latestStatusTableBody || !latestStatusViewport || !recentFailuresTableBody) {
     return;
   }
 
+  const deviceRowHeightFallback = 42;
+  const deviceOverscanRows = 10;
+  const devicePageSize = 200;
+  const deviceSearchDelayMs = 200;
+  const deviceColumns = ['serial', 'barcode', 'organization', 'device_type', 'last_tested_at', 'last_result'];
+
   const feedbackTimeouts = new Map();
 
   const defaultLivePreferences = {
@@ -220,11 +228,6 @@
   }
 
   const paginationState = {
-    latestStatus: {
-      currentPage: 1,
-      pageSize: 10,
-      totalRows: 0
-    },
     recentFailures: {
       currentPage: 1,
       pageSize: 10,
@@ -294,36 +297,321 @@
     return cell;
   }
 
-  function updateDevices(devices, totalRows) {
-    const state = paginationState.latestStatus;
-    state.totalRows = Number.isFinite(totalRows) ? totalRows : devices.length;
-    updatePaginationControls(state, latestStatusPrevButton, latestStatusNextButton, latestStatusPageIndicator);
+  // The device table is virtualized: only the rows inside the scrolled
+  // viewport (plus overscan) exist in the DOM, between two spacer rows that
+  // keep the scrollbar honest. Rows are keyed by serial and only rewritten
+  // when their data changes. Up to dashboard_client_rows devices arrive with
+  // /api/dashboard and are searched and sorted in memory ("client" mode);
+  // beyond that the server sorts and searches and /api/devices returns
+  // windows of devicePageSize rows ("server" mode).
+  const deviceTable = {
+    mode: 'client',
+    allRows: [],
+    view: [],
+    pages: new Map(),
+    pending: new Set(),
+    generation: 0,
+    total: 0,
+    search: '',
+    sort: { key: 'last_tested_at', direction: 'desc' },
+    rendered: new Map(),
+    rowHeight: deviceRowHeightFallback,
+    rowHeightMeasured: false,
+    frame: 0,
+    searchTimer: 0
+  };
 
-    latestStatusTableBody.replaceChildren();
-    const pageDevices = getPageRows(devices, state);
-    const fragment = document.createDocumentFragment();
-    for (const device of pageDevices) {
-      const row = document.createElement('tr');
-      const result = device.last_result || 'UNKNOWN';
-      const serialLink = document.createElement('a');
-      serialLink.href = `/device/${device.serial}`;
-      serialLink.textContent = device.serial;
-      row.appendChild(createCell(serialLink, 'col-serial'));
-      row.appendChild(createCell(textOrDash(device.barcode), 'truncate'));
-      row.appendChild(createCell(textOrDash(device.organization), 'truncate'));
-      row.appendChild(createCell(textOrDash(device.device_type), 'truncate'));
-      row.appendChild(createCell(formatDate(device.last_tested_at), 'col-date'));
-      row.appendChild(createCell(result, `col-result ${result.toLowerCase()}`));
+  function createSpacerRow() {
+    const row = document.createElement('tr');
+    row.className = 'table-spacer';
+    row.setAttribute('aria-hidden', 'true');
+    const cell = document.createElement('td');
+    cell.colSpan = deviceColumns.length + 1;
+    row.appendChild(cell);
+    return row;
+  }
+
+  const topSpacerRow = createSpacerRow();
+  const bottomSpacerRow = createSpacerRow();
+
+  function deviceSignature(device) {
+    return deviceColumns.map((column) => device[column] ?? '').join('\u0001');
+  }
+
+  function fillDeviceRow(row, device) {
+    const result = device.last_result || 'UNKNOWN';
+    const serialLink = document.createElement('a');
+    serialLink.href = `/device/${device.serial}`;
+    serialLink.textContent = device.serial;
+
+    const actionButton = document.createElement('button');
+    actionButton.type = 'button';
+    actionButton.className = 'button button-danger js-delete-device';
+    actionButton.dataset.serial = device.serial;
+    actionButton.textContent = 'Delete';
+
+    row.className = '';
+    row.dataset.serial = device.serial;
+    row.replaceChildren(
+      createCell(serialLink, 'col-serial'),
+      createCell(textOrDash(device.barcode), 'truncate'),
+      createCell(textOrDash(device.organization), 'truncate'),
+      createCell(textOrDash(device.device_type), 'truncate'),
+      createCell(formatDate(device.last_tested_at), 'col-date'),
+      createCell(result, `col-result ${result.toLowerCase()}`),
+      createCell(actionButton)
+    );
+  }
+
+  function createLoadingRow() {
+    const row = document.createElement('tr');
+    row.className = 'is-loading';
+    const cell = createCell('Loading…');
+    cell.colSpan = deviceColumns.length + 1;
+    row.appendChild(cell);
+    return row;
+  }
+
+  function compareDevices(a, b) {
+    // Same order as the server: nulls last in both directions, serial breaks ties.
+    const { key, direction } = deviceTable.sort;
+    const left = a[key] ?? null;
+    const right = b[key] ?? null;
+    if (left !== right) {
+      if (left === null) return 1;
+      if (right === null) return -1;
+      return (left < right ? -1 : 1) * (direction === 'desc' ? -1 : 1);
+    }
+    return a.serial < b.serial ? -1 : a.serial > b.serial ? 1 : 0;
+  }
+
+  function matchesDeviceSearch(device, query) {
+    if (!query) return true;
+    return ['serial', 'barcode', 'organization', 'device_type'].some((column) =>
+      String(device[column] ?? '').toLowerCase().includes(query)
+    );
+  }
+
+  function rebuildClientView() {
+    const query = deviceTable.search.toLowerCase();
+    deviceTable.view = deviceTable.allRows.filter((device) => matchesDeviceSearch(device, query)).sort(compareDevices);
+    deviceTable.total = deviceTable.view.length;
+  }
+
+  function devicePageParams(pageIndex) {
+    const params = new URLSearchParams(getQueryString());
+    if (deviceTable.search) params.set('q', deviceTable.search);
+    params.set('sort', deviceTable.sort.key);
+    params.set('order', deviceTable.sort.direction);
+    params.set('offset', String(pageIndex * devicePageSize));
+    params.set('limit', String(devicePageSize));
+    return params;
+  }
+
+  async function fetchDevicePage(pageIndex) {
+    const generation = deviceTable.generation;
+    const pendingKey = `${generation}:${pageIndex}`;
+    if (deviceTable.pending.has(pendingKey)) return;
+    deviceTable.pending.add(pendingKey);
+    try {
+      const response = await fetch(`/api/devices?${devicePageParams(pageIndex)}`, { headers: { Accept: 'application/json' } });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      const payload = await response.json();
+      if (generation !== deviceTable.generation || deviceTable.mode !== 'server') return;
+      deviceTable.total = payload.total;
+      deviceTable.pages.set(pageIndex, { generation, rows: payload.rows });
+      scheduleDeviceRender();
+    } catch (_error) {
+      updateLiveStatus();
+    } finally {
+      deviceTable.pending.delete(pendingKey);
+    }
+  }
+
+  function deviceAt(index) {
+    if (deviceTable.mode === 'client') return deviceTable.view[index];
+    const pageIndex = Math.floor(index / devicePageSize);
+    const page = deviceTable.pages.get(pageIndex);
+    // Stale pages stay on screen until their refreshed rows arrive.
+    if (!page || page.generation !== deviceTable.generation) fetchDevicePage(pageIndex);
+    return page ? page.rows[index % devicePageSize] : undefined;
+  }
+
+  function visibleDeviceRange(overscan) {
+    const { rowHeight, total } = deviceTable;
+    const scrollTop = latestStatusViewport.scrollTop;
+    const height = latestStatusViewport.clientHeight || rowHeight * 15;
+    return [
+      Math.min(total, Math.max(0, Math.floor(scrollTop / rowHeight) - overscan)),
+      Math.min(total, Math.ceil((scrollTop + height) / rowHeight) + overscan)
+    ];
+  }
+
+  function renderDeviceWindow() {
+    const [first, last] = visibleDeviceRange(deviceOverscanRows);
+    const rendered = new Map();
+    const nodes = [topSpacerRow];
+    for (let index = first; index < last; index += 1) {
+      const device = deviceAt(index);
+      if (!device) {
+        nodes.push(createLoadingRow());
+        continue;
+      }
+      const signature = deviceSignature(device);
+      const existing = rendered.has(device.serial) ? null : deviceTable.rendered.get(device.serial);
+      const row = existing ? existing.row : document.createElement('tr');
+      if (!existing || existing.signature !== signature) {
+        fillDeviceRow(row, device);
+      }
+      if (!rendered.has(device.serial)) {
+        rendered.set(device.serial, { row, signature });
+      }
+      nodes.push(row);
+    }
+    nodes.push(bottomSpacerRow);
+    deviceTable.rendered = rendered;
+    topSpacerRow.firstChild.style.height = `${first * deviceTable.rowHeight}px`;
+    bottomSpacerRow.firstChild.style.height = `${Math.max(0, deviceTable.total - last) * deviceTable.rowHeight}px`;
+
+    // Move or insert only rows that are out of place; untouched rows keep their DOM.
+    let cursor = latestStatusTableBody.firstChild;
+    for (const node of nodes) {
+      if (node === cursor) {
+        cursor = cursor.nextSibling;
+      } else {
+        latestStatusTableBody.insertBefore(node, cursor);
+      }
+    }
+    while (cursor) {
+      const next = cursor.nextSibling;
+      cursor.remove();
+      cursor = next;
+    }
 
-      const actionButton = document.createElement('button');
-      actionButton.type = 'button';
-      actionButton.className = 'button button-danger js-delete-device';
-      actionButton.dataset.serial = device.serial;
-      actionButton.textContent = 'Delete';
-      row.appendChild(createCell(actionButton));
-      fragment.appendChild(row);
+    if (!deviceTable.rowHeightMeasured && rendered.size) {
+      const measured = rendered.values().next().value.row.getBoundingClientRect().height;
+      if (measured > 0) {
+        deviceTable.rowHeightMeasured = true;
+        if (Math.abs(measured - deviceTable.rowHeight) > 0.5) {
+          deviceTable.rowHeight = measured;
+          scheduleDeviceRender();
+        }
+      }
+    }
+    updateDeviceCount();
+  }
+
+  function scheduleDeviceRender() {
+    if (deviceTable.frame) return;
+    deviceTable.frame = window.requestAnimationFrame(() => {
+      deviceTable.frame = 0;
+      renderDeviceWindow();
+    });
+  }
+
+  function updateDeviceCount() {
+    if (!latestStatusPageIndicator) return;
+    const [first, last] = visibleDeviceRange(0);
+    latestStatusPageIndicator.textContent = deviceTable.total
+      ? `${first + 1}–${last} of ${deviceTable.total} devices`
+      : 'No devices';
+  }
+
+  function updateSortIndicators() {
+    for (const header of latestStatusViewport.querySelectorAll('thead th[data-sort]')) {
+      const active = header.dataset.sort === deviceTable.sort.key;
+      if (active) {
+        header.setAttribute('aria-sort', deviceTable.sort.direction === 'asc' ? 'ascending' : 'descending');
+      } else {
+        header.removeAttribute('aria-sort');
+      }
+    }
+  }
+
+  function resetDeviceWindow() {
+    deviceTable.generation += 1;
+    deviceTable.pages.clear();
+    latestStatusViewport.scrollTop = 0;
+  }
+
+  function applyDeviceQuery() {
+    resetDeviceWindow();
+    if (deviceTable.mode === 'client') {
+      rebuildClientView();
     }
-    latestStatusTableBody.appendChild(fragment);
+    scheduleDeviceRender();
+  }
+
+  function updateDevices(payload) {
+    const mode = payload.devices_mode === 'server' ? 'server' : 'client';
+    if (mode !== deviceTable.mode) {
+      deviceTable.pages.clear();
+    }
+    deviceTable.mode = mode;
+    if (mode === 'client') {
+      deviceTable.allRows = payload.devices || [];
+      rebuildClientView();
+    } else {
+      deviceTable.allRows = [];
+      deviceTable.view = [];
+      // Refetch visible windows lazily; stale rows stay until replaced.
+      deviceTable.generation += 1;
+      if (!deviceTable.search && Number.isFinite(payload.totals?.devices)) {
+        deviceTable.total = payload.totals.devices;
+      }
+    }
+    scheduleDeviceRender();
+    document.dispatchEvent(new CustomEvent('dashboard:device-summary', { detail: payload.device_summary }));
+  }
+
+  function deviceRowsForExport() {
+    const rows = [['Serial', 'Barcode', 'Organization', 'Device Type', 'Last Tested', 'Last Result']];
+    let devices;
+    if (deviceTable.mode === 'client') {
+      devices = deviceTable.view;
+    } else {
+      const [first, last] = visibleDeviceRange(deviceOverscanRows);
+      devices = [];
+      for (let index = first; index < last; index += 1) {
+        const device = deviceAt(index);
+        if (device) devices.push(device);
+      }
+    }
+    for (const device of devices) {
+      rows.push(deviceColumns.map((column) => device[column] ?? ''));
+    }
+    return rows;
+  }
+
+  window.GasDockDeviceTable = { rowsForExport: deviceRowsForExport };
+
+  latestStatusViewport.addEventListener('scroll', scheduleDeviceRender, { passive: true });
+  window.addEventListener('resize', scheduleDeviceRender);
+
+  for (const header of latestStatusViewport.querySelectorAll('thead th[data-sort]')) {
+    header.classList.add('sortable-header');
+    header.title = 'Click to sort';
+    header.addEventListener('click', () => {
+      const key = header.dataset.sort;
+      if (deviceTable.sort.key === key) {
+        deviceTable.sort.direction = deviceTable.sort.direction === 'asc' ? 'desc' : 'asc';
+      } else {
+        deviceTable.sort = { key, direction: key === 'last_tested_at' ? 'desc' : 'asc' };
+      }
+      updateSortIndicators();
+      applyDeviceQuery();
+    });
+  }
+  updateSortIndicators();
+
+  if (latestStatusSearch) {
+    latestStatusSearch.addEventListener('input', () => {
+      window.clearTimeout(deviceTable.searchTimer);
+      deviceTable.searchTimer = window.setTimeout(() => {
+        deviceTable.search = latestStatusSearch.value.trim();
+        applyDeviceQuery();
+      }, deviceSearchDelayMs);
+    });
   }
 
   function updateRecentFailures(failures, totalRows) {
@@ -364,7 +652,11 @@
       totalDevicesValue.textContent = String(payload.stats.total_devices);
       totalTestsValue.textContent = String(payload.stats.total_tests);
       failuresLast7DaysValue.textContent = String(payload.failures_last_7_days);
-      updateDevices(payload.devices || [], payload.totals?.devices);
+      if (payload.calibration_due) {
+        calibrationOverdueValue.textContent = String(payload.calibration_due.overdue);
+        calibrationDueSoonValue.textContent = String(payload.calibration_due.due_soon);
+      }
+      updateDevices(payload);
       updateRecentFailures(payload.recent_failures || [], payload.totals?.recent_failures);
       updateLiveStatus(new Date());
     } catch (_error) {
@@ -404,7 +696,6 @@
     if (!serial || !window.confirm(`Delete device ${serial} and all its results?`)) return;
     try {
       await deleteDevice(serial);
-      paginationState.latestStatus.totalRows = Math.max(0, paginationState.latestStatus.totalRows - 1);
       await refreshDashboard();
       showFeedback(filtersFeedback, `Device ${serial} deleted successfully.`, 'success', 3000);
     } catch (_error) {
@@ -418,12 +709,6 @@
     refreshDashboard();
   }
 
-  if (latestStatusPrevButton) {
-    latestStatusPrevButton.addEventListener('click', () => changePage('latestStatus', -1));
-  }
-  if (latestStatusNextButton) {
-    latestStatusNextButton.addEventListener('click', () => changePage('latestStatus', 1));
-  }
   if (recentFailuresPrevButton) {
     recentFailuresPrevButton.addEventListener('click', () => changePage('recentFailures', -1));
   }
@@ -439,7 +724,7 @@
       showFeedback(filtersFeedback, 'Please fix the date range before applying filters.', 'error');
       return;
     }
-    paginationState.latestStatus.currentPage = 1;
+    resetDeviceWindow();
     paginationState.recentFailures.currentPage = 1;
     refreshDashboard();
     showFeedback(filtersFeedback, 'Filters applied.', 'success', 2500);
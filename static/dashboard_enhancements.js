@@ -110,82 +110,51 @@
     });
   }
 
-  function parseStatus(text) {
-    return String(text || '').trim().toUpperCase();
-  }
+  let renderedOrganizations = '';
 
-  function refreshSummaryCards() {
-    const rows = Array.from(latestBody.querySelectorAll('tr'));
-    if (!rows.length) {
-      if (passRateValue) passRateValue.textContent = '-';
-      if (unknownDevicesValue) unknownDevicesValue.textContent = '-';
-      if (organizationBreakdownList) organizationBreakdownList.replaceChildren();
-      return;
+  // Cards come from the server-side aggregate over every filtered device,
+  // not from whichever table rows happen to be rendered.
+  function refreshSummaryCards(summary) {
+    if (!summary) return;
+    if (passRateValue) {
+      passRateValue.textContent = summary.pass_rate === null ? '-' : `${summary.pass_rate}%`;
+    }
+    if (unknownDevicesValue) {
+      unknownDevicesValue.textContent = String(summary.unknown);
     }
 
-    let passCount = 0;
-    let consideredCount = 0;
-    let unknownCount = 0;
-    const orgCounts = new Map();
-
-    for (const row of rows) {
-      const cells = row.querySelectorAll('td');
-      const organization = (cells[2]?.textContent || '-').trim() || '-';
-      const result = parseStatus(cells[5]?.textContent);
-      orgCounts.set(organization, (orgCounts.get(organization) || 0) + 1);
+    const organizations = summary.organizations || [];
+    const signature = JSON.stringify(organizations);
+    if (!organizationBreakdownList || signature === renderedOrganizations) return;
+    renderedOrganizations = signature;
 
-      if (result === 'UNKNOWN') {
-        unknownCount += 1;
-      }
-      if (result === 'PASS' || result === 'FAIL') {
-        consideredCount += 1;
-        if (result === 'PASS') passCount += 1;
-      }
-    }
+    const maxCount = organizations[0]?.devices || 1;
+    const items = organizations.map(({ organization, devices }) => {
+      const item = document.createElement('div');
+      item.className = 'org-breakdown__item';
 
-    const passRate = consideredCount > 0 ? Math.round((passCount / consideredCount) * 1000) / 10 : 0;
+      const name = document.createElement('span');
+      name.className = 'org-breakdown__label';
+      name.textContent = organization || '-';
 
-    if (passRateValue) {
-      passRateValue.textContent = `${passRate}%`;
-    }
-    if (unknownDevicesValue) {
-      unknownDevicesValue.textContent = String(unknownCount);
-    }
+      const value = document.createElement('span');
+      value.className = 'org-breakdown__value';
+      value.textContent = String(devices);
 
-    if (organizationBreakdownList) {
-      organizationBreakdownList.replaceChildren();
-      const sorted = Array.from(orgCounts.entries()).sort((a, b) => b[1] - a[1]);
-      for (const [org, count] of sorted) {
-        const item = document.createElement('div');
-        item.className = 'org-breakdown__item';
-
-        const name = document.createElement('span');
-        name.className = 'org-breakdown__label';
-        name.textContent = org;
-
-        const value = document.createElement('span');
-        value.className = 'org-breakdown__value';
-        value.textContent = String(count);
-
-        const bar = document.createElement('div');
-        bar.className = 'org-breakdown__bar';
-        const maxCount = sorted[0]?.[1] || 1;
-        bar.style.width = `${Math.max(8, (count / maxCount) * 100)}%`;
-
-        item.appendChild(name);
-        item.appendChild(value);
-        item.appendChild(bar);
-        organizationBreakdownList.appendChild(item);
-      }
-    }
-  }
+      const bar = document.createElement('div');
+      bar.className = 'org-breakdown__bar';
+      bar.style.width = `${Math.max(8, (devices / maxCount) * 100)}%`;
 
-  if (latestSearch) {
-    latestSearch.addEventListener('input', () => {
-      filterTableRows(latestBody, latestSearch.value.trim());
+      item.appendChild(name);
+      item.appendChild(value);
+      item.appendChild(bar);
+      return item;
     });
+    organizationBreakdownList.replaceChildren(...items);
   }
 
+  document.addEventListener('dashboard:device-summary', (event) => refreshSummaryCards(event.detail));
+
   if (recentSearch) {
     recentSearch.addEventListener('input', () => {
       filterTableRows(recentBody, recentSearch.value.trim());
@@ -194,7 +163,8 @@
 
   if (latestExportButton) {
     latestExportButton.addEventListener('click', () => {
-      const rows = getVisibleRowsData(latestBody);
+      // The device table is virtualized; ask it for the listed rows instead of reading the DOM.
+      const rows = window.GasDockDeviceTable ? window.GasDockDeviceTable.rowsForExport() : getVisibleRowsData(latestBody);
       downloadCsv('latest-status-visible.csv', rows);
     });
   }
@@ -206,25 +176,17 @@
     });
   }
 
+  // Recent failures is a short, paged list, so it keeps in-DOM search and sort.
   const observer = new MutationObserver(() => {
-    refreshSummaryCards();
-    if (latestSearch?.value) {
-      filterTableRows(latestBody, latestSearch.value.trim());
-    }
     if (recentSearch?.value) {
       filterTableRows(recentBody, recentSearch.value.trim());
     }
   });
 
-  observer.observe(latestBody, { childList: true, subtree: true });
-  observer.observe(recentBody, { childList: true, subtree: true });
+  observer.observe(recentBody, { childList: true });
 
-
-  makeTableSortable(document.querySelector('#latest-status table'));
   makeTableSortable(document.querySelector('#recent-failures table'));
 
-  refreshSummaryCards();
-
   if (clearFiltersButton && filtersForm) {
     clearFiltersButton.addEventListener('click', () => {
       for (const element of filtersForm.elements) {
@@ -0,0 +1,117 @@
+import os
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import blobstore, parser, watcher
+from app.api import create_app
+from app.blobstore import BlobStore
+from app.config import AppConfig
+from app.database import Database
+from app.models import TestRecord as DbTestRecord
+
+
+@pytest.fixture()
+def setup(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(
+        import_folder=tmp_path / "imports",
+        sorted_folder=tmp_path / "sorted",
+        quarantine_folder=tmp_path / "quarantine",
+        logs_folder=tmp_path / "logs",
+        blob_folder=tmp_path / "blobs",
+        storage_mode="content",
+    )
+    config.import_folder.mkdir()
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "PASS", None), "text"))
+    return db, config
+
+
+def ingest(config: AppConfig, db: Database, name: str, payload: bytes = b"%PDF-same-bytes") -> None:
+    source = config.import_folder / name
+    source.write_bytes(payload)
+    assert watcher.CertificateHandler(config, db).process_file(source) is True
+
+
+def test_duplicate_certificates_share_one_blob_linked_into_sorted_tree(setup) -> None:
+    db, config = setup
+    ingest(config, db, "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf")
+    ingest(config, db, "20260301_09_00_00_8323918ARRJ3291_Calibration_EN.pdf")
+
+    blobs = list(config.blob_folder.rglob("*.pdf"))
+    assert len(blobs) == 1
+    blob = blobs[0]
+    assert blob.relative_to(config.blob_folder).parts[:2] == (blob.stem[:2], blob.stem[2:4])
+    assert blob.stat().st_nlink == 3
+
+    with db._session_maker() as session:
+        records = session.query(DbTestRecord).order_by(DbTestRecord.id).all()
+    assert {record.file_path for record in records} == {str(blob)}
+    browse = config.sorted_folder / "PASS" / "2026" / "02" / "24" / "ARRJ3290" / "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
+    assert records[0].browse_path == str(browse)
+    assert os.path.samefile(browse, blob)
+    assert not list(config.import_folder.iterdir())
+
+
+def test_deleting_last_reference_removes_blob_and_browse_link(setup) -> None:
+    db, config = setup
+    ingest(config, db, "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf")
+    ingest(config, db, "20260301_09_00_00_8323918ARRJ3291_Calibration_EN.pdf")
+    [blob] = config.blob_folder.rglob("*.pdf")
+    client = TestClient(create_app(config, db))
+
+    assert client.delete("/api/devices/ARRJ3290").status_code == 200
+    assert blob.exists()
+    assert not list((config.sorted_folder / "PASS" / "2026" / "02" / "24" / "ARRJ3290").glob("*.pdf"))
+    assert len(list(config.sorted_folder.rglob("*.pdf"))) == 1
+
+    with db._session_maker() as session:
+        test_id = session.query(DbTestRecord.id).scalar()
+    assert client.delete(f"/api/tests/{test_id}").status_code == 200
+    assert not blob.exists()
+    assert not list(config.sorted_folder.rglob("*.pdf"))
+
+
+def test_garbage_collector_removes_orphans_only(setup) -> None:
+    db, config = setup
+    ingest(config, db, "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf")
+    store = BlobStore(config.blob_folder)
+    orphan_source = config.import_folder / "orphan.pdf"
+    orphan_source.write_bytes(b"%PDF-orphan")
+    orphan_link = config.sorted_folder / "FAIL" / "orphan.pdf"
+    orphan = store.store(orphan_source, orphan_link)
+    store.unpin(orphan)  # as if its ingest stopped before committing a row
+
+    client = TestClient(create_app(config, db))
+    response = client.post("/api/blob-gc")
+
+    assert response.json() == {"ok": True, "blobs_removed": 1, "links_removed": 1, "bytes_freed": len(b"%PDF-orphan")}
+    assert not orphan.exists()
+    assert not orphan_link.exists()
+    assert len(list(config.blob_folder.rglob("*.pdf"))) == 1
+
+
+def test_release_keeps_a_blob_being_stored_again(setup) -> None:
+    db, config = setup
+    first = "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
+    ingest(config, db, first)
+    assert not blobstore._PINNED
+    [blob] = config.blob_folder.rglob("*.pdf")
+    refs = db.file_refs(serial="ARRJ3290")
+    assert db.delete_device("ARRJ3290")
+
+    # A concurrent ingest of the same bytes has linked the blob but not committed its row yet.
+    store = BlobStore(config.blob_folder)
+    source = config.import_folder / first
+    source.write_bytes(b"%PDF-same-bytes")
+    browse = Path(refs[0][1])
+    assert store.store(source, browse) == blob
+    assert store.release(db, refs) == {"blobs_removed": 0, "links_removed": 0, "bytes_freed": 0}
+    assert blob.exists() and os.path.samefile(browse, blob)
+
+    store.unpin(blob)
+    assert store.release(db, refs)["blobs_removed"] == 1
+    assert not blob.exists() and not browse.exists()
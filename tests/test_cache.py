@@ -0,0 +1,24 @@
+from app.cache import ResponseCache
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    cache = ResponseCache(max_entries=2, ttl_seconds=None)
+    first = ResponseCache.make_key("/", {"result": "PASS"}, (1, 1))
+    second = ResponseCache.make_key("/", {"result": "FAIL"}, (1, 1))
+    third = ResponseCache.make_key("/", {}, (1, 1))
+
+    cache.put(first, b"first", "text/html")
+    cache.put(second, b"second", "text/html")
+    assert cache.get(first) is not None
+    cache.put(third, b"third", "text/html")
+
+    assert cache.get(second) is None
+    assert cache.get(first).body == b"first"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+def test_response_cache_key_changes_with_data_version() -> None:
+    assert ResponseCache.make_key("/", {"a": "1"}, (1, 2)) != ResponseCache.make_key("/", {"a": "1"}, (2, 2))
+    assert ResponseCache.make_key("/", [("b", "2"), ("a", "1")], (1,)) == ResponseCache.make_key("/", {"a": "1", "b": "2"}, (1,))
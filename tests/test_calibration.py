@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.api import create_app
+from app.calibration import CalibrationSchedule
+from app.config import AppConfig
+from app.database import Database
+from app.models import Device
+
+
+def due_date(db: Database, serial: str) -> datetime | None:
+    with db._session_maker() as session:
+        return session.get(Device, serial).next_due_at
+
+
+def test_schedule_prefers_device_type_then_organization() -> None:
+    schedule = CalibrationSchedule(default_days=180, intervals={"X-am 2500": 90, "MCA": 120})
+    tested = datetime(2026, 1, 1)
+
+    assert schedule.next_due(tested, "X-am 2500", "MCA") == tested + timedelta(days=90)
+    assert schedule.next_due(tested, "Pac 6000", "MCA") == tested + timedelta(days=120)
+    assert schedule.next_due(tested, None, None) == tested + timedelta(days=180)
+    assert schedule.next_due(None, "X-am 2500", None) is None
+
+
+def test_due_date_follows_device_snapshot(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db", CalibrationSchedule(default_days=180, intervals={"MCA": 30}))
+    db.create_tables()
+    first = db.add_test_record("ARRJ0001", datetime(2026, 1, 1), "PASS", "/tmp/1.pdf")
+    assert due_date(db, "ARRJ0001") == datetime(2026, 6, 30)
+
+    second = db.add_test_record("ARRJ0001", datetime(2026, 2, 1), "PASS", "/tmp/2.pdf")
+    assert due_date(db, "ARRJ0001") == datetime(2026, 7, 31)
+
+    db.set_device_barcode("ARRJ0001", "MCA 1")
+    assert due_date(db, "ARRJ0001") == datetime(2026, 3, 3)
+
+    db.delete_test_record(second.id)
+    assert due_date(db, "ARRJ0001") == datetime(2026, 6, 30)
+
+    assert not db.calibration_intervals_changed()
+    db.calibration = CalibrationSchedule(default_days=10)
+    assert db.calibration_intervals_changed()
+    assert db.refresh_due_dates() == 1
+    assert not db.calibration_intervals_changed()
+    assert db.refresh_due_dates() == 0
+    assert due_date(db, "ARRJ0001") == first.tested_at + timedelta(days=10)
+
+
+def test_due_list_endpoint_buckets_devices(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db", CalibrationSchedule(default_days=30, due_soon_days=7))
+    db.create_tables()
+    now = datetime.now()
+    for serial, age_days, barcode in [("OVER1", 40, "AR 1"), ("OVER2", 31, None), ("SOON1", 25, "MCA 1"), ("OK1", 2, None)]:
+        db.add_test_record(serial, now - timedelta(days=age_days), "PASS", f"/tmp/{serial}.pdf", barcode=barcode)
+    client = TestClient(create_app(AppConfig(logs_folder=tmp_path / "logs"), db))
+
+    payload = client.get("/api/calibration-due").json()
+    assert payload["counts"] == {"overdue": 2, "due_soon": 1, "ok": 1}
+    assert [row["serial"] for row in payload["overdue"]] == ["OVER1", "OVER2"]
+    assert [row["serial"] for row in payload["due_soon"]] == ["SOON1"]
+    assert "ok" not in payload
+
+    ok_only = client.get("/api/calibration-due", params={"bucket": "ok"}).json()
+    assert [row["serial"] for row in ok_only["ok"]] == ["OK1"] and "overdue" not in ok_only
+    by_org = client.get("/api/calibration-due", params={"organization": "UNKNOWN"}).json()
+    assert by_org["counts"] == {"overdue": 1, "due_soon": 0, "ok": 1}
+    assert client.get("/api/dashboard").json()["calibration_due"] == {"overdue": 2, "due_soon": 1, "ok": 1}
@@ -1,8 +1,11 @@
 from datetime import datetime, timezone
 from pathlib import Path
 
+from sqlalchemy import func, select, text
+
 from app.database import Database
-from app.models import Device, TestRecord as DbTestRecord
+from app.models import Device, GasReading, TestRecord as DbTestRecord
+from app.parser import SpanReading
 
 
 def test_add_record_updates_device(tmp_path: Path) -> None:
@@ -112,3 +115,111 @@ def test_delete_device_removes_tests(tmp_path: Path) -> None:
     with db._session_maker() as session:
         assert session.get(Device, "ARRJ3290") is None
         assert session.query(DbTestRecord).filter_by(serial="ARRJ3290").count() == 0
+
+
+def test_select_record_loads_slotted_rows(tmp_path: Path) -> None:
+    from app.records import DeviceRow, TestRow, select_record, to_records
+
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    db.add_test_record(
+        serial="ARRJ3290",
+        device_type="X-am 2500",
+        tested_at=datetime(2026, 2, 24, 10, 0, 0),
+        barcode="AR 100",
+        result="FAIL",
+        file_path="old.pdf",
+        fail_reason="Span calibration failed for CO",
+    )
+
+    with db._session_maker() as session:
+        tests = to_records(TestRow, session.execute(select_record(TestRow)))
+        devices = to_records(DeviceRow, session.execute(select_record(DeviceRow)))
+
+    assert tests[0].fail_reason == "Span calibration failed for CO"
+    assert tests[0].parse_status == "ok"
+    assert not hasattr(tests[0], "__dict__")
+    assert devices == [DeviceRow("ARRJ3290", "AR 100", "AMBIPAR", "X-am 2500", datetime(2026, 2, 24, 10, 0, 0), "FAIL")]
+
+
+def test_gas_readings_are_stored_with_test_and_removed_with_it(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    readings = [SpanReading("CH4", True, 50.0, 50.4, "%LEL"), SpanReading("H2S", False, 15.0, 9.1, "ppm")]
+    first = db.add_test_record(
+        serial="ARRJ3290",
+        device_type="Dräger X-am 2500",
+        tested_at=datetime(2026, 2, 24, 10, 52, 38),
+        result="FAIL",
+        file_path="a.pdf",
+        gas_readings=readings,
+    )
+    db.add_test_record(
+        serial="ARRJ3291",
+        device_type="Dräger X-am 2500",
+        tested_at=datetime(2026, 2, 25, 10, 52, 38),
+        result="PASS",
+        file_path="b.pdf",
+        gas_readings=[SpanReading("H2S", True, 15.0, 15.2, "ppm")],
+    )
+
+    with db._session_maker() as session:
+        h2s_failures = session.execute(
+            select(DbTestRecord.device_type, func.count())
+            .join(GasReading, GasReading.test_id == DbTestRecord.id)
+            .where(GasReading.gas == "H2S", GasReading.passed.is_(False))
+            .group_by(DbTestRecord.device_type)
+        ).all()
+        assert h2s_failures == [("Dräger X-am 2500", 1)]
+        stored = session.query(GasReading).filter(GasReading.test_id == first.id).order_by(GasReading.id).all()
+        assert [(row.gas, row.passed, row.nominal, row.measured, row.unit) for row in stored] == [
+            ("CH4", True, 50.0, 50.4, "%LEL"),
+            ("H2S", False, 15.0, 9.1, "ppm"),
+        ]
+
+    assert db.delete_test_record(first.id)
+    assert db.delete_device("ARRJ3291")
+    with db._session_maker() as session:
+        assert session.query(GasReading).count() == 0
+
+
+def test_bulk_barcode_assignment_matches_single_updates(tmp_path: Path) -> None:
+    bulk = Database(tmp_path / "bulk.db")
+    single = Database(tmp_path / "single.db")
+    for db in (bulk, single):
+        db.create_tables()
+        for serial, day in [("ARRJ0001", 1), ("ARRJ0001", 2), ("ARRJ0002", 1), ("ARRJ0003", 3)]:
+            db.add_test_record(serial, datetime(2026, 3, day, 9), "PASS", f"/tmp/{serial}-{day}.pdf", barcode="MCA 7" if serial == "ARRJ0003" else None)
+
+    report = bulk.set_device_barcodes(
+        [
+            ("arrj0001", "ar 100"),
+            ("ARRJ0002", "XYZ 1"),
+            ("ARRJ0002", "MCA 5"),
+            ("ARRJ0003", "MCA 7"),
+            ("NOPE", "AR 1"),
+            ("ARRJ0001", ""),
+        ]
+    )
+    for serial, barcode in [("ARRJ0001", "AR 100"), ("ARRJ0002", "MCA 5")]:
+        single.set_device_barcode(serial, barcode)
+
+    assert [(entry["serial"], entry["status"], entry["organization"]) for entry in report] == [
+        ("ARRJ0001", "updated", "AMBIPAR"),
+        ("ARRJ0002", "duplicate", "OTHER"),
+        ("ARRJ0002", "updated", "MCA"),
+        ("ARRJ0003", "unchanged", "MCA"),
+        ("NOPE", "not_found", "AMBIPAR"),
+        ("ARRJ0001", "invalid", None),
+    ]
+
+    def snapshot(db: Database) -> tuple:
+        with db._session_maker() as session:
+            devices = session.execute(
+                select(Device.serial, Device.barcode, Device.organization, Device.next_due_at).order_by(Device.serial)
+            ).all()
+            tests = session.execute(select(DbTestRecord.id, DbTestRecord.barcode).order_by(DbTestRecord.id)).all()
+            rollups = session.execute(text("SELECT * FROM daily_rollups ORDER BY 1, 2, 3, 4")).all()
+        return devices, tests, rollups
+
+    assert snapshot(bulk) == snapshot(single)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+
+
+def test_device_history_is_paginated_with_aggregates(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    start = datetime(2025, 11, 20, 9)
+    for index in range(60):
+        failed = index in {3, 40, 41}
+        db.add_test_record(
+            "ARRJ0001",
+            start + timedelta(days=index),
+            "FAIL" if failed else "PASS",
+            f"/tmp/{index}.pdf",
+            fail_reason=("CO span" if index == 41 else "O2 span") if failed else None,
+        )
+    client = TestClient(create_app(AppConfig(logs_folder=tmp_path / "logs"), db))
+
+    first = client.get("/api/devices/arrj0001", params={"per_page": 25}).json()
+    assert (first["page"], first["pages"], len(first["tests"])) == (1, 3, 25)
+    assert first["tests"][0]["tested_at"] == (start + timedelta(days=59)).isoformat()
+    summary = first["summary"]
+    assert (summary["tests"], summary["passed"], summary["failed"], summary["pass_rate"]) == (60, 57, 3, 0.95)
+    assert summary["last_fail"]["tested_at"] == (start + timedelta(days=41)).isoformat()
+    assert summary["last_fail"]["fail_reason"] == "CO span"
+    assert summary["top_fail_reason"] == {"fail_reason": "O2 span", "tests": 2}
+    assert [month["month"] for month in summary["monthly"]] == ["2025-11", "2025-12", "2026-01"]
+    assert sum(month["tests"] for month in summary["monthly"]) == 60
+
+    last = client.get("/api/devices/ARRJ0001", params={"per_page": 25, "page": 9}).json()
+    assert (last["page"], len(last["tests"])) == (3, 10)
+    assert last["tests"][-1]["tested_at"] == start.isoformat()
+
+    db.delete_test_record(first["tests"][0]["id"] - 18)
+    summary = client.get("/api/devices/ARRJ0001").json()["summary"]
+    assert summary["last_fail"]["fail_reason"] == "O2 span" and summary["top_fail_reason"]["tests"] == 2
+
+    page = client.get("/device/ARRJ0001", params={"per_page": 25, "page": 2})
+    assert page.status_code == 200 and "Page 2 / 3" in page.text and "Pass Rate" in page.text
+    assert client.get("/api/devices/NOPE").status_code == 404
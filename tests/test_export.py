@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from zipfile import ZipFile
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import desc, select
 
@@ -334,3 +335,222 @@ def test_add_test_record_normalizes_serial_and_barcode(tmp_path: Path) -> None:
 
     assert record.serial == "ARRJ7777"
     assert record.barcode == "MCA 123"
+
+
+def test_print_certificate_supports_conditional_get_and_ranges(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+
+    certificate_path = tmp_path / "source.pdf"
+    certificate_bytes = b"%PDF-1.4\n%mock certificate body\n"
+    certificate_path.write_bytes(certificate_bytes)
+
+    row = db.add_test_record(
+        serial="ARRJ9999",
+        device_type="Drager",
+        tested_at=datetime(2026, 2, 25, 11, 0, 0),
+        result="PASS",
+        file_path=str(certificate_path),
+    )
+
+    client = TestClient(create_app(AppConfig(), db))
+
+    first = client.get(f"/print-certificate/{row.id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    cached = client.get(f"/print-certificate/{row.id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    partial = client.get(f"/print-certificate/{row.id}", headers={"Range": "bytes=0-7"})
+    assert partial.status_code == 206
+    assert partial.content == certificate_bytes[:8]
+
+
+def test_certificate_thumbnail_is_rendered_once_and_cached(tmp_path: Path) -> None:
+    import pypdfium2
+
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+
+    certificate_path = tmp_path / "source.pdf"
+    document = pypdfium2.PdfDocument.new()
+    document.new_page(200, 300)
+    document.save(certificate_path)
+
+    row = db.add_test_record(
+        serial="ARRJ9999",
+        device_type="Drager",
+        tested_at=datetime(2026, 2, 25, 11, 0, 0),
+        result="FAIL",
+        file_path=str(certificate_path),
+    )
+
+    thumbnails = tmp_path / "thumbs"
+    client = TestClient(create_app(AppConfig(thumbnails_folder=thumbnails, thumbnail_width=64), db))
+
+    response = client.get(f"/certificate-thumbnail/{row.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+    assert len(list(thumbnails.rglob("*.png"))) == 1
+
+    cached = client.get(f"/certificate-thumbnail/{row.id}", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert len(list(thumbnails.rglob("*.png"))) == 1
+
+    assert client.delete(f"/api/tests/{row.id}").status_code == 200
+    assert certificate_path.exists()
+    assert not list(thumbnails.rglob("*.png"))
+
+
+def test_failed_thumbnail_render_leaves_no_temp_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    import pypdfium2
+    from pdfplumber.display import PageImage
+
+    from app.thumbnails import ensure_thumbnail
+
+    certificate_path = tmp_path / "source.pdf"
+    document = pypdfium2.PdfDocument.new()
+    document.new_page(200, 300)
+    document.save(certificate_path)
+
+    def broken_save(self, destination, **kwargs) -> None:
+        Path(destination).write_bytes(b"\x89PNG partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(PageImage, "save", broken_save)
+    thumbnails = tmp_path / "thumbs"
+    with pytest.raises(OSError, match="disk full"):
+        ensure_thumbnail(certificate_path, thumbnails, 64)
+    assert not [path for path in thumbnails.rglob("*") if path.is_file()]
+
+
+def test_dashboard_responses_are_cached_until_data_changes(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    db.add_test_record(
+        serial="ARRJ0001",
+        device_type="X-am",
+        tested_at=datetime(2026, 2, 24, 10, 0, 0),
+        result="PASS",
+        file_path="cert.pdf",
+    )
+
+    app = create_app(AppConfig(), db)
+    client = TestClient(app)
+
+    first = client.get("/api/dashboard?result=PASS")
+    second = client.get("/api/dashboard?result=PASS")
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.json() == second.json()
+    assert client.get("/device/ARRJ0001").headers["x-cache"] == "MISS"
+
+    db.add_test_record(
+        serial="ARRJ0002",
+        device_type="X-am",
+        tested_at=datetime(2026, 2, 24, 11, 0, 0),
+        result="PASS",
+        file_path="cert.pdf",
+    )
+    refreshed = client.get("/api/dashboard?result=PASS")
+    assert refreshed.headers["x-cache"] == "MISS"
+    assert refreshed.json()["totals"]["devices"] == 2
+
+    stats = client.get("/api/cache-stats").json()["response_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_dashboard_api_gzips_large_payloads_only_when_accepted(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    for index in range(60):
+        db.add_test_record(
+            serial=f"ARRJ{index:04d}",
+            device_type="Dräger X-am 2500",
+            tested_at=datetime(2026, 2, 24, 10, 0, 0) + timedelta(minutes=index),
+            barcode=f"MCA{index:06d}",
+            result="FAIL",
+            file_path="cert.pdf",
+            fail_reason="Span calibration failed for CO",
+        )
+
+    client = TestClient(create_app(AppConfig(compression_min_bytes=1024), db))
+
+    compressed = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    payload = compressed.json()
+    assert payload["totals"]["devices"] == 60
+    assert payload["devices"][0]["last_tested_at"] == "2026-02-24T10:59:00"
+    assert payload["recent_failures"][0]["fail_reason"] == "Span calibration failed for CO"
+
+    cached = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip"})
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.headers["content-encoding"] == "gzip"
+
+    identity = client.get("/api/dashboard", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == payload
+
+
+def test_bulk_barcode_endpoint_accepts_csv_and_json(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    for serial in ("ARRJ0001", "ARRJ0002"):
+        db.add_test_record(serial, datetime(2026, 3, 1, 9), "PASS", f"/tmp/{serial}.pdf")
+    client = TestClient(create_app(AppConfig(), db))
+
+    csv_body = "Serial;Barcode\r\nARRJ0001;AR 55\r\nARRJ9999;MCA1\r\n".encode("utf-8-sig")
+    response = client.post("/api/devices/barcodes", content=csv_body, headers={"Content-Type": "text/csv"})
+    assert response.json()["counts"] == {"updated": 1, "not_found": 1}
+
+    response = client.post("/api/devices/barcodes", json=[{"serial": "ARRJ0002", "barcode": "012 3"}])
+    assert response.json()["rows"] == [
+        {"row": 1, "serial": "ARRJ0002", "barcode": "012 3", "organization": "MCA", "status": "updated"}
+    ]
+    assert client.post("/api/devices/barcodes", json={"ARRJ0001": "AR 55"}).json()["counts"] == {"unchanged": 1}
+    assert client.post("/api/devices/barcodes", content=b"{", headers={"Content-Type": "application/json"}).status_code == 400
+
+
+def test_device_table_switches_to_server_windows_when_large(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    for index in range(12):
+        db.add_test_record(
+            serial=f"ARRJ{index:04d}",
+            device_type="Pac 6000" if index % 3 else "X-am 2500",
+            tested_at=datetime(2026, 2, 1) + timedelta(hours=index % 5),
+            barcode=["AR 1", "MCA 2", None][index % 3],
+            result="FAIL" if index % 4 == 0 else "PASS",
+            file_path=f"{index}.pdf",
+        )
+    db.add_test_record(serial="ARRJ0100", tested_at=datetime(2026, 2, 2), result="UNKNOWN", file_path="u.pdf")
+
+    small = TestClient(create_app(AppConfig(dashboard_client_rows=50), db)).get("/api/dashboard").json()
+    assert small["devices_mode"] == "client" and len(small["devices"]) == small["totals"]["devices"] == 13
+    assert small["device_summary"]["pass_rate"] == round(9 / 12 * 100, 1)
+    assert small["device_summary"]["unknown"] == 1
+    assert small["device_summary"]["organizations"][0] == {"organization": None, "devices": 5}
+
+    client = TestClient(create_app(AppConfig(dashboard_client_rows=5), db))
+    large = client.get("/api/dashboard").json()
+    assert large["devices_mode"] == "server" and large["devices"] == []
+    assert large["totals"]["devices"] == large["device_summary"]["devices"] == 13
+    assert client.get("/api/dashboard", params={"organization": "AMBIPAR"}).json()["devices_mode"] == "client"
+
+    first = client.get("/api/devices", params={"sort": "last_tested_at", "order": "desc", "limit": 5}).json()
+    second = client.get("/api/devices", params={"sort": "last_tested_at", "order": "desc", "offset": 5, "limit": 10}).json()
+    ordered = first["rows"] + second["rows"]
+    assert first["total"] == 13 and len(ordered) == 13
+    assert ordered == sorted(ordered, key=lambda row: (-datetime.fromisoformat(row["last_tested_at"]).timestamp(), row["serial"]))
+
+    searched = client.get("/api/devices", params={"q": "mca", "sort": "serial", "order": "asc"}).json()
+    assert searched["total"] == 4
+    assert [row["serial"] for row in searched["rows"]] == ["ARRJ0001", "ARRJ0004", "ARRJ0007", "ARRJ0010"]
+    by_barcode = client.get("/api/devices", params={"sort": "barcode", "order": "desc"}).json()["rows"]
+    assert by_barcode[-1]["barcode"] is None and by_barcode[0]["barcode"] == "MCA 2"
+    assert client.get("/api/devices", params={"sort": "file_path"}).status_code == 422
@@ -0,0 +1,254 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app import parser, watcher
+from app.config import AppConfig, ImportSource
+from app.database import Database
+from app.ingest_queue import COMMITTED, MOVED, PARSING, QUARANTINED, IngestQueue
+from app.models import TestRecord as DbTestRecord
+from app.scheduler import IngestScheduler
+from app.sorter import sorted_target
+
+
+@pytest.fixture()
+def setup(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(
+        import_folder=tmp_path / "imports",
+        sorted_folder=tmp_path / "sorted",
+        quarantine_folder=tmp_path / "quarantine",
+        logs_folder=tmp_path / "logs",
+    )
+    config.import_folder.mkdir()
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "PASS", None), "text"))
+    return db, config
+
+
+def certificate(config: AppConfig, serial: str, second: int = 38) -> Path:
+    path = config.import_folder / f"20260224_10_52_{second:02d}_8323918{serial}_Calibration_EN.pdf"
+    path.write_text("dummy")
+    return path
+
+
+def test_enqueue_dedupes_and_claims_batches_with_leases(setup) -> None:
+    db, config = setup
+    queue = IngestQueue(db, lease_seconds=300)
+    first = certificate(config, "ARRJ0001")
+    assert queue.enqueue("default", first) == queue.enqueue("default", first)
+    for index in range(2, 6):
+        queue.enqueue("default", certificate(config, f"ARRJ000{index}", second=index))
+
+    batch = queue.claim("default", 3)
+    assert [Path(item.path).name for item in batch][0] == first.name
+    assert len(batch) == 3
+    assert len(queue.claim("default", 10)) == 2
+    assert queue.claim("default", 10) == []
+    assert IngestQueue(db).claim("default", 10) == []
+
+
+def test_expired_leases_can_be_taken_over(setup) -> None:
+    db, config = setup
+    for index in range(1, 4):
+        IngestQueue(db).enqueue("default", certificate(config, f"ARRJ000{index}", second=index))
+
+    stalled = IngestQueue(db, lease_seconds=-1)
+    assert len(stalled.claim("default", 10)) == 3
+    taken_over = IngestQueue(db).claim("default", 10)
+    assert [item.attempts for item in taken_over] == [2, 2, 2]
+
+
+def test_restart_resumes_item_moved_before_commit(setup) -> None:
+    db, config = setup
+    source = certificate(config, "ARRJ3290")
+    queue = IngestQueue(db)
+    queue.enqueue("default", source)
+    [item] = queue.claim("default", 10)
+
+    # Simulate a crash between the move and the DB commit.
+    target = sorted_target(source, config.sorted_folder, "PASS", ("2026", "02", "24"), "ARRJ3290")
+    queue.advance(item, PARSING, destination=target)
+    target.parent.mkdir(parents=True)
+    source.rename(target)
+
+    restarted = IngestQueue(db)
+    assert restarted.recover() == {"released": 1, "resumed_moved": 1, "restarted": 0, "purged": 0}
+    [resumed] = restarted.claim("default", 10)
+    assert resumed.state == MOVED
+
+    assert watcher.CertificateHandler(config, db, restarted).process_item(resumed) is True
+    assert restarted.counts() == {COMMITTED: 1}
+    with db._session_maker() as session:
+        [record] = session.query(DbTestRecord).all()
+    assert record.file_path == str(target)
+    assert record.serial == "ARRJ3290"
+
+
+def test_restart_requeues_item_whose_move_never_happened(setup) -> None:
+    db, config = setup
+    source = certificate(config, "ARRJ3290")
+    queue = IngestQueue(db)
+    queue.enqueue("default", source)
+    [item] = queue.claim("default", 10)
+    queue.advance(item, PARSING, destination=config.sorted_folder / "never" / source.name)
+
+    assert queue.recover()["restarted"] == 1
+    [again] = queue.claim("default", 10)
+    assert again.state == "pending"
+    assert again.destination is None
+    assert again.attempts == 2
+
+
+def test_scheduler_drains_durable_queue_and_quarantines_failures(setup) -> None:
+    db, config = setup
+    queue = IngestQueue(db)
+    # Left over from a previous run that stopped before claiming it.
+    queue.enqueue("default", certificate(config, "ARRJ0001", second=1))
+
+    handler = watcher.CertificateHandler(config, db, queue)
+    sources = [ImportSource(name="default", folder=config.import_folder)]
+    scheduler = IngestScheduler(sources, handler.process_item, workers=2, queue=queue, batch_size=2)
+    scheduler.start()
+    for index in range(2, 5):
+        scheduler.submit("default", certificate(config, f"ARRJ000{index}", second=index))
+    bad = config.import_folder / "not_a_certificate.pdf"
+    bad.write_text("dummy")
+    scheduler.submit("default", bad)
+
+    deadline = time.monotonic() + 5
+    while queue.counts().get(COMMITTED, 0) + queue.counts().get(QUARANTINED, 0) < 5:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    scheduler.stop()
+
+    assert queue.counts() == {COMMITTED: 4, QUARANTINED: 1}
+    assert (config.quarantine_folder / bad.name).exists()
+    assert not list(config.import_folder.iterdir())
+
+
+def test_commit_failure_after_move_keeps_item_moved_for_retry(setup, monkeypatch: pytest.MonkeyPatch) -> None:
+    db, config = setup
+    source = certificate(config, "ARRJ3290")
+    queue = IngestQueue(db, lease_seconds=-1)
+    queue.enqueue("default", source)
+    [item] = queue.claim("default", 10)
+    handler = watcher.CertificateHandler(config, db, queue)
+
+    add_test_record = db.add_test_record
+
+    def locked(**_: object) -> None:
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(db, "add_test_record", locked)
+    assert handler.process_item(item) is False
+    assert item.retry_after is not None
+    assert not source.exists()
+    assert not config.quarantine_folder.exists() or not list(config.quarantine_folder.iterdir())
+    assert queue.counts() == {MOVED: 1}
+
+    monkeypatch.setattr(db, "add_test_record", add_test_record)
+    [retry] = queue.claim("default", 10)
+    assert retry.state == MOVED
+    assert handler.process_item(retry) is True
+    assert queue.counts() == {COMMITTED: 1}
+    with db._session_maker() as session:
+        [record] = session.query(DbTestRecord).all()
+    assert record.file_path == retry.destination
+    assert record.parse_status == "ok"
+
+
+def test_scheduler_retries_failed_commit_with_backoff_then_parks_it(setup, monkeypatch: pytest.MonkeyPatch) -> None:
+    db, config = setup
+    queue = IngestQueue(db, max_attempts=3, retry_base_seconds=0.05)
+    handler = watcher.CertificateHandler(config, db, queue)
+    attempts: list[float] = []
+
+    def locked(**_: object) -> None:
+        attempts.append(time.monotonic())
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(db, "add_test_record", locked)
+    sources = [ImportSource(name="default", folder=config.import_folder)]
+    scheduler = IngestScheduler(sources, handler.process_item, workers=1, queue=queue)
+    scheduler.start()
+    scheduler.submit("default", certificate(config, "ARRJ0001"))
+
+    deadline = time.monotonic() + 5
+    while queue.counts() != {"failed": 1}:
+        assert time.monotonic() < deadline, queue.counts()
+        time.sleep(0.01)
+    scheduler.stop()
+
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.05
+    assert attempts[2] - attempts[1] >= 0.1
+    assert scheduler.stats()[0]["pending"] == 0
+
+
+def test_quarantine_commit_failure_keeps_item_retryable(setup, monkeypatch: pytest.MonkeyPatch) -> None:
+    db, config = setup
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (_ for _ in ()).throw(ValueError("unknown layout")))
+    source = certificate(config, "ARRJ3290")
+    queue = IngestQueue(db, retry_base_seconds=0)
+    queue.enqueue("default", source)
+    [item] = queue.claim("default", 10)
+    handler = watcher.CertificateHandler(config, db, queue)
+    add_test_record = db.add_test_record
+
+    def locked(**_: object) -> None:
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(db, "add_test_record", locked)
+    assert handler.process_item(item) is False
+    assert (config.quarantine_folder / source.name).exists()
+    assert queue.counts() == {MOVED: 1}
+
+    monkeypatch.setattr(db, "add_test_record", add_test_record)
+    [retry] = queue.claim("default", 10)
+    assert handler.process_item(retry) is False
+    assert queue.counts() == {QUARANTINED: 1}
+    with db._session_maker() as session:
+        [record] = session.query(DbTestRecord).all()
+    assert record.parse_status == "parse_error"
+    assert record.file_path == str(config.quarantine_folder / source.name)
+
+
+def test_recover_purges_settled_items_past_retention(setup) -> None:
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import text as sql, update
+
+    from app.models import IngestQueueItem
+
+    db, config = setup
+    queue = IngestQueue(db, retention_days=7)
+    old, recent, waiting = (queue.enqueue("default", certificate(config, f"ARRJ000{index}", second=index)) for index in range(3))
+    with db.write_engine.begin() as connection:
+        connection.execute(
+            update(IngestQueueItem)
+            .where(IngestQueueItem.id.in_((old, recent)))
+            .values(state=COMMITTED, updated_at=datetime.now(timezone.utc))
+        )
+        connection.execute(
+            update(IngestQueueItem)
+            .where(IngestQueueItem.id.in_((old, waiting)))
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=8))
+        )
+
+    assert queue.recover()["purged"] == 1
+    assert queue.counts() == {COMMITTED: 1, "pending": 1}
+    with db.engine.connect() as connection:
+        plan = " ".join(
+            str(row[-1])
+            for row in connection.execute(
+                sql(
+                    "EXPLAIN QUERY PLAN SELECT id FROM ingest_queue WHERE source = 'default' "
+                    "AND state IN ('pending', 'parsing', 'moved') AND (lease_expires_at IS NULL OR lease_expires_at < 0) "
+                    "ORDER BY id LIMIT 16"
+                )
+            )
+        )
+    assert "ix_ingest_queue_active" in plan
@@ -0,0 +1,58 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import watcher
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+from app.metrics import INGEST_FILES, INGEST_STAGE_SECONDS, MetricsRegistry
+from app.parser import ParsedCertificate
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5.0, stage="parse")
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="parse"} 3' in text
+
+
+def test_process_file_records_stage_latency_and_metrics_endpoint(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(sorted_folder=tmp_path / "sorted", quarantine_folder=tmp_path / "quarantine")
+
+    source = tmp_path / "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
+    source.write_text("dummy")
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        watcher,
+        "parse_certificate",
+        lambda *_: ParsedCertificate("ARRJ3290", datetime(2026, 2, 24, 10, 52, 38), "X-am", None, "PASS", None),
+    )
+
+    parse_count = INGEST_STAGE_SECONDS.count(stage="parse")
+    processed = INGEST_FILES.value(outcome="processed")
+    assert watcher.CertificateHandler(config, db).process_file(source) is True
+    assert INGEST_STAGE_SECONDS.count(stage="parse") == parse_count + 1
+    assert INGEST_FILES.value(outcome="processed") == processed + 1
+
+    client = TestClient(create_app(config, db))
+    client.get("/api/dashboard")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'gasdock_ingest_stage_seconds_bucket{stage="move",le="0.005"}' in response.text
+    assert 'gasdock_db_commit_seconds_count{operation="add_test_record"}' in response.text
+    assert 'gasdock_http_request_seconds_count{method="GET",route="/api/dashboard",status="200"}' in response.text
+    assert "gasdock_response_cache_misses 1" in response.text
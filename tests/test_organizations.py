@@ -0,0 +1,104 @@
+import random
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import literal, select, text
+
+from app.api import apply_export_filters
+from app.config import OrganizationRule
+from app.database import Database
+from app.models import Device
+from app.models import TestRecord as DbTestRecord
+from app.organizations import OrganizationClassifier
+from app.utils import classify_organization, normalize_barcode
+from tests.test_rollups import rollup_rows
+
+CUSTOM_RULES = [
+    OrganizationRule(name="ACME", prefixes=["ZZ-", "AR 9"]),
+    OrganizationRule(name="AMBIPAR", prefixes=["AR "]),
+    OrganizationRule(name="MCA", prefixes=["MCA", "011"], ignore_spaces=True),
+]
+
+
+def random_barcode(rng: random.Random) -> str | None:
+    if rng.random() < 0.1:
+        return rng.choice([None, ""])
+    prefix = rng.choice(["AR ", "AR", "ar 9", "MCA", "M CA", "0 11", "012", "013", "ZZ-", "zz-", "X", " "])
+    return prefix + "".join(rng.choice("0123456789 ") for _ in range(rng.randrange(0, 6)))
+
+
+def test_python_matcher_and_sql_expression_agree(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    rng = random.Random(47)
+    barcodes = [random_barcode(rng) for _ in range(400)]
+    for classifier in (OrganizationClassifier(), OrganizationClassifier(CUSTOM_RULES, fallback="REST")):
+        with db.engine.connect() as connection:
+            for barcode in barcodes:
+                stored = normalize_barcode(barcode) if barcode else None
+                sql = connection.execute(select(classifier.sql(literal(stored)))).scalar()
+                assert sql == classifier.classify(barcode), barcode
+
+    assert [classify_organization(code) for code in ("AR 1", "MCA 1", "01 2 3", "XYZ", None)] == [
+        "AMBIPAR",
+        "MCA",
+        "MCA",
+        "OTHER",
+        None,
+    ]
+
+
+def test_rule_change_reclassifies_tests_devices_and_rollups(tmp_path: Path) -> None:
+    path = tmp_path / "test.db"
+    db = Database(path)
+    db.create_tables()
+    for index, barcode in enumerate(["AR 900", "AR 100", "ZZ-1", "MCA 5", "012 7", None]):
+        db.add_test_record(f"ARRJ{index:04d}", datetime(2026, 4, 1 + index), "PASS", f"/tmp/{index}.pdf", barcode=barcode)
+    assert not db.organization_rules_changed()
+
+    db = Database(path, organizations=OrganizationClassifier(CUSTOM_RULES, fallback="REST"))
+    db.create_tables()
+    assert db.organization_rules_changed()
+    assert db.reclassify_organizations(batch_size=2) == 3
+    assert not db.organization_rules_changed()
+
+    with db._session_maker() as session:
+        tests = session.execute(select(DbTestRecord.barcode, DbTestRecord.organization).order_by(DbTestRecord.id)).all()
+        devices = session.execute(select(Device.organization).order_by(Device.serial)).scalars().all()
+    assert [organization for _, organization in tests] == ["ACME", "AMBIPAR", "ACME", "MCA", "REST", None]
+    assert devices == [organization for _, organization in tests]
+    incremental = rollup_rows(db)
+    db.rebuild_rollups()
+    assert incremental == rollup_rows(db)
+
+
+def test_export_filter_is_indexed_equality(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    db.add_test_record("ARRJ0001", datetime(2026, 4, 1), "PASS", "/tmp/1.pdf", barcode="MCA 1")
+    db.add_test_record("ARRJ0002", datetime(2026, 4, 1), "PASS", "/tmp/2.pdf")
+
+    query = apply_export_filters(select(DbTestRecord.serial), None, None, None, None, "MCA")
+    with db.engine.connect() as connection:
+        assert connection.execute(query).scalars().all() == ["ARRJ0001"]
+        unknown = apply_export_filters(select(DbTestRecord.serial), None, None, None, None, "UNKNOWN")
+        assert connection.execute(unknown).scalars().all() == ["ARRJ0002"]
+        compiled = query.compile(compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "ix_tests_organization" in plan
+
+
+def test_migration_backfills_test_organizations(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    db.add_test_record("ARRJ0001", datetime(2026, 4, 1), "FAIL", "/tmp/1.pdf", barcode="AR 5")
+    with db.write_engine.begin() as connection:
+        connection.execute(text("UPDATE tests SET organization = NULL"))
+        connection.execute(text("DELETE FROM app_settings"))
+        connection.exec_driver_sql("PRAGMA user_version = 8")
+
+    db.create_tables()
+
+    with db._session_maker() as session:
+        assert session.scalar(select(DbTestRecord.organization)) == "AMBIPAR"
+    assert not db.organization_rules_changed()
+    assert {row[1] for row in rollup_rows(db)[0]} == {"AMBIPAR"}
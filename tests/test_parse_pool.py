@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+
+from app.metrics import PARSE_WORKER_RECYCLES, PARSE_WORKER_RSS_BYTES
+from app.parse_pool import ParsePool, current_rss_bytes
+from app.parser import extract_pdf_text, parse_certificate
+from benchmarks.corpus import generate_corpus
+
+
+def test_workers_recycle_after_max_files_and_match_in_process_parsing(tmp_path: Path) -> None:
+    files = [path for path, _ in generate_corpus(tmp_path, 5, seed=49, fail_rate=0.5)]
+    pool = ParsePool(workers=1, max_files=2, max_rss_mb=10_000)
+    recycled = PARSE_WORKER_RECYCLES.value(reason="files")
+    pids = set()
+    try:
+        for path in files:
+            assert pool.extract(path) == extract_pdf_text(path)
+            pids.add(pool._workers[0].pid)
+            if pool._workers[0].pid is not None:
+                assert PARSE_WORKER_RSS_BYTES.value(worker="0") > 0
+        assert parse_certificate(files[0], pool.extract) == parse_certificate(files[0])
+
+        (stats,) = pool.stats()
+        assert stats["recycled"] == 3 and stats["files"] == 0 and stats["pid"] is None
+        assert PARSE_WORKER_RECYCLES.value(reason="files") == recycled + 3
+        assert len(pids - {None}) == 3
+    finally:
+        pool.close()
+
+
+def test_worker_recycles_past_rss_ceiling_and_counts_unreadable_pdfs(tmp_path: Path) -> None:
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    (good, _), = generate_corpus(tmp_path, 1, seed=49)
+    pool = ParsePool(workers=1, max_files=10, max_rss_mb=10_000)
+    try:
+        with pytest.raises(Exception):
+            pool.extract(broken)
+        assert pool.stats()[0]["files"] == 1
+
+        pool._workers[0].max_rss_bytes = 1
+        pool.extract(good)
+        assert pool.stats()[0] == {"worker": 0, "pid": None, "files": 0, "rss_mb": None, "recycled": 1}
+    finally:
+        pool.close()
+    assert current_rss_bytes() > 0
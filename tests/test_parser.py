@@ -1,3 +1,5 @@
+import random
+import re
 from datetime import datetime
 from pathlib import Path
 
@@ -22,7 +24,7 @@ def test_parse_certificate(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> N
     file_path = tmp_path / "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
     file_path.write_text("dummy")
 
-    monkeypatch.setattr(parser, "parse_pdf_text", lambda _: ("Dräger X-am 2500", "BC-12345", "PASS", None, "text"))
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("Dräger X-am 2500", "BC-12345", "PASS", None), "text"))
 
     parsed = parse_certificate(file_path)
     assert parsed.serial == "ARRJ3290"
@@ -39,7 +41,7 @@ def test_parse_certificate_fail_reason(monkeypatch: pytest.MonkeyPatch, tmp_path
     monkeypatch.setattr(
         parser,
         "parse_pdf_text",
-        lambda _: ("Dräger X-am 2500", "BC-12345", "FAIL", "Bump test expired", "text"),
+        lambda *_: (parser.CertificateText("Dräger X-am 2500", "BC-12345", "FAIL", "Bump test expired"), "text"),
     )
 
     parsed = parse_certificate(file_path)
@@ -47,7 +49,7 @@ def test_parse_certificate_fail_reason(monkeypatch: pytest.MonkeyPatch, tmp_path
     assert parsed.fail_reason == "Bump test expired"
 
 
-def test_extract_span_calibration_fail_reason_detects_failed_gas() -> None:
+def test_span_fail_reason_detects_failed_gas() -> None:
     text = """
 Results of span calibration
 ch4 O2 H2S CO
@@ -55,18 +57,18 @@ Test result Failed Passed Passed Passed
 Overall result Failed
 """
 
-    reason = parser._extract_span_calibration_fail_reason(text)
+    reason = parser.scan_certificate_text(text).span_fail_reason
     assert reason == "Span calibration failed for CH4"
 
 
-def test_extract_span_calibration_fail_reason_requires_table_context() -> None:
+def test_span_fail_reason_requires_table_context() -> None:
     text = """
 Results of span calibration
 Something unrelated Failed
 Overall result Failed
 """
 
-    reason = parser._extract_span_calibration_fail_reason(text)
+    reason = parser.scan_certificate_text(text).span_fail_reason
     assert reason is None
 
 
@@ -83,9 +85,196 @@ Overall result Failed
     monkeypatch.setattr(
         parser,
         "parse_pdf_text",
-        lambda _: ("Dräger X-am 2500", "BC-12345", "FAIL", "Generic failure", sample_text),
+        lambda *_: (parser.CertificateText("Dräger X-am 2500", "BC-12345", "FAIL", "Generic failure"), sample_text),
     )
 
     parsed = parse_certificate(file_path)
     assert parsed.result == "FAIL"
     assert parsed.fail_reason == "Generic failure"
+
+
+
+def test_span_values_are_read_after_the_row_label() -> None:
+    text = """
+Results of span calibration
+CH4 O2 H2S CO
+Test result Passed Passed Passed Failed
+Nominal value (CH4/O2/H2S/CO2/NO2 mix): 50 %LEL 18 Vol% 15 ppm 60 ppm
+Measured value CH4 50.4 %LEL O2 18.5 Vol% H2S 15.3 ppm CO 71.2 ppm
+Overall result: Failed
+"""
+
+    fields = parser.scan_certificate_text(text)
+    assert [(reading.gas, reading.nominal, reading.measured, reading.unit) for reading in fields.span_readings] == [
+        ("CH4", 50.0, 50.4, "%LEL"),
+        ("O2", 18.0, 18.5, "Vol%"),
+        ("H2S", 15.0, 15.3, "ppm"),
+        ("CO", 60.0, 71.2, "ppm"),
+    ]
+    assert fields.fail_reason == "Span calibration failed for CO"
+
+def test_parse_certificate_reads_generated_xdock_pdf(tmp_path: Path) -> None:
+    from benchmarks.corpus import generate_corpus
+
+    for file_path, spec in generate_corpus(tmp_path, 8, seed=7, fail_rate=0.5):
+        parsed = parse_certificate(file_path)
+        assert parsed.serial == spec.serial
+        assert parsed.tested_at == spec.tested_at
+        assert parsed.device_type == spec.device_type
+        assert parsed.barcode == spec.barcode
+        assert parsed.result == spec.result
+        assert [(reading.gas, reading.passed, reading.nominal, reading.measured, reading.unit) for reading in parsed.gas_readings] == [
+            (gas.gas, gas.passed, gas.nominal, gas.measured, gas.unit) for gas in spec.gases
+        ]
+        failed_gases = [gas.gas for gas in spec.gases if not gas.passed]
+        if failed_gases:
+            assert parsed.fail_reason == f"Span calibration failed for {failed_gases[0]}"
+        else:
+            assert parsed.fail_reason == spec.fail_reason
+
+
+def test_parse_certificate_scans_the_text_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    from benchmarks.corpus import generate_corpus
+
+    scans: list[str] = []
+    scan = parser.scan_certificate_text
+    monkeypatch.setattr(parser, "scan_certificate_text", lambda text: scans.append(text) or scan(text))
+    [(file_path, spec)] = generate_corpus(tmp_path, 1, seed=3)
+
+    parsed = parse_certificate(file_path)
+    assert len(scans) == 1
+    assert [reading.gas for reading in parsed.gas_readings] == [gas.gas for gas in spec.gases]
+
+
+def random_certificate_text(rng: random.Random) -> str:
+    """Certificate-like text with the spacing, case and layout quirks the old regexes tolerated."""
+
+    def spaced(*words: str) -> str:
+        joined = words[0]
+        for word in words[1:]:
+            joined += rng.choice((" ", " ", "", "  ", "\t", "\n", " \n ")) + word
+        return "".join(char.upper() if rng.random() < 0.3 else char for char in joined)
+
+    def separator() -> str:
+        return rng.choice(("", ":", ": ", " : ", "-", " - ", "  ", ":\n", "\n", ": \n\n"))
+
+    gases = ["CH4", "O2", "H2S", "CO", "ch4", "Co2", "NO2"]
+    statuses = ["Passed", "Failed", "passed", "FAILED", "n/a"]
+    values = ["Dräger X-am 2500", "MCA 011526", "AR 123", "Sensor drift", "", "  ", "Passed", "x"]
+    pieces = [
+        lambda: rng.choice(("", "  ", "Note: ")) + spaced("Device", "type") + separator() + rng.choice(values),
+        lambda: rng.choice(("", " ", "X")) + spaced("Barcode") + separator() + rng.choice(values),
+        lambda: rng.choice(("", "\t", "See ")) + spaced("Fail", "reason") + separator() + rng.choice(values),
+        lambda: rng.choice(("", "  ", "The ")) + spaced("Overall", "result") + separator() + rng.choice(statuses + values),
+        lambda: rng.choice(("", "Page 1 ")) + spaced("Results", "of", "span", "calibration") + rng.choice(("", " CH4 failed", " ")),
+        lambda: " ".join(rng.sample(gases, rng.randint(1, 4))),
+        lambda: rng.choice(("Test result ", "test  result ", "Results: test result ", "")) + " ".join(
+            rng.choice(statuses) for _ in range(rng.randint(1, 4))
+        ),
+        lambda: rng.choice(("Nominal value 50 %LEL", "Channel CH4: sensor 1234", "O2 sensor failed", "Calibration certificate")),
+        lambda: rng.choice(("", " ", "\t", "\r")),
+    ]
+    return "\n".join(rng.choice(pieces)() for _ in range(rng.randint(0, 14))) + rng.choice(("", "\n", " ", "\n\n"))
+
+
+# The five-regex extraction scan_certificate_text replaced, kept as its reference.
+DEVICE_TYPE_PATTERN = re.compile(r"^\s*Device\s*type\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+OVERALL_RESULT_PATTERN = re.compile(
+    r"Overall\s*result\s*[:\-]?\s*(?P<value>Passed|Failed)",
+    re.IGNORECASE,
+)
+BARCODE_PATTERN = re.compile(r"^\s*Barcode\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+FAIL_REASON_PATTERN = re.compile(r"^\s*Fail\s*reason\s*[:\-]?\s*(?P<value>.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+SPAN_SECTION_PATTERN = re.compile(
+    r"Results\s+of\s+span\s+calibration(?P<section>.*?)(?:\n\s*Overall\s*result|\Z)",
+    re.IGNORECASE | re.DOTALL,
+)
+SPAN_HEADER_PATTERN = re.compile(r"\b(?:ch4|o2|h2s|co)\b", re.IGNORECASE)
+FAILED_GAS_PATTERN = re.compile(r"\b(ch4|o2|h2s|co)\b[^\n]*?\bfailed\b", re.IGNORECASE)
+
+
+def legacy_fields(full_text: str) -> tuple[str | None, str | None, str | None, str | None]:
+    """Device type, barcode, result and fail reason as the regex parser produced them."""
+
+    device_match = DEVICE_TYPE_PATTERN.search(full_text)
+    device_type = device_match.group("value").strip() if device_match else None
+
+    barcode_match = BARCODE_PATTERN.search(full_text)
+    barcode = barcode_match.group("value").strip() if barcode_match else None
+
+    result_match = OVERALL_RESULT_PATTERN.search(full_text)
+    result = result_match.group("value").upper() if result_match else None
+
+    fail_reason_match = FAIL_REASON_PATTERN.search(full_text)
+    fail_reason = fail_reason_match.group("value").strip() if fail_reason_match else None
+    span_fail_reason = legacy_span_fail_reason(full_text)
+    if span_fail_reason:
+        fail_reason = span_fail_reason
+    if result == "PASSED":
+        result = "PASS"
+    elif result == "FAILED":
+        result = "FAIL"
+
+    return device_type, barcode, result, fail_reason
+
+
+def legacy_span_fail_reason(full_text: str) -> str | None:
+    section_match = SPAN_SECTION_PATTERN.search(full_text)
+    if not section_match:
+        return None
+
+    section = section_match.group("section")
+    if not SPAN_HEADER_PATTERN.search(section) or "test result" not in section.lower():
+        return None
+
+    lines = [line.strip() for line in section.splitlines() if line.strip()]
+    lowered_lines = [line.lower() for line in lines]
+
+    try:
+        test_result_index = next(i for i, line in enumerate(lowered_lines) if line.startswith("test result"))
+    except StopIteration:
+        test_result_index = -1
+
+    if test_result_index > 0:
+        gas_tokens = re.findall(r"\b(ch4|o2|h2s|co)\b", lines[test_result_index - 1], re.IGNORECASE)
+        status_tokens = re.findall(r"\b(passed|failed)\b", lines[test_result_index], re.IGNORECASE)
+        if gas_tokens and len(gas_tokens) == len(status_tokens):
+            for gas, status in zip(gas_tokens, status_tokens):
+                if status.lower() == "failed":
+                    return f"Span calibration failed for {gas.upper()}"
+
+    failed_gas_match = FAILED_GAS_PATTERN.search(section)
+    if failed_gas_match:
+        return f"Span calibration failed for {failed_gas_match.group(1).upper()}"
+    return None
+
+
+def test_scan_certificate_text_matches_legacy_regexes() -> None:
+    rng = random.Random(41)
+    for _ in range(3000):
+        text = random_certificate_text(rng)
+        # Outside Latin-1 the scanner folds case with a translation table; İ, ı
+        # and ſ are letters IGNORECASE equates with i and s.
+        for variant in (text, text.replace("ä", "İ"), text.replace("s", "ſ").replace("vi", "vı")):
+            fields = parser.scan_certificate_text(variant)
+            assert (fields.device_type, fields.barcode, fields.result, fields.fail_reason) == legacy_fields(variant), variant
+            assert fields.span_fail_reason == legacy_span_fail_reason(variant), variant
+
+
+def test_scan_certificate_text_reads_span_table() -> None:
+    text = """
+Results of span calibration
+CH4 O2 H2S CO
+Test result Passed Failed Passed Passed
+Overall result: Failed
+"""
+
+    fields = parser.scan_certificate_text(text)
+    assert [(reading.gas, reading.passed) for reading in fields.span_readings] == [
+        ("CH4", True),
+        ("O2", False),
+        ("H2S", True),
+        ("CO", True),
+    ]
+    assert fields.result == "FAIL"
+    assert fields.fail_reason == "Span calibration failed for O2"
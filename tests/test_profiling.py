@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import parser, watcher
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+
+
+def test_profiling_writes_trace_profile_and_slow_file_report(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(
+        sorted_folder=tmp_path / "sorted",
+        quarantine_folder=tmp_path / "quarantine",
+        logs_folder=tmp_path / "logs",
+        profiling_enabled=True,
+        profiling_slow_seconds=0.0,
+    )
+
+    source = tmp_path / "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
+    source.write_text("dummy")
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "FAIL", "Pump fault"), "text"))
+
+    handler = watcher.CertificateHandler(config, db)
+    assert handler.process_file(source) is True
+
+    events = [json.loads(line) for line in (config.logs_folder / "ingest_trace.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert len(events) == 1
+    event = events[0]
+    assert event["outcome"] == "processed"
+    assert event["size_bytes"] == 5
+    assert event["fields"]["serial"] == "ARRJ3290"
+    assert event["fields"]["fail_reason"] == "Pump fault"
+    assert {"stability_wait", "parse", "pdf_text", "move", "db"} <= set(event["stages"])
+    assert Path(event["profile_path"]).exists()
+
+    app = create_app(config, db)
+    app.state.certificate_handler = handler
+    client = TestClient(app)
+    report = client.get("/api/slow-files").json()
+    assert report["enabled"] is True
+    assert report["files"][0]["file"] == str(source)
+    assert "Slowest Certificates" in client.get("/").text
+
+
+def test_profiling_disabled_by_default_leaves_no_trace(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(sorted_folder=tmp_path / "sorted", quarantine_folder=tmp_path / "quarantine", logs_folder=tmp_path / "logs")
+
+    source = tmp_path / "20260224_10_52_38_8323918ARRJ3290_Calibration_EN.pdf"
+    source.write_text("dummy")
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", None, "PASS", None), "text"))
+
+    handler = watcher.CertificateHandler(config, db)
+    assert handler.process_file(source) is True
+    assert not (config.logs_folder / "ingest_trace.jsonl").exists()
+    assert handler.profiler.slowest() == []
@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import parser, watcher
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+from app.models import Device
+from app.models import TestRecord as DbTestRecord
+from app.parser import ParseError
+from app.retry import QuarantineRetrier, RetryPolicy, is_transient
+
+
+@pytest.fixture()
+def setup(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    config = AppConfig(
+        import_folder=tmp_path / "imports",
+        sorted_folder=tmp_path / "sorted",
+        quarantine_folder=tmp_path / "quarantine",
+        logs_folder=tmp_path / "logs",
+        quarantine_retry_base_seconds=10,
+        quarantine_retry_max_attempts=3,
+    )
+    config.import_folder.mkdir()
+    monkeypatch.setattr(watcher, "wait_for_stable_file", lambda *args, **kwargs: None)
+    return db, config
+
+
+def certificate(config: AppConfig, serial: str) -> Path:
+    path = config.import_folder / f"20260224_10_52_38_8323918{serial}_Calibration_EN.pdf"
+    path.write_text("dummy")
+    return path
+
+
+def records(db: Database) -> list[DbTestRecord]:
+    with db._session_maker() as session:
+        return session.query(DbTestRecord).order_by(DbTestRecord.id).all()
+
+
+def test_transient_classification_and_backoff() -> None:
+    locked = OSError(13, "Permission denied")
+    assert is_transient(PermissionError("locked"))
+    assert is_transient(locked)
+    try:
+        raise ParseError("PDF parsing failed: Unexpected EOF") from locked
+    except ParseError as exc:
+        assert is_transient(exc)
+    assert not is_transient(ParseError("Filename does not match expected pattern"))
+    assert not is_transient(FileNotFoundError("gone"))
+
+    policy = RetryPolicy(max_attempts=4, base_seconds=10, max_seconds=50)
+    assert [policy.delay(attempt) for attempt in range(4)] == [10, 20, 40, 50]
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert policy.next_attempt_at(PermissionError(), 1, now) == now + timedelta(seconds=20)
+    assert policy.next_attempt_at(PermissionError(), 4, now) is None
+    assert policy.next_attempt_at(ValueError("bad layout"), 0, now) is None
+
+
+def test_transient_failure_is_retried_and_replaces_error_row(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    db, config = setup
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (_ for _ in ()).throw(PermissionError("locked")))
+    handler = watcher.CertificateHandler(config, db)
+    assert handler.process_file(certificate(config, "ARRJ3290")) is False
+
+    [error_row] = records(db)
+    assert error_row.serial == "UNKNOWN" and error_row.next_retry_at is not None
+    retrier = QuarantineRetrier(config, db, handler)
+    assert retrier.run_due()["recovered"] == 0
+
+    later = error_row.next_retry_at + timedelta(seconds=1)
+    assert retrier.run_due(later) == {"recovered": 0, "rescheduled": 1, "failed": 0, "missing": 0}
+    [error_row] = records(db)
+    assert error_row.retry_attempts == 1
+    assert error_row.next_retry_at >= later + timedelta(seconds=19)
+
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "PASS", None), "text"))
+    assert retrier.run_due(error_row.next_retry_at)["recovered"] == 1
+
+    [record] = records(db)
+    assert (record.serial, record.result, record.parse_status) == ("ARRJ3290", "PASS", "ok")
+    assert Path(record.file_path).exists()
+    assert not list(config.quarantine_folder.iterdir())
+    with db._session_maker() as session:
+        assert session.get(Device, "UNKNOWN") is None
+
+
+def test_permanent_failure_is_not_scheduled(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    db, config = setup
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "PASS", None), "text"))
+    bad = config.import_folder / "not-a-certificate.pdf"
+    bad.write_text("dummy")
+    assert watcher.CertificateHandler(config, db).process_file(bad) is False
+
+    [error_row] = records(db)
+    assert error_row.next_retry_at is None
+    assert db.due_retries(datetime.now(timezone.utc) + timedelta(days=1), limit=10) == []
+
+
+def test_bulk_reprocess_endpoint_recovers_quarantine_in_parallel(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    db, config = setup
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (_ for _ in ()).throw(ValueError("unknown layout")))
+    handler = watcher.CertificateHandler(config, db)
+    for serial in ("ARRJ0001", "ARRJ0002", "ARRJ0003"):
+        handler.process_file(certificate(config, serial))
+    missing = records(db)[2]
+    Path(missing.file_path).unlink()
+
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "FAIL", "O2 span"), "text"))
+    client = TestClient(create_app(config, db))
+    response = client.post("/api/quarantine/reprocess")
+
+    assert response.json() == {"ok": True, "recovered": 2, "rescheduled": 0, "failed": 0, "missing": 1, "total": 3}
+    rows = records(db)
+    assert sorted(row.serial for row in rows) == ["ARRJ0001", "ARRJ0002", "UNKNOWN"]
+    assert [row.parse_error for row in rows if row.serial == "UNKNOWN"][0].startswith("Quarantined file missing")
+
+
+def test_web_only_endpoints_share_one_handler_closed_on_shutdown(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    db, config = setup
+    closed: list[watcher.CertificateHandler] = []
+    close = watcher.CertificateHandler.close
+    monkeypatch.setattr(watcher.CertificateHandler, "close", lambda self: closed.append(self) or close(self))
+    app = create_app(config, db)
+
+    with TestClient(app) as client:
+        assert client.post("/api/quarantine/reprocess").status_code == 200
+        handler = app.state.web_certificate_handler
+        assert client.post(f"/api/import-folder-once?folder_path={config.import_folder}").status_code == 200
+        assert app.state.web_certificate_handler is handler
+    assert closed == [handler]
+
+
+def test_retrier_skips_rows_claimed_by_another_process(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    db, config = setup
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (_ for _ in ()).throw(ValueError("unknown layout")))
+    handler = watcher.CertificateHandler(config, db)
+    for serial in ("ARRJ0001", "ARRJ0002"):
+        handler.process_file(certificate(config, serial))
+    first, second = db.quarantined_records()
+
+    # Another process (e.g. the ingest role's retrier) holds the first row.
+    other = Database(Path(str(db.engine.url.database)))
+    now = datetime.now(timezone.utc)
+    assert other.claim_retry(first[0], first[2], now + timedelta(minutes=10), now)
+    assert not db.claim_retry(first[0], first[2], now + timedelta(minutes=10), now)
+
+    monkeypatch.setattr(parser, "parse_pdf_text", lambda *_: (parser.CertificateText("X-am 2500", "MCA 1", "PASS"), "text"))
+    counts = QuarantineRetrier(config, db, handler).reprocess_all([first[0], second[0]])
+
+    assert counts["recovered"] == 1
+    assert [row.serial for row in records(db)] == ["UNKNOWN", "ARRJ0002"]
+
+
+def test_concurrent_requests_build_a_single_web_handler(monkeypatch: pytest.MonkeyPatch, setup) -> None:
+    import threading
+    import time
+
+    db, config = setup
+    config = config.model_copy(update={"import_workers": 2})
+    built: list[object] = []
+    init = watcher.CertificateHandler.__init__
+
+    def slow_init(self, *args, **kwargs) -> None:
+        built.append(self)
+        time.sleep(0.05)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(watcher.CertificateHandler, "__init__", slow_init)
+    app = create_app(config, db)
+    with TestClient(app) as client:
+        threads = [
+            threading.Thread(target=client.post, args=(f"/api/import-folder-once?folder_path={config.import_folder}",))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(built) == 1
+
+
+def test_role_both_requests_wait_for_the_ingest_handler(setup) -> None:
+    import threading
+
+    db, config = setup
+
+    class StubHandler:
+        def process_file(self, path: Path) -> bool:
+            return True
+
+    app = create_app(config, db)
+    app.state.ingest_ready = threading.Event()
+    certificate(config, "ARRJ0001")
+    client = TestClient(app)
+    responses: list[dict] = []
+    request = threading.Thread(
+        target=lambda: responses.append(client.post(f"/api/import-folder-once?folder_path={config.import_folder}").json())
+    )
+    request.start()
+    request.join(0.2)
+    assert request.is_alive()
+
+    app.state.certificate_handler = StubHandler()
+    app.state.ingest_ready.set()
+    request.join(5)
+    assert responses[0]["processed"] == 1
+    assert not hasattr(app.state, "web_certificate_handler")
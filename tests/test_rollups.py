@@ -0,0 +1,128 @@
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app.api import create_app
+from app.config import AppConfig
+from app.database import Database
+from app.models import DailyGasRollup, DailyRollup, DeviceFailReasonRollup, DeviceMonthlyRollup
+from app.parser import SpanReading
+
+
+@pytest.fixture()
+def db(tmp_path: Path) -> Database:
+    database = Database(tmp_path / "test.db")
+    database.create_tables()
+    return database
+
+
+def rollup_rows(db: Database) -> tuple[set, ...]:
+    with db._session_maker() as session:
+        tests = {
+            (row.day, row.organization, row.device_type, row.result, row.tests)
+            for row in session.scalars(select(DailyRollup))
+            if row.tests
+        }
+        gases = {
+            (row.day, row.organization, row.device_type, row.gas, row.passed, row.failed)
+            for row in session.scalars(select(DailyGasRollup))
+            if row.passed or row.failed
+        }
+        months = {(row.serial, row.month, row.result, row.tests) for row in session.scalars(select(DeviceMonthlyRollup))}
+        reasons = {(row.serial, row.fail_reason, row.tests) for row in session.scalars(select(DeviceFailReasonRollup))}
+    return tests, gases, months, reasons
+
+
+def test_incremental_rollups_match_a_full_rebuild(db: Database) -> None:
+    rng = random.Random(43)
+    base = datetime(2026, 1, 1, 8)
+    ids = []
+    for index in range(120):
+        record = db.add_test_record(
+            serial=f"ARRJ{rng.randrange(12):04d}",
+            tested_at=base + timedelta(hours=rng.randrange(24 * 40)),
+            result=rng.choice(["PASS", "PASS", "FAIL", "UNKNOWN"]),
+            file_path=f"/tmp/{index}.pdf",
+            device_type=rng.choice(["X-am 2500", "Pac 6000", None]),
+            barcode=rng.choice(["AR 1", "MCA 2", "XYZ", None]),
+            fail_reason=rng.choice(["O2 span", "CO span", None]),
+            gas_readings=[SpanReading(gas, rng.random() > 0.2) for gas in rng.sample(["CH4", "O2", "H2S", "CO"], 2)],
+        )
+        ids.append(record.id)
+
+    db.delete_test_record(ids[5])
+    db.delete_device("ARRJ0003")
+    db.set_device_barcode("ARRJ0004", "MCA 9")
+    db.add_test_record(
+        serial="ARRJ0100",
+        tested_at=base,
+        result="FAIL",
+        file_path="/tmp/retry.pdf",
+        gas_readings=[SpanReading("O2", False)],
+        replaces_test_id=ids[7],
+    )
+
+    incremental = rollup_rows(db)
+    db.rebuild_rollups()
+    assert incremental == rollup_rows(db)
+    assert all(incremental)
+
+
+def test_rollups_are_backfilled_on_migration(db: Database) -> None:
+    db.add_test_record("ARRJ0001", datetime(2026, 2, 1, 9), "FAIL", "/tmp/a.pdf", barcode="AR 1")
+    with db.write_engine.begin() as connection:
+        connection.execute(text("DELETE FROM daily_rollups"))
+        connection.exec_driver_sql("PRAGMA user_version = 5")
+
+    db.create_tables()
+
+    assert rollup_rows(db)[0] == {(date(2026, 2, 1), "AMBIPAR", "", "FAIL", 1)}
+
+
+def test_trend_endpoints_read_rollups(db: Database, tmp_path: Path) -> None:
+    for day, result, gas_passed in [(2, "PASS", True), (3, "FAIL", False), (10, "FAIL", True), (11, "PASS", True)]:
+        db.add_test_record(
+            "ARRJ0001",
+            datetime(2026, 3, day, 10),
+            result,
+            f"/tmp/{day}.pdf",
+            device_type="X-am 2500",
+            barcode="MCA 1",
+            gas_readings=[SpanReading("O2", gas_passed), SpanReading("CO", True)],
+        )
+    client = TestClient(create_app(AppConfig(logs_folder=tmp_path / "logs"), db))
+
+    weekly = client.get("/api/trends", params={"bucket": "week", "organization": "MCA"}).json()
+    assert weekly["series"] == [
+        {"period": "2026-03-02", "tests": 2, "failures": 1, "failure_rate": 0.5},
+        {"period": "2026-03-09", "tests": 2, "failures": 1, "failure_rate": 0.5},
+    ]
+    assert weekly["totals"] == {"tests": 4, "failures": 2, "failure_rate": 0.5}
+    assert client.get("/api/trends", params={"date_from": "2026-03-04"}).json()["totals"]["tests"] == 2
+    assert client.get("/api/trends", params={"organization": "AMBIPAR"}).json()["series"] == []
+    assert client.get("/api/trends", params={"bucket": "year"}).status_code == 422
+    assert client.get("/api/trends", params={"organization": "MCAX"}).status_code == 400
+    assert client.get("/api/dashboard", params={"organization": "AMBIPAR "}).status_code == 400
+    assert client.get("/api/dashboard", params={"organization": "UNKNOWN"}).status_code == 200
+    assert client.get("/api/dashboard", params={"organization": ""}).status_code == 200
+
+    gases = client.get("/api/trends/gases", params={"bucket": "month"}).json()
+    assert gases["totals"] == {
+        "CO": {"readings": 4, "failures": 0, "failure_rate": 0.0},
+        "O2": {"readings": 4, "failures": 1, "failure_rate": 0.25},
+    }
+    assert [point["period"] for point in gases["series"]] == ["2026-03-01", "2026-03-01"]
+
+
+def test_failures_last_7_days_counts_seven_calendar_days(db: Database, tmp_path: Path) -> None:
+    today = date.today()
+    for days_ago in (0, 6, 7):
+        tested_at = datetime.combine(today - timedelta(days=days_ago), datetime.min.time()).replace(hour=12)
+        db.add_test_record(f"ARRJ000{days_ago}", tested_at, "FAIL", f"/tmp/{days_ago}.pdf")
+    client = TestClient(create_app(AppConfig(logs_folder=tmp_path / "logs"), db))
+
+    assert client.get("/api/dashboard").json()["failures_last_7_days"] == 2
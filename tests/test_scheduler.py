@@ -0,0 +1,119 @@
+import threading
+import time
+from pathlib import Path
+
+from app.config import AppConfig, ImportSource
+from app.scheduler import IngestScheduler
+
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_dispatch_share_follows_priority_and_nobody_starves(tmp_path: Path) -> None:
+    sources = [
+        ImportSource(name="chatty", folder=tmp_path / "a", priority=2),
+        ImportSource(name="quiet", folder=tmp_path / "b", priority=1),
+    ]
+    order: list[str] = []
+    scheduler = IngestScheduler(sources, lambda path: order.append(path.parent.name) or True, workers=1)
+    for index in range(30):
+        scheduler.submit("chatty", tmp_path / "chatty" / f"{index}.pdf")
+    for index in range(5):
+        scheduler.submit("quiet", tmp_path / "quiet" / f"{index}.pdf")
+
+    scheduler.start()
+    wait_for(lambda: len(order) == 35)
+    scheduler.stop()
+
+    assert order[:9].count("chatty") == 6
+    assert order[:9].count("quiet") == 3
+    assert order.index("quiet") <= 1
+    stats = {entry["source"]: entry for entry in scheduler.stats()}
+    assert stats["chatty"]["processed"] == 30
+    assert stats["quiet"]["processed"] == 5
+    assert stats["quiet"]["pending"] == 0
+
+
+def test_per_source_concurrency_limit(tmp_path: Path) -> None:
+    sources = [ImportSource(name="station", folder=tmp_path, concurrency=2)]
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+    done: list[Path] = []
+
+    def process(path: Path) -> bool:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+            done.append(path)
+        return path.stem != "bad"
+
+    scheduler = IngestScheduler(sources, process, workers=4)
+    scheduler.start()
+    for index in range(8):
+        scheduler.submit("station", tmp_path / f"{index}.pdf")
+    scheduler.submit("station", tmp_path / "bad.pdf")
+    wait_for(lambda: len(done) == 9)
+    wait_for(lambda: scheduler.stats()[0]["in_flight"] == 0)
+    scheduler.stop()
+
+    assert peak == 2
+    stats = scheduler.stats()[0]
+    assert (stats["processed"], stats["failed"], stats["pending"]) == (8, 1, 0)
+
+
+def test_single_import_folder_is_the_default_source(tmp_path: Path) -> None:
+    config = AppConfig(import_folder=tmp_path / "imports")
+    sources = config.resolved_import_sources()
+    assert [(source.name, source.folder) for source in sources] == [("default", tmp_path / "imports")]
+
+
+def test_failed_claim_backs_off_without_killing_the_worker(monkeypatch, tmp_path: Path) -> None:
+    from app import scheduler as scheduler_module
+
+    monkeypatch.setattr(scheduler_module, "CLAIM_RETRY_SECONDS", 0.01)
+
+    class FlakyQueue:
+        def __init__(self) -> None:
+            self.items: list[Path] = []
+            self.claims = 0
+
+        def recover(self) -> dict[str, int]:
+            return {}
+
+        def active_count(self, source: str) -> int:
+            return len(self.items)
+
+        def enqueue(self, source: str, path: Path) -> int:
+            self.items.append(path)
+            return len(self.items)
+
+        def claim(self, source: str, limit: int) -> list[Path]:
+            self.claims += 1
+            if self.claims == 1:
+                raise RuntimeError("database is locked")
+            batch, self.items = self.items[:limit], self.items[limit:]
+            return batch
+
+    done: list[Path] = []
+    queue = FlakyQueue()
+    scheduler = IngestScheduler(
+        [ImportSource(name="station", folder=tmp_path)], lambda path: done.append(path) or True, workers=1, queue=queue
+    )
+    scheduler.start()
+    scheduler.submit("station", tmp_path / "a.pdf")
+    wait_for(lambda: len(done) == 1)
+    scheduler.submit("station", tmp_path / "b.pdf")
+    wait_for(lambda: len(done) == 2)
+    scheduler.stop()
+
+    assert queue.claims >= 3
+    assert scheduler.stats()[0]["pending"] == 0
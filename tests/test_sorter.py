@@ -0,0 +1,119 @@
+import errno
+import time
+from pathlib import Path
+
+import pytest
+
+from app.sorter import PlacementEngine, move_quarantine, move_sorted
+
+
+def write_certificate(folder: Path, name: str, size: int = 4096) -> Path:
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_bytes(b"%PDF" + b"x" * (size - 4))
+    return path
+
+
+def force_cross_volume(monkeypatch: pytest.MonkeyPatch) -> None:
+    def cross_device(self, source: Path, target: Path) -> None:
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(PlacementEngine, "_replace", cross_device)
+
+
+def test_same_volume_move_is_a_rename_and_reuses_cached_directories(tmp_path: Path) -> None:
+    engine = PlacementEngine(io_workers=1)
+    first = write_certificate(tmp_path / "imports", "a.pdf")
+    inode = first.stat().st_ino
+
+    target = move_sorted(first, tmp_path / "sorted", "PASS", ("2026", "02", "24"), "ARRJ3290", engine=engine)
+    second = move_sorted(
+        write_certificate(tmp_path / "imports", "b.pdf"), tmp_path / "sorted", "PASS", ("2026", "02", "24"), "ARRJ3290", engine=engine
+    )
+
+    assert target == tmp_path / "sorted" / "PASS" / "2026" / "02" / "24" / "ARRJ3290" / "a.pdf"
+    assert target.stat().st_ino == inode
+    assert second.parent == target.parent
+    assert not first.exists()
+    assert list(engine._directories) == [target.parent]
+    stats = engine.stats()
+    assert stats["same_volume"]["files"] == 2
+    assert stats["same_volume"]["bytes"] == 8192
+    assert stats["cross_volume"]["files"] == 0
+    engine.close()
+
+
+def test_directory_removed_behind_cache_is_recreated(tmp_path: Path) -> None:
+    engine = PlacementEngine(io_workers=1)
+    move_quarantine(write_certificate(tmp_path / "imports", "a.pdf"), tmp_path / "quarantine", engine=engine)
+    (tmp_path / "quarantine" / "a.pdf").unlink()
+    (tmp_path / "quarantine").rmdir()
+
+    target = move_quarantine(write_certificate(tmp_path / "imports", "b.pdf"), tmp_path / "quarantine", engine=engine)
+    assert target.exists()
+    engine.close()
+
+
+def test_cross_volume_copy_fsyncs_each_file_by_default(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    force_cross_volume(monkeypatch)
+    engine = PlacementEngine(io_workers=1)
+    source = write_certificate(tmp_path / "imports", "a.pdf", size=100_000)
+    payload = source.read_bytes()
+
+    target = move_quarantine(source, tmp_path / "quarantine", engine=engine)
+
+    assert target.read_bytes() == payload
+    assert not source.exists()
+    assert not list(target.parent.glob("*.part"))
+    stats = engine.stats()
+    assert stats["cross_volume"]["files"] == 1
+    assert stats["cross_volume"]["bytes"] == 100_000
+    assert stats["cross_volume"]["mb_per_second"] > 0
+    engine.close()
+
+
+def test_cross_volume_fsync_batching_defers_source_deletion(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    force_cross_volume(monkeypatch)
+    engine = PlacementEngine(io_workers=2, fsync_batch=3, fsync_max_delay_seconds=60)
+    sources = [write_certificate(tmp_path / "imports", f"{index}.pdf") for index in range(4)]
+
+    for source in sources[:2]:
+        engine.move(source, tmp_path / "sorted" / source.name)
+    assert all(source.exists() for source in sources[:2])
+    assert engine.stats()["pending_fsync"]["files"] == 2
+
+    engine.move(sources[2], tmp_path / "sorted" / sources[2].name)
+    assert not any(source.exists() for source in sources[:3])
+
+    engine.move(sources[3], tmp_path / "sorted" / sources[3].name)
+    assert sources[3].exists()
+    engine.close()
+    assert not sources[3].exists()
+    assert sorted(path.name for path in (tmp_path / "sorted").iterdir()) == ["0.pdf", "1.pdf", "2.pdf", "3.pdf"]
+
+
+def test_partial_fsync_batch_is_flushed_after_max_delay(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    force_cross_volume(monkeypatch)
+    engine = PlacementEngine(io_workers=1, fsync_batch=10, fsync_max_delay_seconds=0.05)
+    source = write_certificate(tmp_path / "imports", "a.pdf")
+
+    engine.move(source, tmp_path / "sorted" / source.name)
+    deadline = time.monotonic() + 5
+    while source.exists():
+        assert time.monotonic() < deadline, "partial batch was never flushed"
+        time.sleep(0.01)
+    assert engine.stats()["pending_fsync"]["files"] == 0
+    engine.close()
+
+
+def test_failed_fsync_keeps_only_that_source(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    force_cross_volume(monkeypatch)
+    engine = PlacementEngine(io_workers=1, fsync_batch=10, fsync_max_delay_seconds=60)
+    sources = [write_certificate(tmp_path / "imports", f"{index}.pdf") for index in range(3)]
+    for source in sources:
+        engine.move(source, tmp_path / "sorted" / source.name)
+
+    (tmp_path / "sorted" / "1.pdf").unlink()
+    engine.close()
+
+    assert [source.exists() for source in sources] == [False, True, False]
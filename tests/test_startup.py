@@ -0,0 +1,161 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.database import SCHEMA_VERSION, Database
+
+ROOT = Path(__file__).resolve().parent.parent
+# Generous default so slow CI machines pass; tighten locally with the env var.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("GASDOCK_IMPORT_BUDGET_SECONDS", "3.0"))
+LAZY_MODULES = ("pdfplumber", "pypdfium2", "watchdog", "app.parser")
+WEB_MODULES = ("app.api", "fastapi", "uvicorn")
+
+
+def import_profile(module: str) -> tuple[dict[str, float], set[str]]:
+    """Import module in a fresh interpreter; return cumulative seconds per module and loaded modules."""
+
+    script = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    cumulative: dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        name = name.strip()
+        cumulative[name] = max(cumulative.get(name, 0.0), int(cumulative_us) / 1_000_000)
+    return cumulative, set(completed.stdout.split())
+
+
+def test_entrypoint_imports_within_budget_and_defer_heavy_modules() -> None:
+    cumulative, loaded = import_profile("run")
+
+    report = "\n".join(
+        f"{seconds * 1000:9.1f} ms  {name}"
+        for name, seconds in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:15]
+    )
+    print(f"\nImport time per module (cumulative):\n{report}")
+
+    assert cumulative["run"] <= IMPORT_BUDGET_SECONDS, f"run imports in {cumulative['run']:.2f}s\n{report}"
+    assert not loaded.intersection(LAZY_MODULES), f"eagerly imported: {sorted(loaded.intersection(LAZY_MODULES))}"
+    # An ingest-only process never loads the web stack.
+    assert not loaded.intersection(WEB_MODULES), f"eagerly imported: {sorted(loaded.intersection(WEB_MODULES))}"
+
+
+def test_create_tables_records_schema_version_and_is_idempotent(tmp_path: Path) -> None:
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    db.create_tables()
+
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION
+        columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(devices)")}
+    assert {"barcode", "organization"} <= columns
+
+
+WRITER_SCRIPT = """
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.database import Database
+
+db = Database(Path(sys.argv[1]))
+for index in range(40):
+    db.add_test_record(f"{sys.argv[2]}{index:04d}", datetime(2026, 1, 1) + timedelta(hours=index), "PASS", f"/tmp/{sys.argv[2]}{index}.pdf")
+"""
+
+
+def test_role_arguments_override_config() -> None:
+    from run import parse_args
+
+    args = parse_args(["--role", "web", "--workers", "4"])
+    assert (args.role, args.workers) == ("web", 4)
+    assert parse_args([]).role is None
+
+
+def test_ingest_and_web_processes_share_writes_and_data_versions(tmp_path: Path) -> None:
+    path = tmp_path / "test.db"
+    web = Database(path)
+    web.create_tables()
+    with web.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    before = web.data_version("tests", "devices")
+
+    writers = [
+        subprocess.Popen([sys.executable, "-c", WRITER_SCRIPT, str(path), prefix], cwd=ROOT, stderr=subprocess.PIPE, text=True)
+        for prefix in ("ARRJ", "ARSK")
+    ]
+    for writer in writers:
+        _, stderr = writer.communicate(timeout=60)
+        assert writer.returncode == 0, stderr
+
+    with web.engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM tests").scalar() == 80
+    after = web.data_version("tests", "devices")
+    assert all(new >= old + 80 for old, new in zip(before, after))
+    assert asyncio.run(web.data_version_async("tests", "devices")) == after
+
+
+def test_open_read_transaction_does_not_block_writers(tmp_path: Path) -> None:
+    import threading
+
+    from sqlalchemy import func, select
+
+    from app.models import TestRecord as DbTestRecord
+
+    reader = Database(tmp_path / "shared.db")
+    reader.create_tables()
+    writer = Database(tmp_path / "shared.db")
+    [before] = reader.data_version("tests")
+    done = threading.Event()
+
+    with reader._read_session_maker() as session:
+        session.scalar(select(func.count(DbTestRecord.id)))
+        thread = threading.Thread(target=lambda: (writer.bump_data_version("tests"), done.set()), daemon=True)
+        thread.start()
+        assert done.wait(5), "writer waited on a read transaction"
+    assert reader.data_version("tests") == (before + 1,)
+
+
+def test_both_role_rejects_multiple_web_workers() -> None:
+    from run import main
+
+    with pytest.raises(SystemExit, match="web_workers: 1"):
+        main(["--role", "both", "--workers", "2"])
+
+
+def test_web_workers_inherit_command_line_overrides(monkeypatch: pytest.MonkeyPatch) -> None:
+    import json
+
+    from run import OVERRIDES_ENV, load_app_config
+
+    monkeypatch.setenv(OVERRIDES_ENV, json.dumps({"role": "web", "web_workers": 4}))
+    config = load_app_config()
+    assert (config.role, config.web_workers) == ("web", 4)
+
+
+def test_writes_bump_data_versions_in_the_same_transaction(tmp_path: Path) -> None:
+    from datetime import datetime
+
+    from sqlalchemy import event
+
+    db = Database(tmp_path / "test.db")
+    db.create_tables()
+    before = db.data_version("tests", "devices")
+    commits: list[object] = []
+    event.listen(db.engine, "commit", commits.append)
+
+    db.add_test_record("ARRJ0001", datetime(2026, 1, 1), "PASS", "/tmp/a.pdf")
+    db.delete_device("ARRJ0001")
+
+    assert len(commits) == 2
+    assert db.data_version("tests", "devices") == tuple(version + 2 for version in before)